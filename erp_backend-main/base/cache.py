@@ -0,0 +1,63 @@
+from time import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(namespace):
+    return f"version:{namespace}"
+
+
+def _seed_version():
+    # Seeded from the clock so a version lost to cache eviction never comes
+    # back with a value clients may still hold (e.g. in an ETag).
+    return int(time() * 1000)
+
+
+def get_version(namespace):
+    """
+    Current version number of `namespace` in the shared cache.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = _seed_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(namespace):
+    """
+    Invalidate everything cached under the current version of `namespace`.
+    """
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def table_namespace(table):
+    return f"table:{table}"
+
+
+def get_table_versions(tables):
+    return [get_version(table_namespace(table)) for table in tables]
+
+
+def bump_model_versions(*models):
+    """
+    Invalidate cached counts over the tables of `models` once the current
+    transaction commits, so no reader can cache a pre-commit count under the
+    new version. Model signals do this for saves and deletes; call it after
+    bulk_create / update() / raw SQL.
+    """
+    tables = {model._meta.db_table for model in models}
+
+    def bump():
+        for table in tables:
+            bump_version(table_namespace(table))
+
+    transaction.on_commit(bump)
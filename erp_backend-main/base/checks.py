@@ -0,0 +1,52 @@
+from django.core import checks
+from django.db.models import UniqueConstraint
+
+
+def model_indexes(model):
+    """Column tuples of every index on `model`, by field name."""
+    opts = model._meta
+    indexes = {(opts.pk.name,)}
+    for field in opts.local_fields:
+        if field.unique or field.db_index:
+            indexes.add((field.name,))
+    for index in opts.indexes:
+        indexes.add(tuple(name.lstrip('-') for name in index.fields))
+    for fields in opts.unique_together:
+        indexes.add(tuple(fields))
+    for constraint in opts.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.fields:
+            indexes.add(tuple(constraint.fields))
+    return indexes
+
+
+def all_subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from all_subclasses(subclass)
+
+
+@checks.register()
+def check_ordering_indexes(app_configs, **kwargs):
+    """
+    Every index a viewset names in ordering_fields must exist on its model and
+    lead with the sort field, so the declaration cannot drift from the schema.
+    """
+    from .views import BaseViewSet
+
+    errors = []
+    for viewset in all_subclasses(BaseViewSet):
+        if viewset.queryset is None:
+            continue
+        model = viewset.queryset.model
+        indexes = model_indexes(model)
+        for field, index in viewset.ordering_fields.items():
+            if index is None:
+                continue
+            if index[0] != field or tuple(index) not in indexes:
+                errors.append(checks.Error(
+                    f"{viewset.__name__}.ordering_fields['{field}'] names index {tuple(index)}, "
+                    f"which {model._meta.label} does not have or which does not start with '{field}'.",
+                    obj=viewset,
+                    id='base.E001',
+                ))
+    return errors
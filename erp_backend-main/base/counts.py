@@ -0,0 +1,80 @@
+import hashlib
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connection
+from .cache import get_table_versions
+
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+EXACT = 'exact'
+ESTIMATED = 'estimated'
+
+
+def _count_key(queryset):
+    """
+    Cache key for COUNT(*) of `queryset`: the SQL and parameters of the bare
+    filter plus the version of every table it reads, so a write to any of
+    those tables makes the key miss.
+    """
+    query = queryset.order_by().values('pk').query
+    sql, params = query.sql_with_params()
+    tables = sorted({join.table_name for join in query.alias_map.values()})
+    versions = get_table_versions(tables)
+    digest = hashlib.sha256(repr((sql, params, tables, versions)).encode()).hexdigest()
+    return f"count:{digest}"
+
+
+def cached_count(queryset):
+    """Exact count of `queryset`, served from cache until a table it reads changes."""
+    try:
+        key = _count_key(queryset)
+    except EmptyResultSet:
+        # e.g. queryset.none() or filter(id__in=[])
+        return 0
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout=COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def estimated_count(model):
+    """
+    Row count of `model`'s table from the planner statistics, or None when
+    there are none (SQLite before ANALYZE, other databases). MySQL's
+    TABLE_ROWS is an InnoDB estimate and can be off by tens of percent.
+    """
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    elif connection.vendor == 'mysql':
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # sqlite_stat1 only exists once ANALYZE has run
+        return None
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1.stat starts with the table's row count
+    return int(str(row[0]).split()[0])
+
+
+def list_count(queryset, estimated=False):
+    """
+    (count, count_type) for a list response. With `estimated`, an unfiltered
+    list uses the table statistics; anything else gets the cached exact count.
+    """
+    if estimated and not queryset.query.where:
+        count = estimated_count(queryset.model)
+        if count is not None:
+            return count, ESTIMATED
+    return cached_count(queryset), EXACT
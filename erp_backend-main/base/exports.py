@@ -0,0 +1,96 @@
+import csv
+import json
+import tempfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from rest_framework.exceptions import ValidationError
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+# Bytes read per chunk when streaming a finished XLSX file
+FILE_CHUNK_SIZE = 64 * 1024
+# Leading characters that make Excel and similar read a text cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def cell_value(value):
+    """
+    Flatten one serialized value into a spreadsheet cell. Text that would be
+    read as a formula is prefixed with a quote so it stays plain text.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (Decimal, date, datetime, time)):
+        return str(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def iter_records(rows, header):
+    """
+    Yield the header, then one list of cells per serialized row. `header`
+    is used until the first row arrives and supplies its own keys.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is not None:
+        header = list(first)
+    yield header
+    if first is None:
+        return
+    yield [cell_value(first.get(key)) for key in header]
+    for row in rows:
+        yield [cell_value(row.get(key)) for key in header]
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(records):
+    writer = csv.writer(_Echo())
+    # Byte order mark so Excel opens the file as UTF-8
+    yield '\ufeff'
+    for record in records:
+        yield writer.writerow(record)
+
+
+def stream_xlsx(records):
+    """
+    Write the records with openpyxl's write-only mode, which spools rows to a
+    temporary file instead of keeping cells in memory, then stream the file.
+    XLSX is a zip archive, so nothing can be sent before the last row.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for record in records:
+        sheet.append(record)
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+def export_stream(export_format, records):
+    """(streamed body, content type, file extension) for `export_format`."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError({'format': [f"Use one of: {', '.join(EXPORT_FORMATS)}."]})
+    content_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'xlsx':
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ValidationError({'format': ["XLSX export requires openpyxl. Use csv instead."]})
+        return stream_xlsx(records), content_type, extension
+    return stream_csv(records), content_type, extension
@@ -0,0 +1,152 @@
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (160, 160)
+# Larger originals are re-encoded down to this size
+MAX_IMAGE_SIZE = (1600, 1600)
+THUMBNAIL_FOLDER = 'thumbs'
+# Formats Pillow can re-encode without losing animation or transparency
+REENCODE_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+PILLOW_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+_executor = None
+
+
+def thumbnail_path(path):
+    """students/<hash>.png -> students/thumbs/<hash>.jpg"""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, THUMBNAIL_FOLDER, f"{os.path.splitext(name)[0]}.jpg")
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_image(source, thumbnail, thumbnail_size=THUMBNAIL_SIZE, max_size=MAX_IMAGE_SIZE):
+    """
+    Runs in a worker process on local file paths only, so it needs no Django
+    setup. Writes a JPEG thumbnail of `source` to `thumbnail`. When `source`
+    is larger than `max_size` a re-encoded copy is written next to it under
+    its own content hash (the original keeps matching its name, so upload
+    dedupe stays correct) and its path is returned; otherwise None.
+    """
+    from PIL import Image, ImageOps
+
+    resized_path = None
+    with Image.open(source) as original:
+        image_format = original.format
+        image = ImageOps.exif_transpose(original)
+
+        if image_format in REENCODE_FORMATS and (image.width > max_size[0] or image.height > max_size[1]):
+            resized = image.copy()
+            resized.thumbnail(max_size)
+            folder, name = os.path.split(source)
+            fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as temp:
+                    resized.save(temp, format=image_format, quality=85, optimize=True)
+                resized_path = os.path.join(folder, f"{_file_hash(temp_path)}{os.path.splitext(name)[1]}")
+                if os.path.exists(resized_path):
+                    os.remove(temp_path)
+                else:
+                    os.replace(temp_path, resized_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            image = resized
+
+        thumb = image.copy()
+        thumb.thumbnail(thumbnail_size)
+        if thumb.mode != 'RGB':
+            thumb = thumb.convert('RGB')
+        os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+        thumb.save(thumbnail, format='JPEG', quality=80, optimize=True)
+    return resized_path
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # spawn keeps workers free of the parent's threads and DB connections
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def _record_thumbnail(queryset, source_field, thumbnail_field, path, future):
+    try:
+        resized = future.result()
+        updates = {thumbnail_field: thumbnail_path(path)}
+        if resized:
+            updates[source_field] = os.path.join(os.path.dirname(path), os.path.basename(resized))
+        # Skip rows whose photo was replaced while the thumbnail was rendering
+        queryset.filter(**{source_field: path}).update(**updates)
+    except Exception:
+        logger.exception("Thumbnail generation for %s failed.", path)
+    finally:
+        connections.close_all()
+
+
+def _start_thumbnail(queryset, source_field, thumbnail_field, storage):
+    path = queryset.values_list(source_field, flat=True).first()
+    if not path:
+        queryset.update(**{thumbnail_field: None})
+        return
+
+    thumbnail = thumbnail_path(path)
+    if storage.exists(thumbnail):
+        # Same content was uploaded before; reuse its thumbnail and, when the
+        # original was oversized, the re-encoded copy the earlier row points to
+        rendered = queryset.model._default_manager.filter(
+            **{thumbnail_field: thumbnail}
+        ).values_list(source_field, flat=True).first()
+        if rendered:
+            queryset.update(**{source_field: rendered, thumbnail_field: thumbnail})
+            return
+
+    queryset.update(**{thumbnail_field: None})
+    try:
+        source, target = storage.path(path), storage.path(thumbnail)
+    except NotImplementedError:
+        logger.warning("Storage has no local paths; skipping thumbnail for %s.", path)
+        return
+
+    future = get_executor().submit(render_image, source, target)
+    future.add_done_callback(
+        lambda done: _record_thumbnail(queryset, source_field, thumbnail_field, path, done)
+    )
+
+
+def queue_thumbnail(queryset, source_field, thumbnail_field, storage=None):
+    """
+    After the current transaction commits, render a thumbnail (and a shrunk
+    copy of an oversized original, which replaces it in `source_field`) for
+    the image stored in `source_field` of the rows in `queryset`, then record
+    its path in `thumbnail_field`. The work runs in a
+    process pool so requests never wait for image decoding.
+    """
+    if not PILLOW_AVAILABLE:
+        return
+    storage = storage or default_storage
+    transaction.on_commit(
+        lambda: _start_thumbnail(queryset, source_field, thumbnail_field, storage),
+        robust=True
+    )
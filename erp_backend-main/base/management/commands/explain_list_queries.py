@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import get_resolver
+from rest_framework.exceptions import ValidationError
+from base.views import BaseViewSet
+
+
+def iter_list_viewsets(patterns, prefix=''):
+    """Yield (url, viewset class) for every route bound to BaseViewSet.post."""
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from iter_list_viewsets(pattern.url_patterns, prefix + str(pattern.pattern))
+            continue
+        view_class = getattr(pattern.callback, 'cls', None)
+        actions = getattr(pattern.callback, 'actions', None) or {}
+        if view_class and issubclass(view_class, BaseViewSet) and actions.get('post') == 'post':
+            yield prefix + str(pattern.pattern), view_class
+
+
+def explain(queryset):
+    """Return the plan rows for `queryset` as a list of dicts."""
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def plan_problems(rows, filtered):
+    """
+    Full table scans and sorts that cannot use an index. SQLite reports them as
+    "SCAN <table>" without an index and "USE TEMP B-TREE"; MySQL as type=ALL
+    and "Using filesort".
+
+    SQLite also shows "SCAN <table>" for a walk in primary key order, which
+    stops after LIMIT rows; that only counts as a full scan when the query is
+    filtered or has to be sorted afterwards.
+    """
+    problems = []
+    sorted_in_memory = any('USE TEMP B-TREE' in row.get('detail', '') for row in rows)
+    for row in rows:
+        if connection.vendor == 'sqlite':
+            detail = row.get('detail', '')
+            if detail.startswith('SCAN ') and 'USING' not in detail:
+                if filtered or sorted_in_memory:
+                    problems.append(f"full scan: {detail}")
+            elif 'USE TEMP B-TREE' in detail:
+                problems.append(f"sort without index: {detail}")
+        else:
+            extra = row.get('Extra') or ''
+            if row.get('type') == 'ALL':
+                problems.append(f"full scan: {row.get('table')}")
+            if 'Using filesort' in extra:
+                problems.append(f"sort without index: {row.get('table')} ({extra})")
+    return problems
+
+
+def format_row(row):
+    if connection.vendor == 'sqlite':
+        return row.get('detail', '')
+    return ', '.join(f"{key}={value}" for key, value in row.items() if value is not None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the default list query of every BaseViewSet and flag "
+        "full table scans and unindexed sorts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--search', help="Also explain the list query for this search_text.")
+        parser.add_argument('--order-by', help="order_by_field to explain instead of the default.")
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if any query is flagged.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'mysql'):
+            raise CommandError(f"EXPLAIN parsing is only implemented for SQLite and MySQL, not {connection.vendor}.")
+
+        params = {}
+        if options['search']:
+            params['search_text'] = options['search']
+        if options['order_by']:
+            params['order_by_field'] = options['order_by']
+
+        flagged = 0
+        seen = set()
+        for url, view_class in iter_list_viewsets(get_resolver().url_patterns):
+            if view_class in seen:
+                continue
+            seen.add(view_class)
+
+            view = view_class()
+            view.kwargs = {}
+            queryset = view.filter_queryset(view.get_queryset(), params)
+            try:
+                ordering = view.get_ordering(params)
+            except ValidationError:
+                self.stdout.write(f"{view_class.__name__} (/{url}) skipped: cannot order by {options['order_by']}")
+                continue
+            if ordering:
+                queryset = queryset.order_by(*ordering)
+            rows = explain(queryset[:options['page_size']])
+            problems = plan_problems(rows, filtered=bool(queryset.query.where))
+
+            style = self.style.WARNING if problems else self.style.SUCCESS
+            self.stdout.write(style(f"{view_class.__name__} (/{url})"))
+            for row in rows:
+                self.stdout.write(f"    {format_row(row)}")
+            for problem in problems:
+                self.stdout.write(self.style.WARNING(f"  ! {problem}"))
+            flagged += bool(problems)
+
+        summary = f"{flagged} of {len(seen)} list queries flagged."
+        if flagged and options['fail_on_scan']:
+            raise CommandError(summary)
+        self.stdout.write(summary)
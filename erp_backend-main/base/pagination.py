@@ -0,0 +1,94 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from django.core import signing
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+CURSOR_SALT = 'base.pagination.cursor'
+
+
+def _cursor_value(value):
+    # Cursor payloads are JSON, so non-native values are carried as strings;
+    # Django parses them back when they are used in a lookup.
+    if isinstance(value, (Decimal, date, datetime, time, UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(ordering, values):
+    """
+    Build an opaque, signed cursor pointing just after the row whose
+    ordering key is `values`.
+    """
+    payload = {'o': list(ordering), 'v': [_cursor_value(value) for value in values]}
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor, ordering):
+    """
+    Return the key values stored in `cursor`, or raise a ValidationError if it
+    was tampered with or was issued for a different ordering.
+    """
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValidationError({'cursor': ["Invalid cursor."]})
+    if payload.get('o') != list(ordering) or len(payload.get('v', [])) != len(ordering):
+        raise ValidationError({'cursor': ["Cursor does not match the requested ordering."]})
+    return payload['v']
+
+
+def _after(field, descending, value):
+    # SQLite and MySQL both sort NULL as the smallest value, so NULLs come
+    # first in ascending order and last in descending order.
+    if value is None:
+        return Q() if descending else Q(**{f"{field}__isnull": False})
+    if descending:
+        return Q(**{f"{field}__lt": value}) | Q(**{f"{field}__isnull": True})
+    return Q(**{f"{field}__gt": value})
+
+
+def _equal(field, value):
+    if value is None:
+        return Q(**{f"{field}__isnull": True})
+    return Q(**{field: value})
+
+
+def keyset_filter(ordering, values):
+    """
+    Q object selecting the rows that sort strictly after `values` for the
+    given ordering, e.g. ['-name', '-id'] seeks on (name, id).
+    """
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for name, value in zip(ordering, values):
+        descending = name.startswith('-')
+        field = name.lstrip('-')
+        after = _after(field, descending, value)
+        if after:
+            condition |= prefix & after
+        prefix &= _equal(field, value)
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor, page_size):
+    """
+    Seek-based pagination over `queryset` ordered by `ordering`, which must end
+    with a unique column (normally id) so every row has a distinct key.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    keys = {f"cursor_key_{index}": F(name.lstrip('-')) for index, name in enumerate(ordering)}
+    queryset = queryset.annotate(**keys).order_by(*ordering)
+
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, ordering)))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(ordering, [getattr(last, key) for key in keys])
@@ -0,0 +1,110 @@
+from contextlib import contextmanager, nullcontext
+from django.db import IntegrityError, transaction
+from django.db.models import UniqueConstraint
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+
+def unique_field_sets(model):
+    """Field name tuples the database keeps unique on `model`."""
+    opts = model._meta
+    field_sets = [(field.name,) for field in opts.local_fields if field.unique and not field.primary_key]
+    field_sets += [tuple(fields) for fields in opts.unique_together]
+    field_sets += [
+        tuple(constraint.fields) for constraint in opts.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.fields and constraint.condition is None
+    ]
+    return field_sets
+
+
+def row_values(model, validated_data, instance=None):
+    """Field values a save of `validated_data` would leave on the row."""
+    values = {field.name: getattr(instance, field.name) for field in model._meta.concrete_fields} if instance else {}
+    values.update(validated_data)
+    return values
+
+
+class UniqueConstraintMixin:
+    """
+    ModelSerializer mixin that leaves uniqueness to the database constraints
+    instead of querying for duplicates before every save. DRF's unique
+    validators are dropped; an IntegrityError raised by save() is matched to
+    the unique field set it violated and re-raised as a ValidationError on
+    that field, so the response keeps the usual field error format.
+    """
+    # Field name -> message, formatted with the row's values. A unique set
+    # reports on its first field listed here (or its last field).
+    unique_error_messages = {}
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if 'validators' in field_kwargs:
+            field_kwargs['validators'] = [
+                validator for validator in field_kwargs['validators']
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return field_class, field_kwargs
+
+    def get_validators(self):
+        # Only explicitly declared validators, no UniqueTogetherValidator
+        validators = getattr(getattr(self, 'Meta', None), 'validators', None)
+        return list(validators) if validators is not None else []
+
+    def create(self, validated_data):
+        with self.unique_errors(validated_data):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self.unique_errors(validated_data, instance):
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def unique_errors(self, validated_data, instance=None):
+        # Inside a transaction the failing statement needs its own savepoint,
+        # or the lookup in raise_unique_error could not run afterwards.
+        in_transaction = transaction.get_connection().in_atomic_block
+        try:
+            with transaction.atomic() if in_transaction else nullcontext():
+                yield
+        except IntegrityError:
+            self.raise_unique_error(validated_data, instance)
+            raise
+
+    def raise_unique_error(self, validated_data, instance=None):
+        """
+        Raise a ValidationError for the unique field set the row collides
+        with. Runs only after a failed save; returns if nothing collides, so
+        other integrity errors propagate unchanged.
+        """
+        model = self.Meta.model
+        values = row_values(model, validated_data, instance)
+
+        queryset = model._default_manager.all()
+        if instance is not None:
+            queryset = queryset.exclude(pk=instance.pk)
+        for fields in unique_field_sets(model):
+            if not all(field in values for field in fields):
+                continue
+            if not queryset.filter(**{field: values[field] for field in fields}).exists():
+                continue
+            field = next((name for name in fields if name in self.unique_error_messages), fields[-1])
+            message = self.unique_error_messages.get(
+                field, "{} with this {} already exists.".format(
+                    model._meta.verbose_name.capitalize(),
+                    ' and '.join(str(model._meta.get_field(name).verbose_name) for name in fields)
+                )
+            )
+            raise serializers.ValidationError({field: [message.format(**values)]})
+
+
+def has_custom_save(serializer_class):
+    """
+    True when `serializer_class` overrides create() or update() beyond the
+    plain ModelSerializer ones (e.g. to write related rows or keep counters),
+    so its rows must be saved through the serializer, not bulk statements.
+    """
+    plain = {
+        serializers.ModelSerializer.create, serializers.ModelSerializer.update,
+        UniqueConstraintMixin.create, UniqueConstraintMixin.update,
+    }
+    return serializer_class.create not in plain or serializer_class.update not in plain
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+from .cache import bump_model_versions
+
+# Sent with sender=<model> after bulk writes that skip post_save (e.g.
+# BaseViewSet.batch), so caches over the model can be invalidated.
+batch_written = Signal()
+
+
+def bump_table_version(sender, **kwargs):
+    bump_model_versions(sender)
+
+
+def track_model_writes(model):
+    """
+    Bump `model`'s table version on every save and delete so cached list
+    counts over it are invalidated. Writes that bypass signals must send
+    batch_written or call base.cache.bump_model_versions themselves.
+    """
+    label = model._meta.label
+    post_save.connect(bump_table_version, sender=model, dispatch_uid=f"table-version-save-{label}")
+    post_delete.connect(bump_table_version, sender=model, dispatch_uid=f"table-version-delete-{label}")
+    batch_written.connect(bump_table_version, sender=model, dispatch_uid=f"table-version-batch-{label}")
@@ -1,3 +1,207 @@
+import csv
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from authuser.models import CustomUser
+from master.models import Hostel, HostelRoom, RoomType, SchoolClass, Section
+from student.models import StudentAdmission, StudentHostelDetail
+from student.views import StudentViewSet
+from .exports import cell_value
+from .images import render_image, thumbnail_path
 
-# Create your tests here.
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        # Repeated names, so pages must break ties on id
+        for index in range(25):
+            Section.objects.create(name=f'S{index % 7}', class_id=SchoolClass.objects.create(name=f'Class {index}'))
+
+    def walk(self, **params):
+        rows, cursor = [], None
+        while True:
+            response = self.client.post('/api/master/sections/', {**params, 'cursor': cursor}, format='json').json()
+            rows += [(row['name'], row['id']) for row in response['data']]
+            cursor = response['next_cursor']
+            if not cursor:
+                return rows, response
+
+    def test_pages_cover_every_row_once_in_order(self):
+        rows, last = self.walk(pageSize=4, order_by_field='name', order_by_value='asc', include_count=True)
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual(len(set(rows)), 25)
+        self.assertEqual(last['count'], 25)
+
+    def test_descending_order(self):
+        rows, _ = self.walk(pageSize=3, order_by_field='name', order_by_value='desc')
+        self.assertEqual(rows, sorted(rows, reverse=True))
+        self.assertEqual(len(set(rows)), 25)
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.post('/api/master/sections/', {'cursor': 'junk'}, format='json').json()
+        self.assertEqual(response['status'], 400)
+
+
+class PagePaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        for index in range(5):
+            Section.objects.create(name=f'S{index}', class_id=SchoolClass.objects.create(name=f'Class {index}'))
+
+    def page(self, **params):
+        return self.client.post('/api/master/sections/', params, format='json').json()
+
+    def test_changed_page_size_resets_to_the_first_page(self):
+        self.assertEqual(self.page(page=2, pageSize=2, prev_pageSize=2)['page'], 2)
+        self.assertEqual(self.page(page=2, pageSize=2, prev_pageSize=3)['page'], 1)
+
+    def test_non_numeric_paging_parameters_are_rejected(self):
+        for name in ('page', 'pageSize', 'prev_pageSize'):
+            response = self.page(**{name: 'abc'})
+            self.assertEqual(response['status'], 400)
+            self.assertEqual(response['errors'], {name: ['A valid integer is required.']})
+
+
+class RenderImageTests(TestCase):
+    def setUp(self):
+        from PIL import Image
+
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.source = os.path.join(self.folder, 'original.png')
+        Image.new('RGB', (2400, 1200), 'red').save(self.source)
+        with open(self.source, 'rb') as file:
+            self.original = file.read()
+
+    def test_oversized_image_is_copied_under_its_own_hash(self):
+        thumbnail = thumbnail_path(self.source)
+        resized = render_image(self.source, thumbnail)
+
+        # The original still matches the content hash it is stored under
+        with open(self.source, 'rb') as file:
+            self.assertEqual(file.read(), self.original)
+        with open(resized, 'rb') as file:
+            self.assertEqual(os.path.basename(resized), f"{hashlib.sha256(file.read()).hexdigest()}.png")
+        self.assertTrue(os.path.exists(thumbnail))
+        self.assertEqual(render_image(self.source, thumbnail), resized)
+
+    def test_small_image_is_left_alone(self):
+        self.assertIsNone(render_image(self.source, thumbnail_path(self.source), max_size=(4000, 4000)))
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('admin@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.school_class = SchoolClass.objects.create(name='Class 1')
+
+    def batch(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/master/sections/batch/', body, format='json').json()
+
+    def test_create_update_and_delete_in_one_batch(self):
+        kept = Section.objects.create(name='Z', class_id=self.school_class)
+        gone = Section.objects.create(name='Y', class_id=self.school_class)
+        response = self.batch({
+            'create': [{'name': name, 'class_id': self.school_class.pk} for name in 'AB'],
+            'update': [{'id': kept.pk, 'name': 'ZZ'}],
+            'delete': [gone.pk],
+        })
+        self.assertEqual(response['message'], 'Batch saved successfully.')
+        self.assertEqual([row['data']['name'] for row in response['data']['create']], ['A', 'B'])
+        self.assertEqual(sorted(Section.objects.values_list('name', flat=True)), ['A', 'B', 'ZZ'])
+
+    def test_any_invalid_item_saves_nothing(self):
+        response = self.batch({'create': [
+            {'name': 'A', 'class_id': self.school_class.pk},
+            {'name': 'Q', 'class_id': self.school_class.pk},
+            {'name': 'Q', 'class_id': self.school_class.pk},
+        ]})
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertEqual(response['errors']['create'], [{'index': 2, 'errors': {'name': ["Repeats the value of another row in this batch."]}}])
+        self.assertFalse(Section.objects.exists())
+
+    def test_created_ids_are_read_back_without_returning_inserts(self):
+        # MySQL returns no ids from bulk inserts; they are looked up by a unique key
+        with mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False
+        ):
+            response = self.batch({'create': [{'name': name, 'class_id': self.school_class.pk} for name in 'AB']})
+        created = {row['data']['name']: row['data']['id'] for row in response['data']['create']}
+        self.assertEqual(created, dict(Section.objects.values_list('name', 'id')))
+
+    def test_serializers_with_save_logic_save_row_by_row(self):
+        room = HostelRoom.objects.create(
+            room_no='101', hostel=Hostel.objects.create(name='H1', hostel_type='Boys', address='Campus', intake=10),
+            room_type=RoomType.objects.create(room_type='Single'), number_of_beds=1, cost_per_bed=1000
+        )
+        section = Section.objects.create(name='A', class_id=self.school_class)
+        student = lambda roll_number: {
+            'roll_number': roll_number, 'school_class': self.school_class.pk, 'section': section.pk,
+            'first_name': 'First', 'last_name': 'Last', 'gender': 'Male', 'date_of_birth': '2015-01-01',
+            'fee_details': '[]', 'hostel_room': room.pk,
+        }
+        view = StudentViewSet.as_view({'post': 'batch'})
+
+        def batch(body):
+            request = APIRequestFactory().post('/api/student/batch/', body, format='json')
+            force_authenticate(request, self.user)
+            return view(request).data
+
+        response = batch({'create': [student('B1')]})
+        self.assertEqual(response['message'], 'Batch saved successfully.')
+        room.refresh_from_db()
+        self.assertEqual(room.occupied_beds, 1)
+        self.assertIsNotNone(StudentHostelDetail.objects.get(student__roll_number='B1').bed)
+
+        # The room is full: allocate_bed refuses the row and the batch rolls back
+        response = batch({'create': [student('B2')]})
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertIn('hostel_room', response['errors']['create'][0]['errors'])
+        self.assertFalse(StudentAdmission.objects.filter(roll_number='B2').exists())
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        school_class = SchoolClass.objects.create(name='Class 1')
+        for name in ('A', '=HYPERLINK("http://x")', '+1', '-2+3', '@SUM(A1)'):
+            Section.objects.create(name=name, class_id=school_class)
+
+    def export(self, export_format):
+        response = self.client.post('/api/master/sections/export/', {
+            'format': export_format, 'fields': ['name'], 'order_by_field': 'id', 'order_by_value': 'asc'
+        }, format='json')
+        return b''.join(response.streaming_content)
+
+    def test_formula_cells_are_quoted_in_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode('utf-8-sig'))))
+        self.assertEqual([name for _, name in rows], ['name', 'A', '\'=HYPERLINK("http://x")', "'+1", "'-2+3", "'@SUM(A1)"])
+
+    def test_formula_cells_are_quoted_in_xlsx(self):
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(io.BytesIO(self.export('xlsx'))).active
+        self.assertEqual([name for _, name in sheet.iter_rows(values_only=True)][1:], [
+            'A', '\'=HYPERLINK("http://x")', "'+1", "'-2+3", "'@SUM(A1)"
+        ])
+
+    def test_numbers_and_plain_text_are_unchanged(self):
+        self.assertEqual(cell_value(-5), -5)
+        self.assertEqual(cell_value('a=b'), 'a=b')
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
+
+# (signature, offset, content type, extension) checked against the first bytes
+# of the upload; the client-sent Content-Type header is never trusted.
+FILE_SIGNATURES = [
+    (b'\xff\xd8\xff', 0, 'image/jpeg', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 0, 'image/png', 'png'),
+    (b'GIF87a', 0, 'image/gif', 'gif'),
+    (b'GIF89a', 0, 'image/gif', 'gif'),
+    (b'WEBP', 8, 'image/webp', 'webp'),
+    (b'BM', 0, 'image/bmp', 'bmp'),
+    (b'%PDF-', 0, 'application/pdf', 'pdf'),
+    (b'PK\x03\x04', 0, 'application/zip', 'zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 0, 'application/x-ole-storage', 'ole'),
+]
+
+# Office documents are zip / OLE containers; the extension picks the real type
+CONTAINER_TYPES = {
+    'zip': {
+        'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    },
+    'ole': {
+        'doc': 'application/msword',
+        'xls': 'application/vnd.ms-excel',
+        'ppt': 'application/vnd.ms-powerpoint',
+    },
+}
+
+
+def sniff_content_type(file):
+    """
+    Detect (content_type, extension) from the file's magic bytes. Returns
+    (None, None) when the content is not a recognised image or document.
+    """
+    file.seek(0)
+    head = file.read(16)
+    file.seek(0)
+
+    for signature, offset, content_type, ext in FILE_SIGNATURES:
+        if head[offset:offset + len(signature)] != signature:
+            continue
+        if ext == 'webp' and not head.startswith(b'RIFF'):
+            continue
+        if ext in CONTAINER_TYPES:
+            name_ext = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
+            if name_ext not in CONTAINER_TYPES[ext]:
+                return None, None
+            return CONTAINER_TYPES[ext][name_ext], name_ext
+        return content_type, ext
+    return None, None
+
+
+def content_hash(file):
+    """SHA-256 of the upload, read chunk by chunk."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def validate_upload(file, allowed_types, max_size=MAX_UPLOAD_SIZE):
+    """
+    Check size and sniffed type of `file`; `allowed_types` holds content type
+    prefixes such as ('image/',). Returns the file extension to store it with.
+    """
+    if file.size > max_size:
+        raise ValueError(f"File too large (max {max_size // (1024 * 1024)}MB).")
+    content_type, ext = sniff_content_type(file)
+    if content_type is None or not content_type.startswith(tuple(allowed_types)):
+        raise ValueError("Unsupported file type.")
+    return ext
+
+
+def upload_path(folder, file, ext):
+    """Content-addressed path, so identical uploads share one stored file."""
+    return os.path.join(folder, f"{content_hash(file)}.{ext}")
+
+
+def store_file(path, file, storage=None):
+    """
+    Write `file` to `path` unless the same content is already stored there.
+    Storage backends stream UploadedFile.chunks(), so the upload is never
+    read into memory. Returns the stored path and whether it was written.
+    """
+    storage = storage or default_storage
+    if storage.exists(path):
+        return path, False
+    file.seek(0)
+    return storage.save(path, file), True
+
+
+class UploadBatch:
+    """
+    Files uploaded with a request, written to storage only once the database
+    transaction that references them commits.
+
+    `stage()` hands out the final storage path straight away so it can be
+    validated and saved with the rows; `commit_on_success()` must be called
+    inside the transaction. If the transaction rolls back the staged files are
+    simply dropped, so a failed request leaves no orphaned files behind.
+    """
+
+    def __init__(self, folder, storage=None):
+        self.folder = folder
+        self.storage = storage or default_storage
+        self.pending = {}
+
+    def stage(self, file, allowed_types, max_size=MAX_UPLOAD_SIZE):
+        ext = validate_upload(file, allowed_types, max_size)
+        path = upload_path(self.folder, file, ext)
+        self.pending.setdefault(path, file)
+        return path
+
+    def commit_on_success(self):
+        if self.pending:
+            transaction.on_commit(self.write, robust=True)
+
+    def write(self):
+        written = []
+        try:
+            for path, file in self.pending.items():
+                saved_path, created = store_file(path, file, self.storage)
+                if created:
+                    written.append(saved_path)
+        except Exception:
+            logger.exception("Writing uploaded files to %s failed; removing the partial batch.", self.folder)
+            for path in written:
+                self.storage.delete(path)
+            raise
+        finally:
+            self.pending = {}
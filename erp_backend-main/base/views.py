@@ -3,13 +3,50 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import JSONParser
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.generics import get_object_or_404
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Q
+from django.db.models.deletion import Collector, ProtectedError, RestrictedError
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, OpenApiExample, OpenApiTypes
 from math import ceil
+from .pagination import paginate_keyset
+from .counts import list_count, ESTIMATED
+from .exports import export_stream, iter_records
+from .serializers import has_custom_save, row_values, unique_field_sets
+from .signals import batch_written, track_model_writes
+
+class BatchRejected(Exception):
+    """Raised inside a batch transaction to roll it back after item errors."""
+
+
+def int_param(params, name, default=None):
+    """`params[name]` as an int, `default` when absent; a ValidationError otherwise."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: ["A valid integer is required."]})
+
+
+def bool_param(params, name, default=False):
+    """`params[name]` read as DRF reads booleans ("false", 0 and "no" are False)."""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return BooleanField().to_internal_value(value)
+    except ValidationError:
+        raise ValidationError({name: ["Must be a valid boolean."]})
+
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'pageSize'
@@ -23,6 +60,30 @@ class BaseViewSet(viewsets.ViewSet):
     pagination_class = CustomPagination
     serializer_class = None
     queryset = None
+    # Relations the list/retrieve serializers read, loaded up front so
+    # serializing a page does not issue a query per row.
+    select_related_fields = []
+    prefetch_related_fields = []
+    # Fields clients may sort on, each mapped to the columns of the index
+    # that serves the sort (checked at startup by base.checks), or None when
+    # no index does; unindexed sorts are refused on large result sets.
+    ordering_fields = {'id': ('id',)}
+    # Output fields mapped to the relation paths they read, for fields whose
+    # serializer source does not show it (e.g. flattened serializers).
+    field_relations = {}
+    # Most rows one batch request may create, update and delete together
+    batch_max_items = 500
+    # Whether batch saves each row through serializer.save() instead of bulk
+    # statements; None decides from the serializer (see has_custom_save)
+    batch_saves_rows = None
+    # Rows fetched per query by the export action
+    export_chunk_size = 2000
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.queryset is not None:
+            # Keeps cached list counts for this model in step with writes
+            track_model_writes(cls.queryset.model)
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -41,10 +102,93 @@ class BaseViewSet(viewsets.ViewSet):
     def get_search_fields(self):
         return []
 
-    def get_queryset(self):
+    def get_queryset(self, fields=None):
+        """
+        With `fields` (a sparse fieldset), only the relations and columns
+        those fields read are joined, prefetched and selected.
+        """
         if self.queryset is None:
             raise NotImplementedError("Define queryset or override get_queryset()")
-        return self.queryset.all()
+        queryset = self.queryset.all()
+        select_related, prefetch_related = self.select_related_fields, self.prefetch_related_fields
+        if fields is not None:
+            select_related, prefetch_related, columns = self.get_fieldset_plan(fields)
+            queryset = queryset.only(*columns)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def get_requested_fields(self, params):
+        """
+        The `fields` parameter as a list (JSON list or comma separated
+        string), always including id; None when every field is wanted.
+        """
+        fields = params.get('fields')
+        if not fields:
+            return None
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        fields = [str(field).strip() for field in fields if str(field).strip()]
+        return ['id'] + [field for field in fields if field != 'id']
+
+    def get_serializer(self, *args, fields=None, **kwargs):
+        """
+        serializer_class instance limited to `fields`; the names are also passed
+        in the context for serializers that add fields in to_representation.
+        """
+        context = {**kwargs.pop('context', {}), 'fields': fields}
+        serializer = self.serializer_class(*args, context=context, **kwargs)
+        if fields is not None:
+            child = getattr(serializer, 'child', serializer)
+            for name in list(child.fields):
+                if name not in fields:
+                    child.fields.pop(name)
+        return serializer
+
+    def get_fieldset_plan(self, fields):
+        """
+        (select_related, prefetch_related, only() columns) needed to render
+        `fields`. Relations come from field_relations or from dotted
+        serializer sources; related rows reached through select_related are
+        loaded whole so their serializers never hit a deferred column.
+        """
+        model = self.queryset.model
+        relations = set()
+        columns = set()
+        for name in fields:
+            relations.update(self.field_relations.get(name, ()))
+
+        for name, field in self.get_serializer(fields=fields).fields.items():
+            if field.write_only or name in self.field_relations or field.source == '*':
+                continue
+            parts = field.source.split('.')
+            if len(parts) > 1:
+                relations.add('__'.join(parts[:-1]))
+            elif field.source in self.prefetch_related_fields:
+                relations.add(field.source)
+            else:
+                try:
+                    model_field = model._meta.get_field(field.source)
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete and not model_field.many_to_many:
+                    columns.add(model_field.name)
+
+        select_related = sorted(
+            relation for relation in relations
+            if any(path == relation or path.startswith(f"{relation}__") for path in self.select_related_fields)
+        )
+        prefetch_related = sorted(relation for relation in relations if relation in self.prefetch_related_fields)
+        for path in select_related:
+            related_model = model
+            prefix = []
+            for part in path.split('__'):
+                related_model = related_model._meta.get_field(part).related_model
+                prefix.append(part)
+                columns.update(f"{'__'.join(prefix)}__{column.name}" for column in related_model._meta.concrete_fields)
+        return select_related, prefetch_related, sorted(columns)
 
     def validate_required_fields(self, data, partial=False):
         required_fields = self.get_required_fields()
@@ -60,22 +204,8 @@ class BaseViewSet(viewsets.ViewSet):
         if errors:
             raise ValidationError(errors)
 
-    def post(self, request):
-        params = request.data  # Now using request body instead of query params
-        pageSize = int(params.get('pageSize', 10))
-        prev_pageSize = request.session.get('prev_pageSize')
-        page = int(params.get('page', 1))
-
-        if prev_pageSize is not None and prev_pageSize != pageSize:
-            page = 1
-        request.session['prev_pageSize'] = pageSize
-
-        order_by_field = params.get('order_by_field', 'id')
-        order_by_value = params.get('order_by_value', 'desc')
+    def filter_queryset(self, queryset, params):
         search_text = params.get('search_text', '').strip()
-
-        queryset = self.get_queryset()
-
         if search_text:
             search_fields = self.get_search_fields()
             queries = Q()
@@ -83,58 +213,201 @@ class BaseViewSet(viewsets.ViewSet):
                 kwargs = {f"{field}__icontains": search_text}
                 queries |= Q(**kwargs)
             queryset = queryset.filter(queries)
+        return queryset
 
-        if order_by_field:
-            order = order_by_field if order_by_value.lower() == 'asc' else f"-{order_by_field}"
-            queryset = queryset.order_by(order)
+    def get_ordering(self, params):
+        """
+        Ordering from `order_by_field` / `order_by_value`. Both accept comma
+        separated lists for multi-column sorts, e.g. "school_class,roll_number"
+        with "asc,desc"; a single direction applies to every field.
+        """
+        order_by_field = params.get('order_by_field', 'id')
+        order_by_value = params.get('order_by_value', 'desc')
+        if not order_by_field:
+            return []
+
+        fields = [field.strip() for field in str(order_by_field).split(',') if field.strip()]
+        directions = [value.strip().lower() for value in str(order_by_value or 'desc').split(',')]
+        if len(directions) == 1:
+            directions = directions * len(fields)
+        if len(directions) != len(fields):
+            raise ValidationError({'order_by_value': ["Give one direction, or one per order_by_field."]})
+
+        unknown = [field for field in fields if field != 'pk' and field not in self.ordering_fields]
+        if unknown:
+            raise ValidationError({'order_by_field': [
+                f"Cannot order by {', '.join(unknown)}. Allowed: {', '.join(self.ordering_fields)}."
+            ]})
+
+        ordering = [
+            f"{'' if direction == 'asc' else '-'}{field}"
+            for field, direction in zip(fields, directions)
+        ]
+        if not any(field in ('id', 'pk') for field in fields):
+            # Stable tiebreaker so rows with equal sort values keep their place
+            ordering.append(f"{'' if directions[-1] == 'asc' else '-'}id")
+        return ordering
+
+    def check_ordering_cost(self, queryset, ordering, total_count=None):
+        """
+        Refuse a sort whose leading field has no index once it would have to
+        sort more than UNINDEXED_SORT_MAX_ROWS rows in memory.
+        """
+        if not ordering:
+            return
+        field = ordering[0].lstrip('-')
+        if field == 'pk' or self.ordering_fields.get(field):
+            return
+        limit = settings.UNINDEXED_SORT_MAX_ROWS
+        if total_count is None:
+            # Bounded count: stops after limit + 1 rows
+            total_count = queryset.order_by()[:limit + 1].count()
+        if total_count > limit:
+            raise ValidationError({'order_by_field': [
+                f"Sorting by {field} is only allowed for up to {limit} rows; narrow the search or sort by an indexed field."
+            ]})
+
+    def post(self, request):
+        params = request.data  # Now using request body instead of query params
+        pageSize = int_param(params, 'pageSize', 10)
+        page = int_param(params, 'page', 1)
+
+        # Stateless page reset: the client echoes the pageSize it used last
+        # time, so no session is read or written on list calls.
+        prev_pageSize = int_param(params, 'prev_pageSize')
+        if prev_pageSize is not None and prev_pageSize != pageSize:
+            page = 1
 
-        total_count = queryset.count()
+        fields = self.get_requested_fields(params)
+        queryset = self.filter_queryset(self.get_queryset(fields), params)
+
+        if 'cursor' in params:
+            return self.cursor_response(queryset, params, pageSize)
+
+        ordering = self.get_ordering(params)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+
+        # Counted once, from cache while the tables are unchanged; with
+        # count_mode "estimated" unfiltered lists use table statistics.
+        total_count, count_type = list_count(queryset, estimated=params.get('count_mode') == ESTIMATED)
+        self.check_ordering_cost(queryset, ordering, total_count)
         if total_count == 0:
             response_data = {
                 "message": "Success",
                 "status": status.HTTP_200_OK,
                 "data": [],
                 "count": 0,
+                "count_type": count_type,
                 "page": page,
                 "pageSize": pageSize,
                 "no_of_pages": 0
             }
             return Response(response_data, status=status.HTTP_200_OK)    
-        paginator = self.pagination_class()
-        paginator.page_size = pageSize
 
-        # Mutate the underlying GET query dict for paginator
-        from django.http import QueryDict
-        query_params = request.query_params.copy()
-        query_params['page'] = str(page)
-        request._request.GET = query_params
+        no_of_pages = ceil(total_count / pageSize) if pageSize else 1
+        if page < 1 or pageSize < 1 or (count_type != ESTIMATED and page > no_of_pages):
+            raise NotFound("Invalid page.")
 
-        paginated_qs = paginator.paginate_queryset(queryset, request)
-        serializer = self.serializer_class(paginated_qs, many=True)
+        # Sliced directly so the paginator does not run COUNT(*) again
+        offset = (page - 1) * pageSize
+        serializer = self.get_serializer(queryset[offset:offset + pageSize], fields=fields, many=True)
 
-        no_of_pages = ceil(total_count / pageSize) if pageSize else 1
-        
         response_data = {
             "message": "Success",
             "status": status.HTTP_200_OK,
             "data": serializer.data,
-            "count": queryset.count(),
+            "count": total_count,
+            "count_type": count_type,
             "page": page,
             "pageSize": pageSize,
             "no_of_pages": no_of_pages
         }
         return Response(response_data, status=status.HTTP_200_OK)
 
+    def cursor_response(self, queryset, params, pageSize):
+        """
+        Keyset pagination: send `"cursor": null` for the first page and echo
+        back `next_cursor` for the following ones. COUNT(*) only runs when
+        `include_count` is true.
+        """
+        pageSize = max(1, min(pageSize, self.pagination_class.max_page_size))
+        ordering = self.get_ordering(params) or ['-id']
+        self.check_ordering_cost(queryset, ordering)
+        rows, next_cursor = paginate_keyset(queryset, ordering, params.get('cursor'), pageSize)
+        serializer = self.get_serializer(rows, fields=self.get_requested_fields(params), many=True)
+
+        response_data = {
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": serializer.data,
+            "pageSize": pageSize,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+        }
+        if params.get('include_count'):
+            response_data["count"], response_data["count_type"] = list_count(
+                queryset, estimated=params.get('count_mode') == ESTIMATED
+            )
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        description=(
+            "Download every matching record as CSV or XLSX. Takes the same search_text, "
+            "filter, order_by_field / order_by_value and fields parameters as the list "
+            "endpoint; rows are read in chunks and streamed, without pagination."
+        ),
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "format": {"type": "string", "enum": ["csv", "xlsx"], "example": "csv"},
+                    "search_text": {"type": "string", "example": ""},
+                    "order_by_field": {"type": "string", "example": "id"},
+                    "order_by_value": {"type": "string", "example": "asc"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "example": []},
+                }
+            }
+        },
+        responses={(200, "text/csv"): OpenApiTypes.BINARY}
+    )
+    @action(detail=False, methods=["post"], url_path="export")
+    def export(self, request):
+        """
+        Rows go through queryset.iterator(), one chunk of export_chunk_size
+        (with its prefetches) at a time, and each is serialized as it is
+        written, so memory stays flat however many rows match.
+        """
+        params = request.data
+        fields = self.get_requested_fields(params)
+        queryset = self.filter_queryset(self.get_queryset(fields), params)
+        ordering = self.get_ordering(params)
+        if ordering:
+            self.check_ordering_cost(queryset, ordering)
+            queryset = queryset.order_by(*ordering)
+
+        serializer = self.get_serializer(fields=fields)
+        rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=self.export_chunk_size))
+        body, content_type, extension = export_stream(
+            str(params.get('format', 'csv')).lower(), iter_records(rows, list(serializer.fields))
+        )
+        response = StreamingHttpResponse(body, content_type=content_type)
+        filename = f"{self.queryset.model._meta.model_name}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     def retrieve(self, request, pk=None):
+        fields = self.get_requested_fields(request.query_params)
         try:
-            obj = self.get_queryset().get(pk=pk)
+            obj = self.get_queryset(fields).get(pk=pk)
         except self.queryset.model.DoesNotExist:
             response_data = {
                 "message": "Record not found.",
                 "status": status.HTTP_404_NOT_FOUND
             }
             return Response(response_data, status=status.HTTP_404_NOT_FOUND)
-        serializer = self.serializer_class(obj)
+        serializer = self.get_serializer(obj, fields=fields)
         response_data = {
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -203,9 +476,321 @@ class BaseViewSet(viewsets.ViewSet):
                 "status": status.HTTP_404_NOT_FOUND
             }
             return Response(response_data, status=status.HTTP_404_NOT_FOUND)
-        obj.delete()
+        try:
+            obj.delete()
+        except (ProtectedError, RestrictedError):
+            raise ValidationError({'non_field_errors': ["Record is referenced by other records and cannot be deleted."]})
         response_data = {
             "message": "Record deleted successfully.",
             "status": status.HTTP_204_NO_CONTENT
         }
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        description=(
+            "Create, patch and delete many records in one transaction. Every item is "
+            "validated first and nothing is saved unless all of them pass."
+        ),
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "create": {"type": "array", "items": {"type": "object"}, "description": "Rows to create"},
+                    "update": {"type": "array", "items": {"type": "object"}, "description": "Partial rows, each with its id"},
+                    "delete": {"type": "array", "items": {"type": "integer"}, "description": "Ids to delete"},
+                },
+                "example": {"create": [{"name": "A"}], "update": [{"id": 1, "is_active": True}], "delete": [2]}
+            }
+        },
+        responses={
+            200: OpenApiResponse(
+                response={
+                    "type": "object",
+                    "properties": {
+                        "message": {"type": "string", "example": "Batch saved successfully."},
+                        "status": {"type": "integer", "example": 200},
+                        "data": {
+                            "type": "object",
+                            "example": {
+                                "create": [{"index": 0, "status": 201, "data": {"id": 3, "name": "A"}}],
+                                "update": [{"index": 0, "id": 1, "status": 200, "data": {"id": 1, "is_active": True}}],
+                                "delete": [{"index": 0, "id": 2, "status": 204}]
+                            }
+                        }
+                    }
+                }
+            )
+        }
+    )
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """
+        Writes rows with one bulk statement per action instead of a request
+        and save() per row. Serializers with their own create()/update()
+        logic are saved row by row instead, so that logic still runs.
+        Failures are reported per item as {"index", "id", "errors"} under the
+        action they belong to.
+        """
+        params = request.data
+        actions = {action: params.get(action) or [] for action in ('create', 'update', 'delete')}
+        if not all(isinstance(items, list) for items in actions.values()):
+            raise ValidationError({'non_field_errors': ["create, update and delete must be lists."]})
+        if sum(len(items) for items in actions.values()) > self.batch_max_items:
+            raise ValidationError({'non_field_errors': [f"A batch may contain at most {self.batch_max_items} items."]})
+
+        errors = {}
+        creates, updates, deletes = self.validate_batch(actions, errors)
+        if errors:
+            return self.batch_error_response(errors)
+
+        model = self.queryset.model
+        try:
+            with transaction.atomic():
+                # Deletes first, so rows may reuse values of deleted rows
+                if deletes:
+                    self.queryset.filter(pk__in=[obj.pk for obj in deletes]).delete()
+                if self.saves_batch_rows():
+                    self.batch_save(creates, updates, errors)
+                else:
+                    self.batch_update(updates)
+                    self.batch_create(creates)
+                    if creates or updates:
+                        batch_written.send(sender=model)
+        except BatchRejected:
+            return self.batch_error_response(errors)
+        except (ProtectedError, RestrictedError):
+            self.batch_protected_errors(deletes, errors)
+            return self.batch_error_response(errors)
+        except IntegrityError:
+            self.batch_unique_errors(creates, updates, errors)
+            if not errors:
+                raise
+            return self.batch_error_response(errors)
+
+        saved = self.get_queryset().in_bulk([serializer.instance.pk for _, serializer in creates + updates])
+
+        def render(serializer):
+            return self.get_serializer(saved[serializer.instance.pk]).data
+
+        response_data = {
+            "message": "Batch saved successfully.",
+            "status": status.HTTP_200_OK,
+            "data": {
+                "create": [
+                    {"index": index, "status": status.HTTP_201_CREATED, "data": render(serializer)}
+                    for index, serializer in creates
+                ],
+                "update": [
+                    {"index": index, "id": serializer.instance.pk, "status": status.HTTP_200_OK, "data": render(serializer)}
+                    for index, serializer in updates
+                ],
+                "delete": [
+                    {"index": index, "id": obj.pk, "status": status.HTTP_204_NO_CONTENT}
+                    for index, obj in enumerate(deletes)
+                ],
+            }
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def batch_error_response(self, errors):
+        response_data = {
+            "message": "Validation failed",
+            "status": status.HTTP_400_BAD_REQUEST,
+            "errors": errors
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def validate_batch(self, actions, errors):
+        """
+        Validate every item of a batch, loading the rows to update and delete
+        in one query. Returns ([(index, serializer)] for creates and updates,
+        [objects] to delete); item errors are collected into `errors`.
+        """
+        def item_error(action, index, detail, pk=None):
+            error = {"index": index}
+            if pk is not None:
+                error["id"] = pk
+            error["errors"] = detail
+            errors.setdefault(action, []).append(error)
+
+        def parse_pk(value):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+
+        update_ids = [parse_pk(item.get('id')) if isinstance(item, dict) else None for item in actions['update']]
+        delete_ids = [parse_pk(item) for item in actions['delete']]
+        objects = self.queryset.in_bulk([pk for pk in update_ids + delete_ids if pk is not None])
+
+        creates = []
+        for index, item in enumerate(actions['create']):
+            try:
+                if not isinstance(item, dict):
+                    raise ValidationError({'non_field_errors': ["Expected an object."]})
+                self.validate_required_fields(item)
+                serializer = self.serializer_class(data=item)
+                serializer.is_valid(raise_exception=True)
+                creates.append((index, serializer))
+            except ValidationError as error:
+                item_error('create', index, error.detail)
+
+        updates = []
+        seen = set()
+        for index, (item, pk) in enumerate(zip(actions['update'], update_ids)):
+            try:
+                if pk not in objects:
+                    raise ValidationError({'id': ["Record not found."]})
+                if pk in seen or pk in delete_ids:
+                    raise ValidationError({'id': ["Record is listed more than once in this batch."]})
+                seen.add(pk)
+                data = {key: value for key, value in item.items() if key != 'id'}
+                self.validate_required_fields(data, partial=True)
+                serializer = self.serializer_class(objects[pk], data=data, partial=True)
+                serializer.is_valid(raise_exception=True)
+                updates.append((index, serializer))
+            except ValidationError as error:
+                item_error('update', index, error.detail, pk)
+
+        deletes = []
+        for index, pk in enumerate(delete_ids):
+            if pk not in objects:
+                item_error('delete', index, {'id': ["Record not found."]}, pk)
+            elif delete_ids.index(pk) != index:
+                item_error('delete', index, {'id': ["Record is listed more than once in this batch."]}, pk)
+            else:
+                deletes.append(objects[pk])
+        return creates, updates, deletes
+
+    def saves_batch_rows(self):
+        if self.batch_saves_rows is not None:
+            return self.batch_saves_rows
+        return has_custom_save(self.serializer_class)
+
+    def batch_save(self, creates, updates, errors):
+        """
+        Save each row through its serializer, each in a savepoint so one
+        failing row does not stop the others from being checked. Raises
+        BatchRejected after collecting item errors, rolling the batch back.
+        """
+        for action, items in (('update', updates), ('create', creates)):
+            for index, serializer in items:
+                try:
+                    with transaction.atomic():
+                        serializer.save()
+                except ValidationError as error:
+                    item = {"index": index}
+                    if action == 'update':
+                        item["id"] = serializer.instance.pk
+                    item["errors"] = error.detail
+                    errors.setdefault(action, []).append(item)
+        if errors:
+            raise BatchRejected()
+
+    def split_many_to_many(self, validated_data):
+        model = self.queryset.model
+        data = dict(validated_data)
+        relations = {field.name: data.pop(field.name) for field in model._meta.many_to_many if field.name in data}
+        return data, relations
+
+    def batch_create(self, creates):
+        """bulk_create validated rows and attach the saved objects to their serializers."""
+        if not creates:
+            return
+        model = self.queryset.model
+        objs, relations = [], []
+        for _, serializer in creates:
+            data, many_to_many = self.split_many_to_many(serializer.validated_data)
+            objs.append(model(**data))
+            relations.append(many_to_many)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            model._default_manager.bulk_create(objs)
+        elif unique_field_sets(model):
+            # MySQL does not return the new ids; read them back by a unique key
+            model._default_manager.bulk_create(objs)
+            self.fetch_created_pks(model, objs)
+        else:
+            for obj in objs:
+                obj.save()
+
+        for obj, many_to_many, (_, serializer) in zip(objs, relations, creates):
+            for name, values in many_to_many.items():
+                getattr(obj, name).set(values)
+            serializer.instance = obj
+
+    def fetch_created_pks(self, model, objs):
+        fields = unique_field_sets(model)[0]
+        attnames = [model._meta.get_field(name).attname for name in fields]
+        lookup = Q()
+        for obj in objs:
+            lookup |= Q(**{attname: getattr(obj, attname) for attname in attnames})
+        pks = {tuple(row[1:]): row[0] for row in model._default_manager.filter(lookup).values_list('pk', *attnames)}
+        for obj in objs:
+            obj.pk = pks[tuple(getattr(obj, attname) for attname in attnames)]
+
+    def batch_update(self, updates):
+        """Apply partial updates with one bulk_update over the changed fields."""
+        if not updates:
+            return
+        fields = set()
+        for _, serializer in updates:
+            data, many_to_many = self.split_many_to_many(serializer.validated_data)
+            for name, value in data.items():
+                setattr(serializer.instance, name, value)
+            fields.update(data)
+            for name, values in many_to_many.items():
+                getattr(serializer.instance, name).set(values)
+        if fields:
+            self.queryset.model._default_manager.bulk_update(
+                [serializer.instance for _, serializer in updates], sorted(fields)
+            )
+
+    def batch_unique_errors(self, creates, updates, errors):
+        """
+        After a rolled back batch hit a unique constraint: report rows that
+        repeat each other's unique values, then rows that collide with
+        stored records.
+        """
+        model = self.queryset.model
+        seen = set()
+        for action, items in (('update', updates), ('create', creates)):
+            for index, serializer in items:
+                values = row_values(model, serializer.validated_data, serializer.instance)
+                for fields in unique_field_sets(model):
+                    if not all(values.get(field) is not None for field in fields):
+                        continue
+                    key = (fields, tuple(values[field] for field in fields))
+                    if key in seen:
+                        messages = getattr(serializer, 'unique_error_messages', {})
+                        field = next((name for name in fields if name in messages), fields[-1])
+                        errors.setdefault(action, []).append({
+                            "index": index,
+                            "errors": {field: ["Repeats the value of another row in this batch."]}
+                        })
+                    seen.add(key)
+        if errors:
+            return
+
+        for action, items in (('update', updates), ('create', creates)):
+            for index, serializer in items:
+                raise_unique_error = getattr(serializer, 'raise_unique_error', None)
+                if raise_unique_error is None:
+                    continue
+                try:
+                    raise_unique_error(serializer.validated_data, serializer.instance)
+                except ValidationError as error:
+                    errors.setdefault(action, []).append({"index": index, "errors": error.detail})
+
+    def batch_protected_errors(self, deletes, errors):
+        """Name the rows a rolled back batch could not delete because other records reference them."""
+        for index, obj in enumerate(deletes):
+            try:
+                Collector(using=self.queryset.db).collect([obj])
+            except (ProtectedError, RestrictedError):
+                errors.setdefault('delete', []).append({
+                    "index": index,
+                    "id": obj.pk,
+                    "errors": {'id': ["Record is referenced by other records and cannot be deleted."]}
+                })
\ No newline at end of file
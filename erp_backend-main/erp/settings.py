@@ -128,6 +128,17 @@ else:
         }
     }
 
+# Cache
+# Set CACHE_URL (e.g. rediscache://127.0.0.1:6379/1) in production so cache
+# versions and snapshots are shared by every worker.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# List endpoints refuse to sort on a column without an index once the
+# filtered result is larger than this (see BaseViewSet.ordering_fields).
+UNINDEXED_SORT_MAX_ROWS = env.int('UNINDEXED_SORT_MAX_ROWS', default=5000)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -10,7 +10,7 @@ from .models import (
     Route, Vehicle, PickupPoint, RouteVehicle, RoutePickupPoint,
 
     # Hostel
-    RoomType, Hostel, HostelRoom
+    RoomType, Hostel, HostelRoom, HostelBed
 )
 
 # ========== Academic Module ==========
@@ -114,12 +114,21 @@ class RoomTypeAdmin(admin.ModelAdmin):
 
 @admin.register(Hostel)
 class HostelAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'address', 'hostel_type', 'is_active')
+    list_display = ('id', 'name', 'address', 'hostel_type', 'occupied_beds', 'is_active')
     search_fields = ('name', 'hostel_type')
     list_filter = ('hostel_type', 'is_active')
+    readonly_fields = ('occupied_beds',)
 
 @admin.register(HostelRoom)
 class HostelRoomAdmin(admin.ModelAdmin):
-    list_display = ('id', 'room_no', 'hostel', 'room_type', 'number_of_beds', 'is_active')
+    list_display = ('id', 'room_no', 'hostel', 'room_type', 'number_of_beds', 'occupied_beds', 'is_active')
     list_filter = ('hostel', 'room_type', 'is_active')
     search_fields = ('room_no',)
+    readonly_fields = ('occupied_beds',)
+
+@admin.register(HostelBed)
+class HostelBedAdmin(admin.ModelAdmin):
+    list_display = ('id', 'room', 'bed_number', 'is_occupied')
+    list_filter = ('is_occupied', 'room__hostel')
+    search_fields = ('room__room_no',)
+    readonly_fields = ('is_occupied',)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import transaction
+from base.cache import get_version, bump_version
+
+MASTERS_NAMESPACE = 'masters'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# (version, payload) built by this process
+_local_snapshot = None
+
+
+def get_masters_version():
+    return get_version(MASTERS_NAMESPACE)
+
+
+def bump_masters_version():
+    """
+    Call after writes that bypass model signals (bulk_create, update()).
+    The bump waits for the current transaction to commit, so no reader can
+    cache a snapshot of pre-commit rows under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(MASTERS_NAMESPACE))
+
+
+def get_masters_snapshot(build):
+    """
+    Return (version, payload) for the all-masters response.
+
+    The payload is kept per process and in the shared cache, keyed by the
+    masters version, and is only rebuilt by calling `build()` after a master
+    model changed.
+    """
+    global _local_snapshot
+    version = get_masters_version()
+
+    snapshot = _local_snapshot
+    if snapshot is not None and snapshot[0] == version:
+        return snapshot
+
+    key = f"masters:snapshot:{version}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, timeout=SNAPSHOT_TIMEOUT)
+
+    _local_snapshot = (version, payload)
+    return _local_snapshot
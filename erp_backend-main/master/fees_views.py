@@ -16,9 +16,14 @@ common_post_request_body = {
         "properties": {
             "page": {"type": "integer", "example": 1},
             "pageSize": {"type": "integer", "example": 10},
-            "order_by_field": {"type": "string", "example": "id"},
-            "order_by_value": {"type": "string", "example": "desc"},
+            "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+            "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+            "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
             "search_text": {"type": "string", "example": ""},
+            "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+            "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+            "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+            "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
         },
         "required": [],
     }
@@ -45,10 +50,18 @@ common_post_request_body = {
     update=extend_schema(tags=['FeesType']),
     partial_update=extend_schema(tags=['FeesType']),
     destroy=extend_schema(tags=['FeesType']),
+    batch=extend_schema(tags=['FeesType']),
+    export=extend_schema(tags=['FeesType']),
 )
 class FeesTypeMasterViewSet(BaseViewSet):
     queryset = FeesTypeMaster.objects
     serializer_class = FeesTypeMasterSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'fees_code': ('fees_code',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name', 'fees_code']
@@ -80,8 +93,9 @@ class FeesTypeMasterViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -110,10 +124,17 @@ class FeesTypeMasterViewSet(BaseViewSet):
     update=extend_schema(tags=['FeesGroup']),
     partial_update=extend_schema(tags=['FeesGroup']),
     destroy=extend_schema(tags=['FeesGroup']),
+    batch=extend_schema(tags=['FeesGroup']),
+    export=extend_schema(tags=['FeesGroup']),
 )
 class FeesGroupViewSet(BaseViewSet):
     queryset = FeesGroup.objects
     serializer_class = FeesGroupSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name']
@@ -145,8 +166,9 @@ class FeesGroupViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -175,10 +197,21 @@ class FeesGroupViewSet(BaseViewSet):
     update=extend_schema(tags=['FeesMaster']),
     partial_update=extend_schema(tags=['FeesMaster']),
     destroy=extend_schema(tags=['FeesMaster']),
+    batch=extend_schema(tags=['FeesMaster']),
+    export=extend_schema(tags=['FeesMaster']),
 )
 class FeesMasterViewSet(BaseViewSet):
     queryset = FeesMaster.objects
     serializer_class = FeesMasterSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'fees_group': ('fees_group', 'fees_type', 'due_date'),
+        'fees_type': ('fees_type',),
+        'due_date': ('due_date',),
+        'amount': None,
+        'is_active': ('is_active', 'id'),
+    }
+    select_related_fields = ['fees_group', 'fees_type']
 
     def get_required_fields(self):
         return ['fees_group', 'fees_type', 'due_date', 'amount', 'fine_type']
@@ -210,8 +243,9 @@ class FeesMasterViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -240,10 +274,18 @@ class FeesMasterViewSet(BaseViewSet):
     update=extend_schema(tags=['FeesDiscount']),
     partial_update=extend_schema(tags=['FeesDiscount']),
     destroy=extend_schema(tags=['FeesDiscount']),
+    batch=extend_schema(tags=['FeesDiscount']),
+    export=extend_schema(tags=['FeesDiscount']),
 )
 class FeesDiscountViewSet(BaseViewSet):
     queryset = FeesDiscount.objects
     serializer_class = FeesDiscountSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': None,
+        'discount_code': ('discount_code',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name', 'discount_code', 'discount_type']
@@ -275,8 +317,9 @@ class FeesDiscountViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
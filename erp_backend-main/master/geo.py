@@ -0,0 +1,25 @@
+from math import asin, cos, radians, sin, sqrt
+from rest_framework.exceptions import ValidationError
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two (latitude, longitude) points in degrees."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def parse_coordinate(latitude, longitude):
+    """(latitude, longitude) as floats; raises a ValidationError naming the bad field."""
+    point = []
+    for field, value, limit in (('latitude', latitude, 90), ('longitude', longitude, 180)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValidationError({field: ["A valid number is required."]})
+        if not -limit <= value <= limit:
+            raise ValidationError({field: [f"Ensure this value is between -{limit} and {limit}."]})
+        point.append(value)
+    return tuple(point)
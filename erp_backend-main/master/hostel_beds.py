@@ -0,0 +1,41 @@
+from django.db.models import Count, F, Sum
+from .models import HostelBed, HostelRoom
+
+
+def bed_availability(hostel=None, room_type=None):
+    """
+    Beds, occupied beds and free beds per hostel and room type over active
+    rooms. Read from the rooms' occupancy counters in one grouped query on
+    the (hostel, room_type) index; no bed rows are counted.
+    """
+    rooms = HostelRoom.objects.filter(is_active=True, hostel__is_active=True)
+    if hostel:
+        rooms = rooms.filter(hostel_id=hostel)
+    if room_type:
+        rooms = rooms.filter(room_type_id=room_type)
+    return [
+        {
+            "hostel": row['hostel'],
+            "hostel_name": row['hostel__name'],
+            "room_type": row['room_type'],
+            "room_type_name": row['room_type__room_type'],
+            "rooms": row['rooms'],
+            "beds": row['beds'],
+            "occupied": row['occupied'],
+            "free": row['free'],
+        }
+        for row in rooms.values(
+            'hostel', 'hostel__name', 'room_type', 'room_type__room_type'
+        ).annotate(
+            rooms=Count('id'),
+            beds=Sum('number_of_beds'),
+            occupied=Sum('occupied_beds'),
+            free=Sum(F('number_of_beds') - F('occupied_beds')),
+        ).order_by('hostel__name', 'room_type__room_type')
+    ]
+
+
+def free_bed_numbers(room):
+    """Numbers (1..number_of_beds) of the room's beds nobody holds."""
+    taken = set(HostelBed.objects.filter(room=room, is_occupied=True).values_list('bed_number', flat=True))
+    return [number for number in range(1, room.number_of_beds + 1) if number not in taken]
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 from .models import RoomType, Hostel, HostelRoom
 from .serializers import RoomTypeSerializer, HostelSerializer, HostelRoomSerializer
+from .hostel_beds import bed_availability, free_bed_numbers
 from base.views import BaseViewSet  # Assuming you have a common BaseViewSet
 
 common_post_request_body = {
@@ -12,9 +13,14 @@ common_post_request_body = {
         "properties": {
             "page": {"type": "integer", "example": 1},
             "pageSize": {"type": "integer", "example": 10},
-            "order_by_field": {"type": "string", "example": "id"},
-            "order_by_value": {"type": "string", "example": "desc"},
+            "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+            "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+            "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
             "search_text": {"type": "string", "example": ""},
+            "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+            "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+            "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+            "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
         },
         "required": [],
     }
@@ -34,10 +40,17 @@ common_post_request_body = {
     update=extend_schema(tags=['RoomType']),
     partial_update=extend_schema(tags=['RoomType']),
     destroy=extend_schema(tags=['RoomType']),
+    batch=extend_schema(tags=['RoomType']),
+    export=extend_schema(tags=['RoomType']),
 )
 class RoomTypeViewSet(BaseViewSet):
     queryset = RoomType.objects
     serializer_class = RoomTypeSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'room_type': ('room_type',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['room_type']
@@ -55,8 +68,9 @@ class RoomTypeViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -79,10 +93,19 @@ class RoomTypeViewSet(BaseViewSet):
     update=extend_schema(tags=['Hostel']),
     partial_update=extend_schema(tags=['Hostel']),
     destroy=extend_schema(tags=['Hostel']),
+    batch=extend_schema(tags=['Hostel']),
+    export=extend_schema(tags=['Hostel']),
 )
 class HostelViewSet(BaseViewSet):
     queryset = Hostel.objects
     serializer_class = HostelSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'hostel_type': None,
+        'intake': None,
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name', 'hostel_type', 'address', 'intake']
@@ -100,8 +123,9 @@ class HostelViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -124,10 +148,22 @@ class HostelViewSet(BaseViewSet):
     update=extend_schema(tags=['HostelRoom']),
     partial_update=extend_schema(tags=['HostelRoom']),
     destroy=extend_schema(tags=['HostelRoom']),
+    batch=extend_schema(tags=['HostelRoom']),
+    export=extend_schema(tags=['HostelRoom']),
 )
 class HostelRoomViewSet(BaseViewSet):
     queryset = HostelRoom.objects
     serializer_class = HostelRoomSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'room_no': ('room_no',),
+        'hostel': ('hostel', 'room_no'),
+        'room_type': ('room_type',),
+        'number_of_beds': None,
+        'cost_per_bed': None,
+        'is_active': ('is_active', 'id'),
+    }
+    select_related_fields = ['hostel', 'room_type']
 
     def get_required_fields(self):
         return ['room_no', 'hostel', 'room_type', 'number_of_beds', 'cost_per_bed']
@@ -145,11 +181,71 @@ class HostelRoomViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
             "data": serializer.data,
             "count": queryset.count()
         })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["HostelRoom"],
+        description=(
+            "Free beds per hostel and room type, from the rooms' occupancy counters. "
+            "Optionally narrowed to one `hostel` and/or `room_type`."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "hostel": {"type": "integer", "example": None},
+                "room_type": {"type": "integer", "example": None},
+            },
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": [{"hostel": 1, "hostel_name": "North Block", "room_type": 1, "room_type_name": "Double",
+                      "rooms": 10, "beds": 20, "occupied": 17, "free": 3}]
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="availability")
+    def availability(self, request):
+        params = request.data
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": bed_availability(hostel=params.get('hostel'), room_type=params.get('room_type'))
+        })
+
+    @extend_schema(
+        methods=["GET"],
+        tags=["HostelRoom"],
+        description="Numbers of the free beds in one room.",
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": {"id": 1, "room_no": "101", "number_of_beds": 4, "occupied_beds": 2, "free_beds": [2, 4]}
+        })}
+    )
+    @action(detail=True, methods=["get"], url_path="free-beds")
+    def free_beds(self, request, pk=None):
+        try:
+            room = self.queryset.get(pk=pk)
+        except HostelRoom.DoesNotExist:
+            return Response({
+                "message": "Record not found.",
+                "status": status.HTTP_404_NOT_FOUND
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": {
+                "id": room.pk,
+                "room_no": room.room_no,
+                "number_of_beds": room.number_of_beds,
+                "occupied_beds": room.occupied_beds,
+                "free_beds": free_bed_numbers(room),
+            }
+        })
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from master.route_planning import plan_routes
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-plan the stop order, cumulative distance and pickup times of every active route "
+        "from the pickup point coordinates. Run at session start, after pickup points change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', type=int, action='append', dest='routes', help="Only this route id (repeatable).")
+        parser.add_argument('--dry-run', action='store_true', help="Print the plan without saving it.")
+
+    def handle(self, *args, **options):
+        try:
+            plans = plan_routes(options['routes'], dry_run=options['dry_run'])
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        for route_id, plan in plans.items():
+            self.stdout.write(f"route {route_id}: {len(plan)} stops, {plan[-1]['distance']} km")
+        verb = "Planned" if options['dry_run'] else "Re-planned"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(plans)} routes."))
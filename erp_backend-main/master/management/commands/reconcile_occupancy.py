@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from master.occupancy import reconcile_occupancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount vehicle, route, hostel room and hostel occupancy counters and fix any drift. "
+        "Safe to run while the app is in use; schedule it periodically (e.g. nightly from cron)."
+    )
+
+    def handle(self, *args, **options):
+        corrections = reconcile_occupancy()
+        for label, rows in corrections.items():
+            for pk, stored, actual in rows:
+                self.stdout.write(f"{label} {pk}: {stored} -> {actual}")
+        total = sum(len(rows) for rows in corrections.values())
+        self.stdout.write(self.style.SUCCESS(f"Corrected {total} occupancy counters."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='vehicle_photo_thumbnail',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
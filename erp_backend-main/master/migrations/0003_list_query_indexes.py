@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0002_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='castecategory',
+            index=models.Index(fields=['is_active', 'id'], name='master_cast_is_acti_da0594_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feesdiscount',
+            index=models.Index(fields=['is_active', 'id'], name='master_fees_is_acti_cfb988_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feesgroup',
+            index=models.Index(fields=['is_active', 'id'], name='master_fees_is_acti_d065d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feesmaster',
+            index=models.Index(fields=['fees_group', 'fees_type', 'due_date'], name='master_fees_fees_gr_98b286_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feesmaster',
+            index=models.Index(fields=['due_date'], name='master_fees_due_dat_4b0965_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feesmaster',
+            index=models.Index(fields=['is_active', 'id'], name='master_fees_is_acti_6ae0e2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feestypemaster',
+            index=models.Index(fields=['is_active', 'id'], name='master_fees_is_acti_65508d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostel',
+            index=models.Index(fields=['is_active', 'id'], name='master_host_is_acti_d5efb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostelroom',
+            index=models.Index(fields=['hostel', 'room_no'], name='master_host_hostel__f37b14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostelroom',
+            index=models.Index(fields=['room_no'], name='master_host_room_no_c05a49_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostelroom',
+            index=models.Index(fields=['is_active', 'id'], name='master_host_is_acti_e8e764_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuppoint',
+            index=models.Index(fields=['is_active', 'id'], name='master_pick_is_acti_d12dfa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomtype',
+            index=models.Index(fields=['is_active', 'id'], name='master_room_is_acti_25bd46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['is_active', 'id'], name='master_rout_is_acti_3ef21d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routepickuppoint',
+            index=models.Index(fields=['is_active', 'id'], name='master_rout_is_acti_2dcf72_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routevehicle',
+            index=models.Index(fields=['is_active', 'id'], name='master_rout_is_acti_b5d554_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolclass',
+            index=models.Index(fields=['is_active', 'id'], name='master_scho_is_acti_173257_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolsession',
+            index=models.Index(fields=['is_active', 'start_date'], name='master_scho_is_acti_9815b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['class_id', 'name'], name='master_sect_class_i_07e8b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['name'], name='master_sect_name_125811_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['is_active', 'id'], name='master_sect_is_acti_16366a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['is_active', 'id'], name='master_vehi_is_acti_dcc47a_idx'),
+        ),
+    ]
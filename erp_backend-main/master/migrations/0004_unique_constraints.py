@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+# (model, unique fields, field renamed to break a tie)
+RENAMED_DUPLICATES = [
+    ('FeesGroup', ('name',), 'name'),
+    ('FeesTypeMaster', ('name',), 'name'),
+    ('Hostel', ('name',), 'name'),
+    ('HostelRoom', ('hostel', 'room_no'), 'room_no'),
+    ('PickupPoint', ('pickup_point',), 'pickup_point'),
+    ('RoomType', ('room_type',), 'room_type'),
+    ('Route', ('title',), 'title'),
+    ('SchoolClass', ('name',), 'name'),
+    ('Section', ('class_id', 'name'), 'name'),
+    ('Vehicle', ('vehicle_number',), 'vehicle_number'),
+]
+# Duplicates with no name to change; they must be merged by hand
+REPORTED_DUPLICATES = [
+    ('FeesMaster', ('fees_group', 'fees_type', 'due_date')),
+]
+
+
+def duplicate_groups(model, fields):
+    """[[ids]] of rows sharing the same values for `fields`, lowest id first."""
+    rows = model.objects.exclude(
+        **{f'{field}__isnull': True for field in fields}
+    ).values(*fields).annotate(rows=models.Count('id')).filter(rows__gt=1).order_by()
+    return [
+        list(model.objects.filter(**{field: row[field] for field in fields}).order_by('id').values_list('id', flat=True))
+        for row in rows
+    ]
+
+
+def resolve_duplicates(apps, schema_editor):
+    """
+    Rows the old exists() check let through would make AddConstraint fail
+    partway. Keep the oldest row of each group as is and rename the others
+    to "<value> (<id>)"; abort with the offending ids where no rename fits.
+    """
+    problems = []
+    for model_name, fields in REPORTED_DUPLICATES:
+        model = apps.get_model('master', model_name)
+        problems += [f"{model_name} ids {ids} share {', '.join(fields)}" for ids in duplicate_groups(model, fields)]
+    if problems:
+        raise RuntimeError(
+            "Merge these duplicate rows before migrating; they would violate the new unique constraints:\n"
+            + "\n".join(problems)
+        )
+
+    for model_name, fields, field in RENAMED_DUPLICATES:
+        model = apps.get_model('master', model_name)
+        max_length = model._meta.get_field(field).max_length
+        for ids in duplicate_groups(model, fields):
+            for row in model.objects.filter(id__in=ids[1:]):
+                suffix = f" ({row.id})"
+                setattr(row, field, getattr(row, field)[:max_length - len(suffix)] + suffix)
+                row.save(update_fields=[field])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0003_list_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feesgroup',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_fees_group_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='feesmaster',
+            constraint=models.UniqueConstraint(fields=('fees_group', 'fees_type', 'due_date'), name='unique_fees_master_due_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='feestypemaster',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_fees_type_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='hostel',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_hostel_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='hostelroom',
+            constraint=models.UniqueConstraint(fields=('hostel', 'room_no'), name='unique_hostel_room_no'),
+        ),
+        migrations.AddConstraint(
+            model_name='pickuppoint',
+            constraint=models.UniqueConstraint(fields=('pickup_point',), name='unique_pickup_point'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomtype',
+            constraint=models.UniqueConstraint(fields=('room_type',), name='unique_room_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='route',
+            constraint=models.UniqueConstraint(fields=('title',), name='unique_route_title'),
+        ),
+        migrations.AddConstraint(
+            model_name='schoolclass',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_class_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='section',
+            constraint=models.UniqueConstraint(fields=('class_id', 'name'), name='unique_section_name_per_class'),
+        ),
+        migrations.AddConstraint(
+            model_name='vehicle',
+            constraint=models.UniqueConstraint(fields=('vehicle_number',), name='unique_vehicle_number'),
+        ),
+        migrations.RemoveIndex(
+            model_name='feesmaster',
+            name='master_fees_fees_gr_98b286_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='hostelroom',
+            name='master_host_hostel__f37b14_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='section',
+            name='master_sect_class_i_07e8b1_idx',
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostelBed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bed_number', models.PositiveIntegerField()),
+                ('is_occupied', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='hostel',
+            name='occupied_beds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hostelroom',
+            name='occupied_beds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='hostelroom',
+            index=models.Index(fields=['hostel', 'room_type'], name='master_host_hostel__def035_idx'),
+        ),
+        migrations.AddField(
+            model_name='hostelbed',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='beds', to='master.hostelroom'),
+        ),
+        migrations.AddIndex(
+            model_name='hostelbed',
+            index=models.Index(fields=['room', 'is_occupied', 'bed_number'], name='master_host_room_id_8949ed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hostelbed',
+            constraint=models.UniqueConstraint(fields=('room', 'bed_number'), name='unique_hostel_bed_number'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_assigned_students(apps, schema_editor):
+    """Start the counters from the students already assigned."""
+    StudentTransportDetail = apps.get_model('student', 'StudentTransportDetail')
+    Vehicle = apps.get_model('master', 'Vehicle')
+    Route = apps.get_model('master', 'Route')
+
+    vehicles = StudentTransportDetail.objects.filter(vehicle__isnull=False).values('vehicle').annotate(n=Count('id'))
+    for row in vehicles:
+        Vehicle.objects.filter(pk=row['vehicle']).update(occupied_seats=row['n'])
+    routes = StudentTransportDetail.objects.filter(pickup_point__isnull=False).values('pickup_point__route').annotate(n=Count('id'))
+    for row in routes:
+        Route.objects.filter(pk=row['pickup_point__route']).update(occupied_seats=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_hostel_beds'),
+        ('student', '0009_hostel_beds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='occupied_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='occupied_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_assigned_students, migrations.RunPython.noop),
+    ]
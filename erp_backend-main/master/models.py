@@ -11,6 +11,9 @@ class SchoolSession(models.Model):
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['is_active', 'start_date']),
+        ]
 
 class SchoolClass(models.Model):
     name = models.CharField(max_length=100)
@@ -19,6 +22,14 @@ class SchoolClass(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_class_name'),
+        ]
+
 class Section(models.Model):
     name = models.CharField(max_length=100)
     class_id = models.ForeignKey(SchoolClass, on_delete=models.CASCADE, related_name="sections")
@@ -30,6 +41,15 @@ class Section(models.Model):
     def get_class_name(self):
         return self.class_id.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['class_id', 'name'], name='unique_section_name_per_class'),
+        ]
+
 class CasteCategory(models.Model):
     """Represents caste categories like General, SC, ST, OBC, etc."""
     name = models.CharField(max_length=100, unique=True)
@@ -39,6 +59,11 @@ class CasteCategory(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+
 #fees modules
 class FeesTypeMaster(models.Model):
     name = models.CharField(max_length=100)
@@ -49,6 +74,14 @@ class FeesTypeMaster(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_fees_type_name'),
+        ]
+
 class FeesGroup(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -57,6 +90,14 @@ class FeesGroup(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_fees_group_name'),
+        ]
+
 class FeesMaster(models.Model):
     FINE_CHOICES = (
         ('None', 'None'),
@@ -72,6 +113,15 @@ class FeesMaster(models.Model):
     fix_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['due_date']),
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['fees_group', 'fees_type', 'due_date'], name='unique_fees_master_due_date'),
+        ]
+
 class FeesDiscount(models.Model):
     DISCOUNT_CHOICES = (
         ('Percentage', 'Percentage'),
@@ -85,15 +135,30 @@ class FeesDiscount(models.Model):
     description = models.TextField(blank=True)    
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+
 # end fees modules    
 #transportation module
 class Route(models.Model):
     title = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
+    # Students picked up on the route; moved only by transport assignment
+    occupied_seats = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['title'], name='unique_route_title'),
+        ]
+
 class Vehicle(models.Model):
     vehicle_number = models.CharField(max_length=50)
     vehicle_model = models.CharField(max_length=100)
@@ -105,12 +170,23 @@ class Vehicle(models.Model):
     driver_licence = models.CharField(max_length=100)
     driver_contact_no = models.CharField(max_length=15)
     vehicle_photo = models.CharField(max_length=100, blank=True, null=True)
+    vehicle_photo_thumbnail = models.CharField(max_length=100, blank=True, null=True)
     note = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Students assigned to the vehicle; moved only by transport assignment
+    occupied_seats = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.vehicle_number
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle_number'], name='unique_vehicle_number'),
+        ]
+
 class PickupPoint(models.Model):
     pickup_point = models.CharField(max_length=255)
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
@@ -120,6 +196,14 @@ class PickupPoint(models.Model):
     def __str__(self):
         return self.pickup_point
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['pickup_point'], name='unique_pickup_point'),
+        ]
+
 class RouteVehicle(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     vehicles = models.ManyToManyField(Vehicle)
@@ -128,6 +212,11 @@ class RouteVehicle(models.Model):
     def __str__(self):
         return f"Route: {self.route.title}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+
 class RoutePickupPoint(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     pickup_point = models.ForeignKey(PickupPoint, on_delete=models.CASCADE)
@@ -138,6 +227,12 @@ class RoutePickupPoint(models.Model):
 
     def __str__(self):
         return f"{self.route.title} - {self.pickup_point.pickup_point}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+
 #end transportation module   
 # start hostel module 
 class RoomType(models.Model):
@@ -148,6 +243,14 @@ class RoomType(models.Model):
     def __str__(self):
         return self.room_type
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['room_type'], name='unique_room_type'),
+        ]
+
 class Hostel(models.Model):
     HOSTEL_TYPE_CHOICES = [
         ('Girls', 'Girls'),
@@ -161,10 +264,20 @@ class Hostel(models.Model):
     intake = models.PositiveIntegerField()
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Beds taken across the hostel's rooms; moved only by bed allocation
+    occupied_beds = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_hostel_name'),
+        ]
+
 
 class HostelRoom(models.Model):
     room_no = models.CharField(max_length=50)
@@ -174,8 +287,42 @@ class HostelRoom(models.Model):
     cost_per_bed = models.DecimalField(max_digits=8, decimal_places=2)
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Beds taken in the room; moved only by bed allocation
+    occupied_beds = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.room_no} - {self.hostel.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_no']),
+            models.Index(fields=['hostel', 'room_type']),
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hostel', 'room_no'], name='unique_hostel_room_no'),
+        ]
+
+
+class HostelBed(models.Model):
+    """
+    One bed of a room, created as the room's beds are allocated. A student
+    holds at most one bed (StudentHostelDetail.bed is one-to-one), so the
+    database itself refuses a bed given to two students.
+    """
+    room = models.ForeignKey(HostelRoom, on_delete=models.CASCADE, related_name='beds')
+    bed_number = models.PositiveIntegerField()
+    is_occupied = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.room} - Bed {self.bed_number}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'is_occupied', 'bed_number']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'bed_number'], name='unique_hostel_bed_number'),
+        ]
+
 #end hostel module
\ No newline at end of file
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from base.cache import bump_model_versions
+from student.models import StudentTransportDetail
+from .models import Hostel, HostelBed, HostelRoom, Route, RouteVehicle, Vehicle
+
+
+def transport_occupancy():
+    """
+    Seats taken per route and per vehicle, read from the occupancy counters
+    (three queries, none over StudentTransportDetail). Each route lists the
+    vehicles serving it and their combined capacity.
+    """
+    vehicles = {
+        vehicle['id']: {
+            "id": vehicle['id'],
+            "vehicle_number": vehicle['vehicle_number'],
+            "capacity": vehicle['max_seating_capacity'],
+            "occupied": vehicle['occupied_seats'],
+            "free": max(vehicle['max_seating_capacity'] - vehicle['occupied_seats'], 0),
+            "is_active": vehicle['is_active'],
+        }
+        for vehicle in Vehicle.objects.order_by('vehicle_number').values(
+            'id', 'vehicle_number', 'max_seating_capacity', 'occupied_seats', 'is_active'
+        )
+    }
+    route_vehicles = {}
+    links = RouteVehicle.vehicles.through.objects.filter(routevehicle__is_active=True).values_list(
+        'routevehicle__route', 'vehicle'
+    )
+    for route_id, vehicle_id in links:
+        route_vehicles.setdefault(route_id, set()).add(vehicle_id)
+
+    routes = []
+    for route in Route.objects.order_by('title').values('id', 'title', 'occupied_seats', 'is_active'):
+        vehicle_ids = sorted(route_vehicles.get(route['id'], ()))
+        routes.append({
+            "id": route['id'],
+            "title": route['title'],
+            "occupied": route['occupied_seats'],
+            "capacity": sum(vehicles[vehicle_id]['capacity'] for vehicle_id in vehicle_ids),
+            "vehicles": vehicle_ids,
+            "is_active": route['is_active'],
+        })
+    return {"routes": routes, "vehicles": list(vehicles.values())}
+
+
+def _count(queryset, field):
+    """Correlated COUNT(*) of `queryset` rows whose `field` is the outer row."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('pk')).values('n')
+    ), Value(0))
+
+
+def _reconcile(model, counter, actual):
+    """
+    Set `counter` to the `actual` expression on rows where they differ.
+    Each row is updated only if its counter still holds the value read, so
+    a concurrent assignment is never overwritten; its row is fixed on the
+    next run. Returns [(id, stored, actual)] of the rows corrected.
+    """
+    drifted = model.objects.annotate(actual=actual).exclude(**{counter: F('actual')}).values_list('pk', counter, 'actual')
+    fixed = []
+    with transaction.atomic():
+        for pk, stored, real in drifted:
+            if model.objects.filter(pk=pk, **{counter: stored}).update(**{counter: real}):
+                fixed.append((pk, stored, real))
+        if fixed:
+            # Counters are not part of the masters snapshot; only list counts go stale
+            bump_model_versions(model)
+    return fixed
+
+
+def reconcile_occupancy():
+    """
+    Recount every occupancy counter from the rows it summarises and repair
+    any drift (e.g. from writes made outside the assignment services).
+    Returns {model label: [(id, stored, actual)]} of the corrections.
+    """
+    riders = StudentTransportDetail.objects.all()
+    taken_beds = HostelBed.objects.filter(is_occupied=True)
+    return {
+        'vehicle': _reconcile(Vehicle, 'occupied_seats', _count(riders, 'vehicle')),
+        'route': _reconcile(Route, 'occupied_seats', _count(riders, 'pickup_point__route')),
+        'hostel_room': _reconcile(HostelRoom, 'occupied_beds', _count(taken_beds, 'room')),
+        'hostel': _reconcile(Hostel, 'occupied_beds', _count(taken_beds, 'room__hostel')),
+    }
@@ -0,0 +1,128 @@
+from math import cos, floor, radians
+from base.cache import get_table_versions
+from .geo import EARTH_RADIUS_KM, haversine_km
+from .models import PickupPoint, Route, RoutePickupPoint
+
+# Grid cell edge in km; a lookup reads a handful of cells around the point
+CELL_KM = 1.0
+INDEXED_MODELS = (PickupPoint, Route, RoutePickupPoint)
+
+# (table versions, PickupGrid) built by this process
+_local_index = None
+
+
+class PickupGrid:
+    """
+    Uniform grid over the active route pickup points. Coordinates are
+    projected to km (equirectangular around the points' mean latitude,
+    accurate over a school's catchment area) and bucketed into CELL_KM
+    cells; nearest() scans rings of cells outwards from the query point and
+    ranks candidates by haversine distance.
+    """
+
+    def __init__(self, stops, cell_km=CELL_KM):
+        self.cell_km = cell_km
+        self.stops = stops
+        self.cos_lat = cos(radians(sum(stop['latitude'] for stop in stops) / len(stops))) if stops else 1.0
+        self.cells = {}
+        for stop in stops:
+            self.cells.setdefault(self.cell(stop['latitude'], stop['longitude']), []).append(stop)
+        if self.cells:
+            xs = [x for x, _ in self.cells]
+            ys = [y for _, y in self.cells]
+            self.bounds = (min(xs), max(xs), min(ys), max(ys))
+
+    def cell(self, latitude, longitude):
+        x = EARTH_RADIUS_KM * radians(longitude) * self.cos_lat
+        y = EARTH_RADIUS_KM * radians(latitude)
+        return floor(x / self.cell_km), floor(y / self.cell_km)
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for x in range(cx - r, cx + r + 1):
+            yield x, cy - r
+            yield x, cy + r
+        for y in range(cy - r + 1, cy + r):
+            yield cx - r, y
+            yield cx + r, y
+
+    def nearest(self, latitude, longitude, k, max_km=None):
+        """Up to `k` stops closest to the point, as (distance_km, stop), nearest first."""
+        if not self.cells:
+            return []
+        cx, cy = self.cell(latitude, longitude)
+        min_x, max_x, min_y, max_y = self.bounds
+        # Beyond this ring no cell holds a stop
+        last_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+
+        found = []
+        for r in range(last_ring + 1):
+            if (2 * r + 1) ** 2 > len(self.cells):
+                # The rings now cover more cells than hold stops (a point far
+                # from every stop); ranking all stops is cheaper
+                found = [self._ranked(latitude, longitude, stop) for stop in self.stops]
+                found.sort(key=lambda item: item[:2])
+                break
+            for key in self._ring(cx, cy, r):
+                found.extend(self._ranked(latitude, longitude, stop) for stop in self.cells.get(key, ()))
+            found.sort(key=lambda item: item[:2])
+            # Stops in ring r + 1 and beyond are at least r cells away
+            if max_km is not None and r * self.cell_km > max_km:
+                break
+            if len(found) >= k and found[k - 1][0] <= r * self.cell_km:
+                break
+        if max_km is not None:
+            found = [item for item in found if item[0] <= max_km]
+        return [(distance, stop) for distance, _, stop in found[:k]]
+
+    @staticmethod
+    def _ranked(latitude, longitude, stop):
+        return haversine_km(latitude, longitude, stop['latitude'], stop['longitude']), stop['id'], stop
+
+def build_pickup_grid():
+    stops = [
+        {
+            "id": row['id'],
+            "route": row['route'],
+            "route_title": row['route__title'],
+            "pickup_point": row['pickup_point'],
+            "pickup_point_name": row['pickup_point__pickup_point'],
+            "latitude": float(row['pickup_point__latitude']),
+            "longitude": float(row['pickup_point__longitude']),
+            "distance": str(row['distance']),
+            "pickup_time": row['pickup_time'].isoformat(),
+            "monthly_fees": str(row['monthly_fees']),
+        }
+        for row in RoutePickupPoint.objects.filter(
+            is_active=True, route__is_active=True, pickup_point__is_active=True
+        ).values(
+            'id', 'route', 'route__title', 'pickup_point', 'pickup_point__pickup_point',
+            'pickup_point__latitude', 'pickup_point__longitude', 'distance', 'pickup_time', 'monthly_fees'
+        )
+    ]
+    return PickupGrid(stops)
+
+
+def get_pickup_grid():
+    """
+    This process's PickupGrid, rebuilt only when the pickup point, route or
+    route pickup point tables changed since it was built (their table
+    versions are bumped on every write, see base.signals).
+    """
+    global _local_index
+    versions = get_table_versions([model._meta.db_table for model in INDEXED_MODELS])
+    index = _local_index
+    if index is None or index[0] != versions:
+        index = (versions, build_pickup_grid())
+        _local_index = index
+    return index[1]
+
+
+def nearest_pickup_points(latitude, longitude, k=5, max_km=None):
+    """The `k` active route pickup points nearest to a coordinate, with their distance in km."""
+    return [
+        {**stop, "distance_km": round(distance, 3)}
+        for distance, stop in get_pickup_grid().nearest(latitude, longitude, k, max_km)
+    ]
@@ -0,0 +1,168 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from rest_framework.exceptions import ValidationError
+from base.signals import batch_written
+from .geo import EARTH_RADIUS_KM
+from .models import RoutePickupPoint
+
+# Assumed bus speed between stops, and time spent at each stop
+AVERAGE_SPEED_KMPH = 25
+STOP_MINUTES = 1
+# Rows written per UPDATE by the bulk write
+PLAN_BATCH_SIZE = 500
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValidationError({'routes': ["Route planning requires numpy."]})
+    return numpy
+
+
+def distance_matrix(latitudes, longitudes):
+    """Haversine distances in km between every pair of points, as an n x n array."""
+    np = _numpy()
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_neighbour(matrix, start):
+    """Open path from `start` that always moves to the closest unvisited point."""
+    np = _numpy()
+    n = len(matrix)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, matrix[order[-1]])
+        order.append(int(row.argmin()))
+        visited[order[-1]] = True
+    return order
+
+
+def two_opt(matrix, order):
+    """
+    Improve an open path that starts at order[0] by reversing segments while
+    that shortens it. The gain of every reversal starting after position i
+    is computed in one vectorised step.
+    """
+    np = _numpy()
+    order = np.asarray(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            a, b = order[i], order[i + 1]
+            ends = order[i + 2:]
+            # Point after each candidate segment end; the path's last point has none
+            after = np.append(order[i + 3:], 0)
+            has_next = np.arange(len(ends)) < len(ends) - 1
+            gain = matrix[a, b] - matrix[a, ends] + np.where(
+                has_next, matrix[ends, after] - matrix[b, after], 0.0
+            )
+            j = int(gain.argmax())
+            if gain[j] > 1e-9:
+                end = i + 2 + j
+                order[i + 1:end + 1] = order[i + 1:end + 1][::-1].copy()
+                improved = True
+    return order.tolist()
+
+
+def stop_order(matrix, origin=False):
+    """
+    Near-optimal visiting order of the points in `matrix`. With `origin`,
+    point 0 is the fixed start (e.g. the depot) and the result indexes the
+    points after it; otherwise the best nearest-neighbour start is kept.
+    """
+    np = _numpy()
+    n = len(matrix)
+    if origin:
+        return [stop - 1 for stop in two_opt(matrix, nearest_neighbour(matrix, 0))[1:]]
+    if n < 3:
+        return list(range(n))
+    # A start point at zero distance from every stop turns the open path
+    # into one with a fixed start, so 2-opt may also move the first stop
+    padded = np.zeros((n + 1, n + 1))
+    padded[1:, 1:] = matrix
+    best = min(
+        (nearest_neighbour(matrix, start) for start in range(n)),
+        key=lambda order: matrix[order[:-1], order[1:]].sum(),
+    )
+    order = two_opt(padded, [0] + [stop + 1 for stop in best])
+    return [stop - 1 for stop in order[1:]]
+
+
+def plan_stops(stops, origin=None, start_time=None, speed_kmph=AVERAGE_SPEED_KMPH, stop_minutes=STOP_MINUTES):
+    """
+    Order one route's stops ({"id", "latitude", "longitude", "pickup_time"})
+    and give each its cumulative distance in km and estimated pickup time.
+    Distances run from `origin` (latitude, longitude) when given, else from
+    the first stop. The first pickup keeps `start_time`, defaulting to the
+    route's earliest current pickup time.
+    """
+    if not stops:
+        return []
+    points = ([origin] if origin else []) + [(stop['latitude'], stop['longitude']) for stop in stops]
+    matrix = distance_matrix([lat for lat, _ in points], [lon for _, lon in points])
+    offset = 1 if origin else 0
+    order = stop_order(matrix, origin=bool(origin))
+
+    # Any date will do; only the time of day is kept
+    start = datetime.combine(date(2000, 1, 1), start_time or min(stop['pickup_time'] for stop in stops))
+    if origin:
+        start -= timedelta(minutes=float(matrix[0, order[0] + 1]) / speed_kmph * 60)
+    plan, travelled, previous = [], 0.0, 0 if origin else None
+    for position, index in enumerate(order):
+        if previous is not None:
+            travelled += float(matrix[previous, index + offset])
+        previous = index + offset
+        minutes = travelled / speed_kmph * 60 + position * stop_minutes
+        plan.append({
+            "id": stops[index]['id'],
+            "sequence": position + 1,
+            "distance": Decimal(travelled).quantize(Decimal('0.01')),
+            "pickup_time": (start + timedelta(minutes=minutes)).time().replace(microsecond=0),
+        })
+    return plan
+
+
+def plan_routes(route_ids=None, dry_run=False, **options):
+    """
+    Re-plan the active stops of every active route (or of `route_ids`) and,
+    unless `dry_run`, write all distances and pickup times with one
+    bulk_update. Returns {route_id: plan}; options go to plan_stops().
+    """
+    rows = RoutePickupPoint.objects.filter(
+        is_active=True, route__is_active=True
+    ).order_by('route', 'id').values(
+        'id', 'route', 'pickup_time', 'pickup_point__latitude', 'pickup_point__longitude'
+    )
+    if route_ids is not None:
+        rows = rows.filter(route__in=route_ids)
+
+    routes = {}
+    for row in rows:
+        routes.setdefault(row['route'], []).append({
+            "id": row['id'],
+            "latitude": float(row['pickup_point__latitude']),
+            "longitude": float(row['pickup_point__longitude']),
+            "pickup_time": row['pickup_time'],
+        })
+    plans = {route_id: plan_stops(stops, **options) for route_id, stops in routes.items()}
+
+    if not dry_run:
+        updates = [
+            RoutePickupPoint(id=stop['id'], distance=stop['distance'], pickup_time=stop['pickup_time'])
+            for plan in plans.values() for stop in plan
+        ]
+        if updates:
+            RoutePickupPoint.objects.bulk_update(updates, ['distance', 'pickup_time'], batch_size=PLAN_BATCH_SIZE)
+            # bulk_update sends no signals; refresh cached lists, masters and the pickup index
+            batch_written.send(sender=RoutePickupPoint)
+    return plans
@@ -0,0 +1,52 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from base.signals import batch_written
+from student.models import House, StudentTransportDetail
+from .models import (
+    SchoolClass, Section, CasteCategory, SchoolSession,
+    FeesTypeMaster, FeesGroup, FeesMaster, FeesDiscount,
+    Route, Vehicle, PickupPoint, RouteVehicle, RoutePickupPoint,
+    RoomType, Hostel, HostelRoom, HostelBed,
+)
+from .cache import bump_masters_version
+
+MASTER_MODELS = [
+    SchoolClass, Section, CasteCategory, SchoolSession,
+    FeesTypeMaster, FeesGroup, FeesMaster, FeesDiscount,
+    Route, Vehicle, PickupPoint, RouteVehicle, RoutePickupPoint,
+    RoomType, Hostel, HostelRoom, House,
+]
+
+
+def invalidate_masters(sender, **kwargs):
+    bump_masters_version()
+
+
+def invalidate_masters_m2m(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_masters_version()
+
+
+def uncount_deleted_bed(sender, instance, **kwargs):
+    # Beds only go away with their room; keep the hostel's count in step
+    if instance.is_occupied:
+        Hostel.objects.filter(rooms=instance.room_id).update(occupied_beds=F('occupied_beds') - 1)
+
+
+def uncount_deleted_pickup_point(sender, instance, **kwargs):
+    # Students on the pickup point are unassigned (SET_NULL) without signals
+    riders = StudentTransportDetail.objects.filter(pickup_point=instance).count()
+    if riders:
+        Route.objects.filter(pk=instance.route_id, occupied_seats__gte=riders).update(
+            occupied_seats=F('occupied_seats') - riders
+        )
+
+
+for model in MASTER_MODELS:
+    post_save.connect(invalidate_masters, sender=model, dispatch_uid=f"masters-save-{model._meta.label}")
+    post_delete.connect(invalidate_masters, sender=model, dispatch_uid=f"masters-delete-{model._meta.label}")
+    batch_written.connect(invalidate_masters, sender=model, dispatch_uid=f"masters-batch-{model._meta.label}")
+
+m2m_changed.connect(invalidate_masters_m2m, sender=RouteVehicle.vehicles.through, dispatch_uid="masters-route-vehicles")
+post_delete.connect(uncount_deleted_bed, sender=HostelBed, dispatch_uid="masters-hostel-bed-delete")
+pre_delete.connect(uncount_deleted_pickup_point, sender=RoutePickupPoint, dispatch_uid="masters-pickup-point-delete")
@@ -1,3 +1,320 @@
-from django.test import TestCase
+import io
+import os
+import random
+import shutil
+import tempfile
+from datetime import time
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from authuser.models import CustomUser
+from base.signals import batch_written
+from .geo import haversine_km
+from .models import PickupPoint, Route, RoutePickupPoint, SchoolClass, Vehicle
+from .pickup_index import nearest_pickup_points
+from .route_planning import distance_matrix, plan_stops, stop_order
 
-# Create your tests here.
+
+class UniqueConstraintMixinTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+
+    def test_duplicate_create_is_a_field_error(self):
+        self.client.post('/api/master/classes/create/', {'name': 'One'}, format='json')
+        response = self.client.post('/api/master/classes/create/', {'name': 'One'}, format='json').json()
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertEqual(response['errors']['name'], ["Class with name 'One' already exists."])
+        self.assertEqual(SchoolClass.objects.count(), 1)
+
+    def test_duplicate_update_is_a_field_error(self):
+        SchoolClass.objects.create(name='One')
+        other = SchoolClass.objects.create(name='Two')
+        response = self.client.patch(f'/api/master/classes/{other.pk}/', {'name': 'One'}, format='json').json()
+        self.assertEqual(response['errors']['name'], ["Class with name 'One' already exists."])
+        # Saving a row under its own name is not a duplicate
+        response = self.client.patch(f'/api/master/classes/{other.pk}/', {'name': 'Two'}, format='json').json()
+        self.assertEqual(response['status'], 200)
+
+    def test_section_names_are_unique_per_class(self):
+        first, second = SchoolClass.objects.create(name='One'), SchoolClass.objects.create(name='Two')
+        create = lambda school_class: self.client.post(
+            '/api/master/sections/create/', {'name': 'A', 'class_id': school_class.pk}, format='json'
+        ).json()
+        self.assertEqual(create(first)['status'], 201)
+        self.assertEqual(create(second)['status'], 201)
+        self.assertIn('name', create(first)['errors'])
+
+    def test_transaction_survives_a_duplicate(self):
+        SchoolClass.objects.create(name='One')
+        with transaction.atomic():
+            response = self.client.post('/api/master/classes/create/', {'name': 'One'}, format='json').json()
+            self.assertIn('name', response['errors'])
+            self.assertEqual(SchoolClass.objects.count(), 1)
+
+
+class UniqueConstraintMigrationTests(TransactionTestCase):
+    before = [('master', '0003_list_query_indexes'), ('student', '0006_student_search_index')]
+    after = [('master', '0004_unique_constraints'), ('student', '0007_unique_constraints')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_renamed_before_constraints_are_added(self):
+        apps = self.migrate(self.before)
+        SchoolClass = apps.get_model('master', 'SchoolClass')
+        Section = apps.get_model('master', 'Section')
+        House = apps.get_model('student', 'House')
+        first, second, third = (SchoolClass.objects.create(name='Class 1') for _ in range(3))
+        sections = [Section.objects.create(name='A', class_id=first) for _ in range(2)]
+        other_class_section = Section.objects.create(name='A', class_id=second)
+        houses = [House.objects.create(name='Red') for _ in range(2)]
+
+        apps = self.migrate(self.after)
+        SchoolClass = apps.get_model('master', 'SchoolClass')
+        Section = apps.get_model('master', 'Section')
+        House = apps.get_model('student', 'House')
+        self.assertEqual(
+            list(SchoolClass.objects.order_by('id').values_list('name', flat=True)),
+            ['Class 1', f'Class 1 ({second.id})', f'Class 1 ({third.id})'],
+        )
+        self.assertEqual(
+            list(Section.objects.order_by('id').values_list('name', flat=True)),
+            ['A', f'A ({sections[1].id})', 'A'],
+        )
+        self.assertEqual(Section.objects.get(id=other_class_section.id).name, 'A')
+        self.assertEqual(House.objects.get(id=houses[1].id).name, f'Red ({houses[1].id})')
+
+    def test_duplicate_fee_masters_abort_with_their_ids(self):
+        apps = self.migrate(self.before)
+        FeesGroup = apps.get_model('master', 'FeesGroup')
+        FeesTypeMaster = apps.get_model('master', 'FeesTypeMaster')
+        FeesMaster = apps.get_model('master', 'FeesMaster')
+        group = FeesGroup.objects.create(name='Term 1')
+        fees_type = FeesTypeMaster.objects.create(name='Tuition', fees_code='T')
+        rows = [
+            FeesMaster.objects.create(fees_group=group, fees_type=fees_type, due_date='2025-04-01', amount=100)
+            for _ in range(2)
+        ]
+
+        with self.assertRaisesMessage(RuntimeError, f"FeesMaster ids {[row.id for row in rows]}"):
+            self.migrate(self.after)
+        FeesMaster.objects.filter(id=rows[1].id).delete()
+
+
+class PickupIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        rng = random.Random(1)
+        route = Route.objects.create(title='North')
+        points = PickupPoint.objects.bulk_create([
+            PickupPoint(
+                pickup_point=f'P{index}',
+                latitude=round(12.9 + rng.uniform(-0.2, 0.2), 6), longitude=round(77.6 + rng.uniform(-0.2, 0.2), 6)
+            )
+            for index in range(300)
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            RoutePickupPoint.objects.bulk_create([
+                RoutePickupPoint(route=route, pickup_point=point, distance=1, pickup_time=time(7), monthly_fees=10)
+                for point in points
+            ])
+            batch_written.send(sender=RoutePickupPoint)
+        self.points = [(point.pickup_point, float(point.latitude), float(point.longitude)) for point in points]
+
+    def brute_force(self, latitude, longitude, k):
+        return [
+            name for _, name in sorted(
+                (haversine_km(latitude, longitude, lat, lon), name) for name, lat, lon in self.points
+            )[:k]
+        ]
+
+    def nearest(self, body):
+        return self.client.post('/api/master/transport/route-pickup-points/nearest/', body, format='json').json()
+
+    def test_matches_a_brute_force_search(self):
+        rng = random.Random(2)
+        for _ in range(50):
+            latitude, longitude = 12.9 + rng.uniform(-0.5, 0.5), 77.6 + rng.uniform(-0.5, 0.5)
+            found = [stop['pickup_point_name'] for stop in nearest_pickup_points(latitude, longitude, 5)]
+            self.assertEqual(found, self.brute_force(latitude, longitude, 5))
+        # Far outside the grid the search still widens until it finds stops
+        self.assertEqual(len(nearest_pickup_points(50, 0, 2)), 2)
+
+    def test_endpoint_validates_and_limits_by_distance(self):
+        response = self.nearest({'latitude': 12.95, 'longitude': 77.61, 'k': 3})
+        self.assertEqual([stop['pickup_point_name'] for stop in response['data']], self.brute_force(12.95, 77.61, 3))
+        self.assertEqual(self.nearest({'latitude': 12.95, 'longitude': 77.61, 'max_distance_km': 0.001})['data'], [])
+        self.assertIn('latitude', self.nearest({'latitude': 99, 'longitude': 1})['errors'])
+        self.assertIn('k', self.nearest({'latitude': 1, 'longitude': 1, 'k': 0})['errors'])
+
+    def test_index_follows_writes(self):
+        nearest = self.brute_force(12.95, 77.61, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            PickupPoint.objects.get(pickup_point=nearest[0]).delete()
+        response = self.nearest({'latitude': 12.95, 'longitude': 77.61, 'k': 1})
+        self.assertEqual([stop['pickup_point_name'] for stop in response['data']], nearest[1:])
+
+
+@skipUnless(find_spec('numpy'), "Route planning requires numpy.")
+class RoutePlanningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        # Stops along one meridian, created out of order
+        self.route = Route.objects.create(title='North')
+        for index, offset in enumerate([3, 0, 4, 1, 2]):
+            RoutePickupPoint.objects.create(
+                route=self.route, distance=1, pickup_time=time(7, index), monthly_fees=10,
+                pickup_point=PickupPoint.objects.create(pickup_point=f'P{offset}', latitude=12.9 + offset / 100, longitude=77.6),
+            )
+
+    def names(self, stops):
+        names = dict(RoutePickupPoint.objects.values_list('id', 'pickup_point__pickup_point'))
+        return [names[stop['id']] for stop in stops]
+
+    def test_stop_order_walks_a_line_end_to_end(self):
+        latitudes = [3, 0, 4, 1, 2]
+        order = stop_order(distance_matrix(latitudes, [0] * 5))
+        self.assertIn([latitudes[index] for index in order], ([0, 1, 2, 3, 4], [4, 3, 2, 1, 0]))
+        # A fixed origin past the far end decides the direction
+        order = stop_order(distance_matrix([5] + latitudes, [0] * 6), origin=True)
+        self.assertEqual([latitudes[index] for index in order], [4, 3, 2, 1, 0])
+
+    def test_plan_stops_accumulates_distance_and_time(self):
+        stops = [
+            {'id': index, 'latitude': 12.9 + offset / 100, 'longitude': 77.6, 'pickup_time': time(8)}
+            for index, offset in enumerate([2, 0, 1])
+        ]
+        plan = plan_stops(stops, origin=(12.89, 77.6), start_time=time(7), speed_kmph=30, stop_minutes=2)
+        self.assertEqual([stop['id'] for stop in plan], [1, 2, 0])
+        self.assertEqual([str(stop['distance']) for stop in plan], ['1.11', '2.22', '3.34'])
+        # Distances run from the origin; the first pickup keeps the start time and
+        # each hop adds its travel time plus the stop
+        self.assertEqual([stop['pickup_time'] for stop in plan], [time(7), time(7, 4, 13), time(7, 8, 26)])
+
+    def test_dry_run_returns_the_plan_without_saving(self):
+        response = self.client.post('/api/master/transport/routes/plan/', {'dry_run': True}, format='json').json()
+        self.assertEqual(response['message'], 'Success')
+        self.assertIn(self.names(response['data'][0]['stops']), (
+            ['P0', 'P1', 'P2', 'P3', 'P4'], ['P4', 'P3', 'P2', 'P1', 'P0']
+        ))
+        self.assertEqual(set(RoutePickupPoint.objects.values_list('distance', flat=True)), {1})
+
+    def test_dry_run_false_saves(self):
+        response = self.client.post('/api/master/transport/routes/plan/', {'dry_run': 'false'}, format='json').json()
+        self.assertEqual(response['message'], 'Routes planned successfully.')
+        self.assertNotEqual(set(RoutePickupPoint.objects.values_list('distance', flat=True)), {1})
+
+    def test_plan_is_saved(self):
+        response = self.client.post('/api/master/transport/routes/plan/', {
+            'routes': [self.route.pk], 'origin': {'latitude': 12.8, 'longitude': 77.6}, 'start_time': '06:45'
+        }, format='json').json()
+        self.assertEqual(response['message'], 'Routes planned successfully.')
+        saved = RoutePickupPoint.objects.order_by('pickup_time').values_list('pickup_point__pickup_point', 'pickup_time')
+        self.assertEqual([name for name, _ in saved], ['P0', 'P1', 'P2', 'P3', 'P4'])
+        self.assertEqual(saved[0][1], time(6, 45))
+        self.assertEqual(str(RoutePickupPoint.objects.get(pickup_point__pickup_point='P4').distance), '15.57')
+
+    def test_rejects_invalid_parameters(self):
+        plan = lambda body: self.client.post('/api/master/transport/routes/plan/', body, format='json').json()['errors']
+        self.assertEqual(plan({'routes': 'x'}), {'routes': ['Expected a list of route ids.']})
+        self.assertEqual(plan({'start_time': '25:00'}), {'start_time': ['Time has wrong format. Use hh:mm[:ss].']})
+        self.assertEqual(plan({'speed_kmph': 0}), {'speed_kmph': ['Ensure this value is greater than 0.']})
+        self.assertIn('longitude', plan({'origin': {'latitude': 1}}))
+        for value in ('nan', 'inf'):
+            self.assertEqual(plan({'speed_kmph': value}), {'speed_kmph': ['A valid number is required.']})
+            self.assertEqual(plan({'stop_minutes': value}), {'stop_minutes': ['A valid number is required.']})
+        self.assertEqual(plan({'dry_run': 'maybe'}), {'dry_run': ['Must be a valid boolean.']})
+
+    def test_command(self):
+        output = io.StringIO()
+        call_command('plan_routes', '--route', str(self.route.pk), '--dry-run', stdout=output)
+        self.assertIn(f'route {self.route.pk}: 5 stops, 4.45 km', output.getvalue())
+        self.assertIn('Planned 1 routes.', output.getvalue())
+
+
+class MastersSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+
+    def masters(self):
+        return self.client.get('/api/master/masters/all/').json()
+
+    def test_version_moves_only_when_the_write_commits(self):
+        before = self.masters()['version']
+        with self.captureOnCommitCallbacks() as callbacks:
+            SchoolClass.objects.create(name='One')
+            self.assertEqual(self.masters()['version'], before)
+        for callback in callbacks:
+            callback()
+        after = self.masters()
+        self.assertNotEqual(after['version'], before)
+        self.assertEqual([row['name'] for row in after['data']['classes']], ['One'])
+
+    def test_unchanged_snapshot_answers_not_modified(self):
+        etag = self.client.get('/api/master/masters/all/')['ETag']
+        self.assertEqual(self.client.get('/api/master/masters/all/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class VehiclePhotoTests(TransactionTestCase):
+    # Real commits: staged files are written while the request still holds them
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Thumbnails render in a process pool; RenderImageTests covers them
+        patcher = mock.patch('master.transport_views.queue_thumbnail')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, vehicle_number):
+        photo = SimpleUploadedFile('bus.png', b'\x89PNG\r\n\x1a\n' + b'0' * 32)
+        return self.client.post('/api/master/transport/vehicles/create/', {
+            'vehicle_number': vehicle_number, 'vehicle_model': 'Bus', 'year_made': 2020,
+            'registration_number': f'R-{vehicle_number}', 'chasis_number': f'C-{vehicle_number}',
+            'max_seating_capacity': 40, 'driver_name': 'Driver', 'driver_licence': 'L1',
+            'driver_contact_no': '9999999999', 'vehicle_photo': photo,
+        }, format='multipart').json()
+
+    def stored_files(self):
+        return [name for _, _, names in os.walk(self.media) for name in names]
+
+    def test_photo_is_written_when_the_vehicle_saves(self):
+        response = self.create('V1')
+        self.assertEqual(response['status'], 201)
+        self.assertEqual(len(self.stored_files()), 1)
+        self.assertTrue(Vehicle.objects.get().vehicle_photo.startswith('vehicles/'))
+
+    def test_rejected_vehicle_leaves_no_file(self):
+        self.create('V1')
+        shutil.rmtree(self.media)
+        os.makedirs(self.media)
+        response = self.create('V1')
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertEqual(self.stored_files(), [])
+        self.assertEqual(Vehicle.objects.count(), 1)
@@ -1,18 +1,25 @@
-from uuid import uuid4
+from math import isfinite
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 from rest_framework.generics import get_object_or_404
-import os
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_time
+from base.uploads import UploadBatch
+from base.images import queue_thumbnail
+from base.views import bool_param
 from .models import Route, Vehicle, PickupPoint, RouteVehicle, RoutePickupPoint
 from .serializers import (
     RouteSerializer, VehicleSerializer,
     PickupPointSerializer, RouteVehicleSerializer, RoutePickupPointSerializer
 )
+from .occupancy import transport_occupancy
+from .geo import parse_coordinate
+from .route_planning import AVERAGE_SPEED_KMPH, STOP_MINUTES, plan_routes
+from .pickup_index import nearest_pickup_points
 from .views import BaseViewSet
 
 common_post_request_body = {
@@ -21,9 +28,14 @@ common_post_request_body = {
         "properties": {
             "page": {"type": "integer", "example": 1},
             "pageSize": {"type": "integer", "example": 10},
-            "order_by_field": {"type": "string", "example": "id"},
-            "order_by_value": {"type": "string", "example": "desc"},
+            "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+            "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+            "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
             "search_text": {"type": "string", "example": ""},
+            "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+            "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+            "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+            "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
         },
         "required": [],
     }
@@ -50,10 +62,17 @@ common_post_request_body = {
     update=extend_schema(tags=['Route']),
     partial_update=extend_schema(tags=['Route']),
     destroy=extend_schema(tags=['Route']),
+    batch=extend_schema(tags=['Route']),
+    export=extend_schema(tags=['Route']),
 )
 class RouteViewSet(BaseViewSet):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'title': ('title',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['title']
@@ -85,8 +104,9 @@ class RouteViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -94,6 +114,118 @@ class RouteViewSet(BaseViewSet):
             "count": queryset.count()
         }, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        methods=["GET"],
+        tags=["Route"],
+        description=(
+            "Seat occupancy of every route and vehicle, served from the occupancy counters "
+            "kept by student transport assignment."
+        ),
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": {
+                "routes": [{"id": 1, "title": "Route 1", "occupied": 38, "capacity": 40, "vehicles": [1], "is_active": True}],
+                "vehicles": [{"id": 1, "vehicle_number": "KA01", "capacity": 40, "occupied": 38, "free": 2, "is_active": True}]
+            }
+        })}
+    )
+    @action(detail=False, methods=["get"], url_path="occupancy")
+    def occupancy(self, request):
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": transport_occupancy()
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Route"],
+        description=(
+            "Re-plan the stop order of active routes (all, or those in `routes`) from the pickup point "
+            "coordinates: a haversine distance matrix, nearest-neighbour ordering and 2-opt. Each stop "
+            "gets its cumulative `distance` (from `origin` when sent, else from the first stop) and an "
+            "estimated `pickup_time`; the first pickup keeps `start_time`, defaulting to the route's "
+            "earliest pickup time. With `dry_run` the plan is returned without saving."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "routes": {"type": "array", "items": {"type": "integer"}, "nullable": True, "example": None},
+                "origin": {"type": "object", "nullable": True, "example": None,
+                           "properties": {"latitude": {"type": "number"}, "longitude": {"type": "number"}}},
+                "start_time": {"type": "string", "nullable": True, "example": "07:00"},
+                "speed_kmph": {"type": "number", "example": AVERAGE_SPEED_KMPH},
+                "stop_minutes": {"type": "number", "example": STOP_MINUTES},
+                "dry_run": {"type": "boolean", "example": True},
+            },
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Routes planned successfully.", "status": 200,
+            "data": [{"route": 1, "total_distance": "12.40", "stops": [
+                {"id": 3, "sequence": 1, "distance": "0.00", "pickup_time": "07:00:00"},
+                {"id": 1, "sequence": 2, "distance": "2.15", "pickup_time": "07:06:10"},
+            ]}]
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="plan")
+    def plan(self, request):
+        params = request.data
+        routes = params.get('routes')
+        if routes is not None and (
+            not isinstance(routes, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in routes)
+        ):
+            raise ValidationError({'routes': ["Expected a list of route ids."]})
+
+        origin = params.get('origin')
+        if origin:
+            if not isinstance(origin, dict):
+                raise ValidationError({'origin': ["Expected an object with latitude and longitude."]})
+            origin = parse_coordinate(origin.get('latitude'), origin.get('longitude'))
+
+        start_time = params.get('start_time')
+        if start_time not in (None, ''):
+            try:
+                start_time = parse_time(str(start_time))
+            except ValueError:
+                start_time = None
+            if start_time is None:
+                raise ValidationError({'start_time': ["Time has wrong format. Use hh:mm[:ss]."]})
+        else:
+            start_time = None
+
+        rates = {}
+        for field, default in (('speed_kmph', AVERAGE_SPEED_KMPH), ('stop_minutes', STOP_MINUTES)):
+            value = params.get(field)
+            try:
+                rates[field] = default if value in (None, '') else float(value)
+            except (TypeError, ValueError):
+                raise ValidationError({field: ["A valid number is required."]})
+            # nan and inf pass the range checks below but break the time arithmetic
+            if not isfinite(rates[field]):
+                raise ValidationError({field: ["A valid number is required."]})
+        if rates['speed_kmph'] <= 0:
+            raise ValidationError({'speed_kmph': ["Ensure this value is greater than 0."]})
+        if rates['stop_minutes'] < 0:
+            raise ValidationError({'stop_minutes': ["Ensure this value is greater than or equal to 0."]})
+
+        dry_run = bool_param(params, 'dry_run')
+        plans = plan_routes(routes, dry_run=dry_run, origin=origin, start_time=start_time, **rates)
+        return Response({
+            "message": "Routes planned successfully." if not dry_run else "Success",
+            "status": status.HTTP_200_OK,
+            "data": [
+                {
+                    "route": route_id,
+                    "total_distance": str(plan[-1]['distance']),
+                    "stops": [
+                        {**stop, "distance": str(stop['distance']), "pickup_time": stop['pickup_time'].isoformat()}
+                        for stop in plan
+                    ],
+                }
+                for route_id, plan in plans.items()
+            ]
+        }, status=status.HTTP_200_OK)
+
 
 # Vehicle ViewSet
 @extend_schema_view(
@@ -116,11 +248,20 @@ class RouteViewSet(BaseViewSet):
     update=extend_schema(tags=['Vehicle']),
     partial_update=extend_schema(tags=['Vehicle']),
     destroy=extend_schema(tags=['Vehicle']),
+    batch=extend_schema(tags=['Vehicle']),
+    export=extend_schema(tags=['Vehicle']),
 )
 
 class VehicleViewSet(BaseViewSet):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'vehicle_number': ('vehicle_number',),
+        'vehicle_model': None,
+        'max_seating_capacity': None,
+        'is_active': ('is_active', 'id'),
+    }
     parser_classes = [MultiPartParser, FormParser, JSONParser]  # ⬅️ For file uploads
     
     def get_object(self):
@@ -134,31 +275,28 @@ class VehicleViewSet(BaseViewSet):
     def get_search_fields(self):
         return ['vehicle_number', 'vehicle_model']
 
-    def save_file(self, file):
-        # Validate image
-        if not file.content_type.startswith('image/'):
-            raise ValueError("Only image files are allowed.")
-        if file.size > 5 * 1024 * 1024:  # 5MB limit
-            raise ValueError("Image file too large (max 5MB).")
-
-        # Save file
-        ext = file.name.split('.')[-1]
-        unique_name = f"{uuid4().hex}.{ext}"
-        file_path = os.path.join('vehicles', unique_name)
-        saved_path = default_storage.save(file_path, ContentFile(file.read()))
-        return saved_path
+    def save_file(self, uploads, file):
+        # Validate image from its content, not the client's Content-Type;
+        # the file is written once the vehicle row commits
+        return uploads.stage(file, allowed_types=('image/',))
 
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
         file = request.FILES.get('vehicle_photo')
         try:
+            uploads = UploadBatch('vehicles/')
             if file:
-                saved_path = self.save_file(file)
-                data['vehicle_photo'] = saved_path  # Save relative path in DB
+                data['vehicle_photo'] = self.save_file(uploads, file)  # Save relative path in DB
 
             serializer = VehicleSerializer(data=data, context={'request': request})
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+
+            # A failed save rolls back and the staged photo is never written
+            with transaction.atomic():
+                vehicle = serializer.save()
+                uploads.commit_on_success()
+                if file:
+                    queue_thumbnail(Vehicle.objects.filter(pk=vehicle.pk), 'vehicle_photo', 'vehicle_photo_thumbnail')
 
             return Response({
                 "data": serializer.data,
@@ -180,13 +318,19 @@ class VehicleViewSet(BaseViewSet):
         data = request.data.copy()
         file = request.FILES.get('vehicle_photo')
         try:
+            uploads = UploadBatch('vehicles/')
             if file:
-                saved_path = self.save_file(file)
-                data['vehicle_photo'] = saved_path  # Save relative path
+                data['vehicle_photo'] = self.save_file(uploads, file)  # Save relative path
 
             serializer = VehicleSerializer(instance, data=data, partial=True, context={'request': request})
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+
+            # A failed save rolls back and the staged photo is never written
+            with transaction.atomic():
+                vehicle = serializer.save()
+                uploads.commit_on_success()
+                if file:
+                    queue_thumbnail(Vehicle.objects.filter(pk=vehicle.pk), 'vehicle_photo', 'vehicle_photo_thumbnail')
 
             return Response({
                 "data": serializer.data,
@@ -226,8 +370,9 @@ class VehicleViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -256,10 +401,17 @@ class VehicleViewSet(BaseViewSet):
     update=extend_schema(tags=['PickupPoint']),
     partial_update=extend_schema(tags=['PickupPoint']),
     destroy=extend_schema(tags=['PickupPoint']),
+    batch=extend_schema(tags=['PickupPoint']),
+    export=extend_schema(tags=['PickupPoint']),
 )
 class PickupPointViewSet(BaseViewSet):
     queryset = PickupPoint.objects.all()
     serializer_class = PickupPointSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'pickup_point': ('pickup_point',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['pickup_point', 'latitude', 'longitude']
@@ -291,8 +443,9 @@ class PickupPointViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -322,10 +475,19 @@ class PickupPointViewSet(BaseViewSet):
     update=extend_schema(tags=['RouteVehicle']),
     partial_update=extend_schema(tags=['RouteVehicle']),
     destroy=extend_schema(tags=['RouteVehicle']),
+    batch=extend_schema(tags=['RouteVehicle']),
+    export=extend_schema(tags=['RouteVehicle']),
 )
 class RouteVehicleViewSet(BaseViewSet):
     queryset = RouteVehicle.objects.all()
     serializer_class = RouteVehicleSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'route': ('route',),
+        'is_active': ('is_active', 'id'),
+    }
+    select_related_fields = ['route']
+    prefetch_related_fields = ['vehicles']
 
     def get_required_fields(self):
         return ['route', 'vehicles']
@@ -357,8 +519,9 @@ class RouteVehicleViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -388,10 +551,25 @@ class RouteVehicleViewSet(BaseViewSet):
     update=extend_schema(tags=['RoutePickupPoint']),
     partial_update=extend_schema(tags=['RoutePickupPoint']),
     destroy=extend_schema(tags=['RoutePickupPoint']),
+    batch=extend_schema(tags=['RoutePickupPoint']),
+    export=extend_schema(tags=['RoutePickupPoint']),
 )
 class RoutePickupPointViewSet(BaseViewSet):
     queryset = RoutePickupPoint.objects.all()
     serializer_class = RoutePickupPointSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'route': ('route',),
+        'pickup_point': ('pickup_point',),
+        'distance': None,
+        'pickup_time': None,
+        'monthly_fees': None,
+        'is_active': ('is_active', 'id'),
+    }
+    select_related_fields = ['route', 'pickup_point']
+    # Results returned by nearest() when `k` is not sent, and the most allowed
+    nearest_default = 5
+    nearest_max = 50
 
     def get_required_fields(self):
         return ['route', 'pickup_point', 'distance', 'pickup_time', 'monthly_fees']
@@ -423,11 +601,63 @@ class RoutePickupPointViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
             "data": serializer.data,
             "count": queryset.count()
         }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["RoutePickupPoint"],
+        description=(
+            "The `k` (default 5, at most 50) active route pickup points nearest to a coordinate, "
+            "nearest first, optionally within `max_distance_km`. Served from an in-process grid "
+            "index that is rebuilt when pickup points, routes or route pickup points change."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "latitude": {"type": "number", "example": 12.9716},
+                "longitude": {"type": "number", "example": 77.5946},
+                "k": {"type": "integer", "example": 5},
+                "max_distance_km": {"type": "number", "nullable": True, "example": None},
+            },
+            "required": ["latitude", "longitude"],
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": [{"id": 1, "route": 1, "route_title": "Route 1", "pickup_point": 1, "pickup_point_name": "Main Gate",
+                      "latitude": 12.9721, "longitude": 77.5933, "distance_km": 0.152, "distance": "4.50",
+                      "pickup_time": "07:40:00", "monthly_fees": "1500.00"}]
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="nearest")
+    def nearest(self, request):
+        params = request.data
+        latitude, longitude = parse_coordinate(params.get('latitude'), params.get('longitude'))
+        k = params.get('k')
+        try:
+            k = self.nearest_default if k in (None, '') else int(k)
+        except (TypeError, ValueError):
+            raise ValidationError({'k': ["A valid integer is required."]})
+        if not 1 <= k <= self.nearest_max:
+            raise ValidationError({'k': [f"Ensure this value is between 1 and {self.nearest_max}."]})
+        max_km = params.get('max_distance_km')
+        if max_km not in (None, ''):
+            try:
+                max_km = float(max_km)
+            except (TypeError, ValueError):
+                raise ValidationError({'max_distance_km': ["A valid number is required."]})
+        else:
+            max_km = None
+
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": nearest_pickup_points(latitude, longitude, k, max_km)
+        }, status=status.HTTP_200_OK)
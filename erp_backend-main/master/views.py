@@ -9,6 +9,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.views import APIView
 from django.db.models import Q
+from django.utils.http import parse_etags
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, OpenApiExample, OpenApiTypes
 from .models import (
     SchoolClass, Section, CasteCategory, SchoolSession,
@@ -27,6 +28,7 @@ from student.models import House
 from student.serializers import HouseSerializer
 from math import ceil
 from base.views import BaseViewSet
+from .cache import get_masters_snapshot
 
 # Common Swagger parameters for POST requests
 common_list_parameters = [
@@ -46,9 +48,14 @@ common_list_parameters = [
                 "properties": {
                     "page": {"type": "integer", "example": 1},
                     "pageSize": {"type": "integer", "example": 10},
-                    "order_by_field": {"type": "string", "example": "id"},
-                    "order_by_value": {"type": "string", "example": "desc"},
+                    "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+                    "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+                    "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
                     "search_text": {"type": "string", "example": ""},
+                    "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+                    "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+                    "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
                 },
                 "required": [],
             }
@@ -69,10 +76,17 @@ common_list_parameters = [
     update=extend_schema(tags=['Classes']),
     partial_update=extend_schema(tags=['Classes']),
     destroy=extend_schema(tags=['Classes']),
+    batch=extend_schema(tags=['Classes']),
+    export=extend_schema(tags=['Classes']),
 )
 class ClassViewSet(BaseViewSet):
     queryset = SchoolClass.objects
     serializer_class = ClassSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name']
@@ -108,8 +122,9 @@ class ClassViewSet(BaseViewSet):
         """
         Return all class records without pagination or filters.
         """
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -126,9 +141,14 @@ class ClassViewSet(BaseViewSet):
                 "properties": {
                     "page": {"type": "integer", "example": 1},
                     "pageSize": {"type": "integer", "example": 10},
-                    "order_by_field": {"type": "string", "example": "id"},
-                    "order_by_value": {"type": "string", "example": "desc"},
+                    "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+                    "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+                    "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
                     "search_text": {"type": "string", "example": ""},
+                    "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+                    "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+                    "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
                 },
                 "required": [],
             }
@@ -149,10 +169,19 @@ class ClassViewSet(BaseViewSet):
     update=extend_schema(tags=['Sections']),
     partial_update=extend_schema(tags=['Sections']),
     destroy=extend_schema(tags=['Sections']),
+    batch=extend_schema(tags=['Sections']),
+    export=extend_schema(tags=['Sections']),
 )
 class SectionViewSet(BaseViewSet):
     queryset = Section.objects
     serializer_class = SectionSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'class_id': ('class_id', 'name'),
+        'is_active': ('is_active', 'id'),
+    }
+    select_related_fields = ['class_id']
 
     def get_required_fields(self):
         return ['name']
@@ -170,9 +199,14 @@ class SectionViewSet(BaseViewSet):
                 "properties": {
                     "page": {"type": "integer", "example": 1},
                     "pageSize": {"type": "integer", "example": 10},
-                    "order_by_field": {"type": "string", "example": "id"},
-                    "order_by_value": {"type": "string", "example": "desc"},
+                    "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+                    "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+                    "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
                     "search_text": {"type": "string", "example": ""},
+                    "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+                    "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+                    "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
                 },
                 "required": [],
             }
@@ -193,10 +227,17 @@ class SectionViewSet(BaseViewSet):
     update=extend_schema(tags=['CasteCategories']),
     partial_update=extend_schema(tags=['CasteCategories']),
     destroy=extend_schema(tags=['CasteCategories']),
+    batch=extend_schema(tags=['CasteCategories']),
+    export=extend_schema(tags=['CasteCategories']),
 )
 class CasteCategoryViewSet(BaseViewSet):
     queryset = CasteCategory.objects
     serializer_class = CasteCategorySerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name']
@@ -214,9 +255,14 @@ class CasteCategoryViewSet(BaseViewSet):
                 "properties": {
                     "page": {"type": "integer", "example": 1},
                     "pageSize": {"type": "integer", "example": 10},
-                    "order_by_field": {"type": "string", "example": "id"},
-                    "order_by_value": {"type": "string", "example": "desc"},
+                    "prev_pageSize": {"type": "integer", "nullable": True, "example": None, "description": "pageSize of the previous request; a change resets page to 1"},
+                    "order_by_field": {"type": "string", "example": "id", "description": "Field from the viewset's ordering_fields; comma separated for multi-column sorts"},
+                    "order_by_value": {"type": "string", "example": "desc", "description": "asc or desc, once or per order_by_field"},
                     "search_text": {"type": "string", "example": ""},
+                    "cursor": {"type": "string", "nullable": True, "example": None, "description": "Opt-in keyset pagination; send null for the first page, then next_cursor"},
+                    "include_count": {"type": "boolean", "example": False, "description": "Return count in cursor mode"},
+                    "count_mode": {"type": "string", "example": "exact", "description": "exact (cached) or estimated; estimated uses table statistics for unfiltered lists"},
+                    "fields": {"type": "array", "items": {"type": "string"}, "example": ["id", "name"], "description": "Sparse fieldset: only these fields are selected and returned"},
                 },
                 "required": [],
             }
@@ -237,10 +283,19 @@ class CasteCategoryViewSet(BaseViewSet):
     update=extend_schema(tags=['SchoolSessions']),
     partial_update=extend_schema(tags=['SchoolSessions']),
     destroy=extend_schema(tags=['SchoolSessions']),
+    batch=extend_schema(tags=['SchoolSessions']),
+    export=extend_schema(tags=['SchoolSessions']),
 )
 class SchoolSessionViewSet(BaseViewSet):
     queryset = SchoolSession.objects
     serializer_class = SchoolSessionSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'start_date': None,
+        'end_date': None,
+        'is_active': ('is_active', 'start_date'),
+    }
 
     def get_required_fields(self):
         return ['name']
@@ -249,6 +304,14 @@ class SchoolSessionViewSet(BaseViewSet):
         return ['name']
 
 
+def snapshot_rows(serializer_class, queryset, exclude=()):
+    """`queryset` serialized with `serializer_class`, leaving out the `exclude` fields."""
+    serializer = serializer_class(queryset, many=True)
+    for name in exclude:
+        serializer.child.fields.pop(name)
+    return serializer.data
+
+
 @extend_schema(
     tags=["Masters"],
     summary="Get All Masters Data",
@@ -270,7 +333,26 @@ class SchoolSessionViewSet(BaseViewSet):
 class AllMastersAPIView(APIView):
     authentication_classes = [JWTAuthentication]  
     permission_classes = [IsAuthenticated]
+
     def get(self, request):
+        version, data = get_masters_snapshot(self.build_data)
+        etag = f'"masters-{version}"'
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                "message": "Success",
+                "status": status.HTTP_200_OK,
+                "version": version,
+                "data": data
+            }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def build_data(self):
         # Group FeesMaster by FeesGroup
         grouped_fees = defaultdict(list)
 
@@ -293,9 +375,11 @@ class AllMastersAPIView(APIView):
             })
             total_amount.append(fee.amount)
 
+        fees_groups = list(FeesGroup.objects.all())
+
         # Build the final grouped data
         fees_master_grouped = []
-        for group in FeesGroup.objects.all():
+        for group in fees_groups:
             fees_master_grouped.append({
                 "group_id": group.id,
                 "group_name": group.name,
@@ -305,29 +389,28 @@ class AllMastersAPIView(APIView):
                 "amount": sum(total_amount) if total_amount else 0,
             })
 
-        data = {
+        return {
             "houses": HouseSerializer(House.objects.all(), many=True).data,
             "fees_types": FeesTypeMasterSerializer(FeesTypeMaster.objects.all(), many=True).data,
-            "fees_groups": FeesGroupSerializer(FeesGroup.objects.all(), many=True).data,
+            "fees_groups": FeesGroupSerializer(fees_groups, many=True).data,
             "fees_master": fees_master_grouped,
             "fees_discounts": FeesDiscountSerializer(FeesDiscount.objects.all(), many=True).data,
             
             "room_types": RoomTypeSerializer(RoomType.objects.all(), many=True).data,
-            "hostels": HostelSerializer(Hostel.objects.all(), many=True).data,
-            "hostel_rooms": HostelRoomSerializer(HostelRoom.objects.all(), many=True).data,
+            # Bed counters change with every allocation and are served by the
+            # availability endpoint; keeping them out spares the snapshot
+            "hostels": snapshot_rows(HostelSerializer, Hostel.objects.all(), exclude=['occupied_beds']),
+            "hostel_rooms": snapshot_rows(
+                HostelRoomSerializer, HostelRoom.objects.select_related('hostel', 'room_type'), exclude=['occupied_beds']
+            ),
             
-            "routes": RouteSerializer(Route.objects.all(), many=True).data,
-            "vehicles": VehicleSerializer(Vehicle.objects.all(), many=True).data,
+            # Seat counters are served by the transport occupancy endpoint
+            "routes": snapshot_rows(RouteSerializer, Route.objects.all(), exclude=['occupied_seats']),
+            "vehicles": snapshot_rows(VehicleSerializer, Vehicle.objects.all(), exclude=['occupied_seats']),
             "pickup_points": PickupPointSerializer(PickupPoint.objects.all(), many=True).data,
-            "route_vehicles": RouteVehicleSerializer(RouteVehicle.objects.all(), many=True).data,
-            "route_pickup_points": RoutePickupPointSerializer(RoutePickupPoint.objects.all(), many=True).data,
+            "route_vehicles": RouteVehicleSerializer(RouteVehicle.objects.select_related('route').prefetch_related('vehicles'), many=True).data,
+            "route_pickup_points": RoutePickupPointSerializer(RoutePickupPoint.objects.select_related('route', 'pickup_point'), many=True).data,
             "classes": ClassSerializer(SchoolClass.objects.all(), many=True).data,
-            "sections": SectionSerializer(Section.objects.all(), many=True).data,
+            "sections": SectionSerializer(Section.objects.select_related('class_id'), many=True).data,
             
         }
-
-        return Response({
-            "message": "Success",
-            "status": status.HTTP_200_OK,
-            "data": data
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -3,7 +3,7 @@ from .models import (
     House, StudentAdmission, StudentPersonalDetail, StudentPhysicalDetail,
     StudentTransportDetail, StudentHostelDetail, StudentFeesDetail,
     StudentParentDetail, StudentGuardianDetail, StudentAddressDetail,
-    StudentBankDetail, StudentDocument
+    StudentBankDetail, StudentDocument, FeePayment, FeePaymentAllocation
 )
 
 
@@ -51,6 +51,36 @@ class StudentFeesDetailAdmin(admin.ModelAdmin):
     list_display = ['student', 'fees_group', 'fees_type', 'amount', 'paid', 'discount', 'due_date']
     list_filter = ['fees_group', 'fees_type']
     search_fields = ['student__roll_number']
+    # Moved only by posting fee payments
+    readonly_fields = ['paid']
+
+
+class FeePaymentAllocationInline(admin.TabularInline):
+    model = FeePaymentAllocation
+    extra = 0
+    can_delete = False
+    readonly_fields = ['fee_detail', 'amount']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FeePayment)
+class FeePaymentAdmin(admin.ModelAdmin):
+    list_display = ['student', 'amount', 'payment_date', 'payment_mode', 'reference', 'balance_after']
+    list_filter = ['payment_mode', 'payment_date']
+    search_fields = ['student__roll_number', 'reference']
+    inlines = [FeePaymentAllocationInline]
+
+    # Receipts are posted through the API so they are allocated to fee rows
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(StudentParentDetail)
@@ -0,0 +1,226 @@
+import codecs
+import csv
+import logging
+from collections import defaultdict
+from datetime import datetime
+from zipfile import BadZipFile
+from django.db import transaction, DatabaseError
+from rest_framework import serializers
+from base.cache import bump_model_versions
+from .fee_assignment import assign_fee_groups
+from .hostel_allocation import allocate_bed
+from .transport_assignment import seat_deltas, seat_of, shift_seats
+from .search import refresh_search_index
+from .models import StudentAdmission
+from .serializers import FlatStudentSerializer, STUDENT_DETAIL_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Rows validated before a chunk is written in one transaction
+IMPORT_CHUNK_SIZE = 500
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def iter_csv_rows(upload):
+    """
+    Yield (line_number, row) from a CSV upload. File.__iter__ reads the upload
+    chunk by chunk, so the file is never held in memory.
+    """
+    reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig'))
+    try:
+        for row in reader:
+            yield reader.line_num, {
+                key.strip(): value.strip()
+                for key, value in row.items()
+                if key and isinstance(value, str) and value.strip()
+            }
+    except UnicodeDecodeError:
+        raise serializers.ValidationError({'file': ["The CSV file must be UTF-8 encoded."]})
+    except csv.Error:
+        raise serializers.ValidationError({'file': [f"The CSV file is malformed near line {reader.line_num}."]})
+
+
+def _cell_value(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool):
+        return value
+    return str(value).strip()
+
+
+def iter_xlsx_rows(upload):
+    """
+    Yield (row_number, row) from the first sheet of an XLSX upload using
+    openpyxl's read-only mode, which streams rows instead of loading the sheet.
+    """
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise serializers.ValidationError({'file': ["XLSX import requires openpyxl. Upload a CSV file instead."]})
+
+    try:
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError, OSError):
+        raise serializers.ValidationError({'file': ["The XLSX file is corrupt or not a workbook."]})
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            yield row_number, {
+                key: _cell_value(value)
+                for key, value in zip(header, values)
+                if key and value is not None and value != ''
+            }
+    finally:
+        workbook.close()
+
+
+def _prepare_row(data):
+    """
+    Validate one row with the FlatStudentSerializer rules. Returns
+    ((admission_data, related, fee_group_ids), None) or (None, errors).
+    """
+    data.setdefault('fee_details', '[]')
+    serializer = FlatStudentSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    admission_data = dict(serializer.validated_data)
+    try:
+        related, fee_group_ids, _documents = serializer.pop_related_data(admission_data)
+    except serializers.ValidationError as exc:
+        return None, {'fee_details': exc.detail}
+    if isinstance(fee_group_ids, int):
+        fee_group_ids = [fee_group_ids]
+    if not isinstance(fee_group_ids, list):
+        return None, {'fee_details': ["Must be a JSON list of fee group ids."]}
+    return (admission_data, related, fee_group_ids), None
+
+
+def _save_chunk(rows):
+    with transaction.atomic():
+        students = [StudentAdmission(**admission_data) for admission_data, _related, _fees in rows]
+        StudentAdmission.objects.bulk_create(students, batch_size=BULK_CREATE_BATCH_SIZE)
+        if any(student.pk is None for student in students):
+            # MySQL does not return primary keys from bulk inserts
+            ids = dict(StudentAdmission.objects.filter(
+                roll_number__in=[student.roll_number for student in students]
+            ).values_list('roll_number', 'id'))
+            for student in students:
+                student.pk = ids[student.roll_number]
+
+        # Beds go through the allocation service, which locks each room. The
+        # prepared rows are left untouched so a failed chunk can be retried.
+        hostel_rooms = [related['hostel'].get('hostel_room') for _, related, _ in rows]
+        for related_name, model in STUDENT_DETAIL_MODELS.items():
+            model.objects.bulk_create(
+                [
+                    model(student=student, **{
+                        field: value for field, value in related[related_name].items()
+                        if not (related_name == 'hostel' and field == 'hostel_room')
+                    })
+                    for student, (_, related, _) in zip(students, rows)
+                ],
+                batch_size=BULK_CREATE_BATCH_SIZE
+            )
+        # One capacity-checked counter update per vehicle and route
+        shift_seats(*seat_deltas([((None, None), seat_of(**related['transport'])) for _, related, _ in rows]))
+        for student, hostel_room in zip(students, hostel_rooms):
+            if hostel_room is not None:
+                allocate_bed(student, hostel_room)
+
+        # One set-based assignment per distinct combination of fee groups
+        by_fee_groups = defaultdict(list)
+        for student, (_, _, fee_group_ids) in zip(students, rows):
+            if fee_group_ids:
+                by_fee_groups[tuple(sorted(set(fee_group_ids)))].append(student.pk)
+        for fee_group_ids, student_ids in by_fee_groups.items():
+            assign_fee_groups(student_ids, fee_group_ids)
+
+        # bulk_create sends no post_save, so index the chunk and invalidate
+        # cached list counts explicitly
+        refresh_search_index([student.pk for student in students])
+        bump_model_versions(StudentAdmission, *STUDENT_DETAIL_MODELS.values())
+
+
+def _try_save(rows):
+    """Save `rows` in one transaction. Returns None, or the errors that rolled it back."""
+    try:
+        _save_chunk(rows)
+    except serializers.ValidationError as exc:
+        # e.g. a hostel room or vehicle is full
+        return exc.detail
+    except DatabaseError:
+        logger.exception("Saving %s imported student rows failed.", len(rows))
+        return {'non_field_errors': ["Could not be saved."]}
+    return None
+
+
+def _flush(chunk, report):
+    if _try_save([prepared for _row_number, prepared in chunk]) is None:
+        report['created'] += len(chunk)
+        return
+    # The chunk was rolled back; save its rows one at a time so only the
+    # rows that fail are rejected
+    for row_number, prepared in chunk:
+        errors = _try_save([prepared])
+        if errors is None:
+            report['created'] += 1
+        else:
+            report['errors'].append({
+                'row': row_number,
+                'roll_number': prepared[0].get('roll_number'),
+                'errors': errors,
+            })
+
+
+def import_students(upload, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Admit students from a CSV or XLSX upload whose header row uses the same
+    field names as the create endpoint (fee_details as a JSON list of fee
+    group ids). Rows are streamed, validated, and written `chunk_size` at a
+    time with bulk inserts in one transaction per chunk. A chunk that fails
+    to save is retried row by row, so one bad row (e.g. for a full hostel
+    room) does not reject its neighbours.
+
+    Returns a report with per-row errors; valid rows are saved even when other
+    rows fail.
+    """
+    name = upload.name.lower()
+    if name.endswith('.csv'):
+        rows = iter_csv_rows(upload)
+    elif name.endswith(('.xlsx', '.xlsm')):
+        rows = iter_xlsx_rows(upload)
+    else:
+        raise serializers.ValidationError({'file': ["Only .csv and .xlsx files are supported."]})
+
+    report = {'total_rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    chunk = []
+    chunk_roll_numbers = set()
+
+    for row_number, data in rows:
+        if not data:
+            continue
+        report['total_rows'] += 1
+
+        prepared, errors = _prepare_row(data)
+        if prepared and prepared[0]['roll_number'] in chunk_roll_numbers:
+            prepared, errors = None, {'roll_number': ["Duplicate roll number in this file."]}
+        if errors:
+            report['errors'].append({'row': row_number, 'roll_number': data.get('roll_number'), 'errors': errors})
+            continue
+
+        chunk.append((row_number, prepared))
+        chunk_roll_numbers.add(prepared[0]['roll_number'])
+        if len(chunk) >= chunk_size:
+            _flush(chunk, report)
+            chunk, chunk_roll_numbers = [], set()
+
+    if chunk:
+        _flush(chunk, report)
+
+    report['failed'] = report['total_rows'] - report['created']
+    return report
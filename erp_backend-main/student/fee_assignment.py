@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from master.models import FeesMaster
+from .models import StudentAdmission, StudentFeesDetail
+
+BULK_BATCH_SIZE = 500
+
+
+def fees_for_groups(fee_group_ids):
+    """
+    Active FeesMaster rows for the given groups, one per (fees_group, fees_type)
+    since a student holds a single fee row per pair. When a pair has several
+    due dates the earliest one is used.
+    """
+    fees = {}
+    queryset = FeesMaster.objects.filter(
+        fees_group_id__in=fee_group_ids,
+        is_active=True,
+        fees_type__is_active=True,
+        fees_group__is_active=True
+    ).order_by('due_date', 'id')
+    for fee in queryset:
+        fees.setdefault((fee.fees_group_id, fee.fees_type_id), fee)
+    return fees
+
+
+def update_fees_total(student_ids):
+    """
+    Recompute StudentAdmission.fees_total_amount for `student_ids` in a single
+    UPDATE ... SET = (SELECT SUM(amount) ...) statement.
+    """
+    total = StudentFeesDetail.objects.filter(
+        student=OuterRef('pk')
+    ).values('student').annotate(total=Sum('amount')).values('total')
+    return StudentAdmission.objects.filter(id__in=student_ids).update(
+        fees_total_amount=Coalesce(
+            Subquery(total), Value(0),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        )
+    )
+
+
+@transaction.atomic
+def assign_fee_groups(student_ids, fee_group_ids):
+    """
+    Make the fee rows of every student in `student_ids` match the active fees of
+    `fee_group_ids`, replacing whatever groups they had before.
+
+    Only the difference is written: missing rows are bulk-created, rows whose
+    amount or due date changed in FeesMaster are bulk-updated (paid, discount
+    and remarks are kept), and rows for groups no longer assigned are removed
+    with one DELETE unless payments were allocated to them. Returns counts of
+    the rows touched.
+    """
+    student_ids = list(student_ids)
+    desired = fees_for_groups(fee_group_ids)
+
+    existing = StudentFeesDetail.objects.filter(student_id__in=student_ids).only(
+        'id', 'student_id', 'fees_group_id', 'fees_type_id', 'amount', 'due_date'
+    )
+    present = set()
+    to_update = []
+    for row in existing:
+        fee = desired.get((row.fees_group_id, row.fees_type_id))
+        if fee is None:
+            continue
+        present.add((row.student_id, row.fees_group_id, row.fees_type_id))
+        if row.amount != fee.amount or row.due_date != fee.due_date:
+            row.amount = fee.amount
+            row.due_date = fee.due_date
+            to_update.append(row)
+
+    to_create = [
+        StudentFeesDetail(
+            student_id=student_id,
+            fees_group_id=fees_group_id,
+            fees_type_id=fees_type_id,
+            amount=fee.amount,
+            due_date=fee.due_date
+        )
+        for student_id in student_ids
+        for (fees_group_id, fees_type_id), fee in desired.items()
+        if (student_id, fees_group_id, fees_type_id) not in present
+    ]
+
+    stale = StudentFeesDetail.objects.filter(student_id__in=student_ids)
+    if desired:
+        keep = Q()
+        for fees_group_id, fees_type_id in desired:
+            keep |= Q(fees_group_id=fees_group_id, fees_type_id=fees_type_id)
+        stale = stale.exclude(keep)
+    # Rows with posted payments stay: the ledger points at them
+    stale = stale.exclude(allocations__isnull=False)
+
+    deleted, _ = stale.delete()
+    StudentFeesDetail.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    StudentFeesDetail.objects.bulk_update(to_update, ['amount', 'due_date'], batch_size=BULK_BATCH_SIZE)
+    update_fees_total(student_ids)
+
+    return {
+        "students": len(student_ids),
+        "created": len(to_create),
+        "updated": len(to_update),
+        "deleted": deleted,
+    }
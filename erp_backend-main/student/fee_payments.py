@@ -0,0 +1,101 @@
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from base.cache import bump_model_versions
+from .models import FeePayment, FeePaymentAllocation, StudentFeesDetail
+
+BULK_BATCH_SIZE = 500
+
+
+def outstanding(row):
+    return row.amount - row.discount - row.paid
+
+
+def allocate(rows, amount):
+    """
+    Split `amount` over `rows` (already in due date order), settling the
+    oldest dues first. Returns [(row, part)] and moves row.paid in memory so
+    a later receipt for the same student sees the new balance.
+    """
+    allocations = []
+    remaining = amount
+    for row in rows:
+        if remaining <= 0:
+            break
+        due = outstanding(row)
+        if due <= 0:
+            continue
+        part = min(due, remaining)
+        row.paid += part
+        remaining -= part
+        allocations.append((row, part))
+    return allocations
+
+
+def _due_order(row):
+    # Rows without a due date are settled last
+    return (row.due_date is None, row.due_date, row.id)
+
+
+@transaction.atomic
+def post_payments(receipts):
+    """
+    Post receipts to the ledger. `receipts` is a list of dicts with student
+    (a StudentAdmission), amount, payment_date, payment_mode, reference and
+    remarks, as validated by FeePaymentSerializer.
+
+    The fee rows of every student involved are locked with one
+    SELECT ... FOR UPDATE (in id order, so concurrent batches cannot
+    deadlock), each receipt is allocated oldest due first, and paid amounts
+    move with a single UPDATE paid = paid + CASE ... so no concurrent write
+    is lost. Raises ValueError({index: message}) and posts nothing if a
+    receipt is larger than the student's outstanding balance.
+    """
+    student_ids = {receipt['student'].pk for receipt in receipts}
+    rows_by_student = {}
+    locked = StudentFeesDetail.objects.select_for_update().filter(student_id__in=student_ids).order_by('id')
+    for row in locked:
+        rows_by_student.setdefault(row.student_id, []).append(row)
+    for rows in rows_by_student.values():
+        rows.sort(key=_due_order)
+
+    errors = {}
+    payments, allocations = [], []
+    for index, receipt in enumerate(receipts):
+        rows = rows_by_student.get(receipt['student'].pk, [])
+        balance = sum((outstanding(row) for row in rows), Decimal('0'))
+        if receipt['amount'] > balance:
+            errors[index] = f"Amount exceeds the outstanding balance of {balance}."
+            continue
+        parts = allocate(rows, receipt['amount'])
+        payments.append(FeePayment(**receipt, balance_after=balance - receipt['amount']))
+        allocations.append(parts)
+    if errors:
+        raise ValueError(errors)
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        FeePayment.objects.bulk_create(payments, batch_size=BULK_BATCH_SIZE)
+    else:
+        # MySQL returns no ids from a bulk insert
+        for payment in payments:
+            payment.save()
+
+    FeePaymentAllocation.objects.bulk_create([
+        FeePaymentAllocation(payment=payment, fee_detail=row, amount=part)
+        for payment, parts in zip(payments, allocations)
+        for row, part in parts
+    ], batch_size=BULK_BATCH_SIZE)
+
+    paid = {}
+    for parts in allocations:
+        for row, part in parts:
+            paid[row.pk] = paid.get(row.pk, Decimal('0')) + part
+    if paid:
+        StudentFeesDetail.objects.filter(pk__in=paid).update(paid=F('paid') + Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in paid.items()],
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        ))
+
+    # bulk_create and update() send no signals
+    bump_model_versions(FeePayment, FeePaymentAllocation, StudentFeesDetail)
+    return payments
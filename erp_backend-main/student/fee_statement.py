@@ -0,0 +1,98 @@
+from decimal import Decimal
+from django.db import connection
+from master.models import FeesMaster
+from .models import StudentFeesDetail
+from .money import to_money
+
+AMOUNT_FIELDS = ['total_amount', 'discount', 'paid', 'balance', 'overdue', 'fine', 'net_payable']
+
+
+def _statement_sql(student_sql):
+    """
+    One grouped pass over the fee rows of the selected students. Each row is
+    joined to its FeesMaster (unique on group, type and due date) and the
+    fine rules are applied row-wise in CASE expressions before summing:
+    rows past `as_of` with a balance owe `percentage` of their amount
+    ('Percentage') or `fix_amount` ('Fix').
+    """
+    detail = StudentFeesDetail._meta
+    master = FeesMaster._meta
+    d = {name: detail.get_field(name).column for name in ('student', 'fees_group', 'fees_type')}
+    m = {name: master.get_field(name).column for name in ('fees_group', 'fees_type')}
+    balance = "(d.amount - d.discount - d.paid)"
+    overdue = f"d.due_date < %s AND {balance} > 0"
+    return f"""
+        SELECT d.{d['student']},
+               SUM(d.amount), SUM(d.discount), SUM(d.paid), SUM({balance}),
+               SUM(CASE WHEN {overdue} THEN {balance} ELSE 0 END),
+               SUM(CASE WHEN {overdue} THEN
+                   CASE fm.fine_type
+                       WHEN 'Percentage' THEN d.amount * COALESCE(fm.percentage, 0) / 100
+                       WHEN 'Fix' THEN COALESCE(fm.fix_amount, 0)
+                       ELSE 0
+                   END
+               ELSE 0 END)
+        FROM {detail.db_table} d
+        LEFT JOIN {master.db_table} fm
+            ON fm.{m['fees_group']} = d.{d['fees_group']}
+            AND fm.{m['fees_type']} = d.{d['fees_type']}
+            AND fm.due_date = d.due_date
+            AND fm.is_active = %s
+        WHERE d.{d['student']} IN ({student_sql})
+        GROUP BY d.{d['student']}
+    """
+
+
+def fee_figures(students, as_of):
+    """
+    {student_id: {total_amount, discount, paid, balance, overdue, fine}} for
+    the students in the `students` queryset, computed by the database in a
+    single aggregate query. Students without fee rows are left out.
+    """
+    student_sql, student_params = students.order_by().values('id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(_statement_sql(student_sql), [as_of, as_of, True, *student_params])
+        rows = cursor.fetchall()
+    return {
+        row[0]: dict(zip(AMOUNT_FIELDS[:-1], (to_money(value) for value in row[1:])))
+        for row in rows
+    }
+
+
+def fee_statement(students, as_of):
+    """
+    Fee statement for every student in `students`: amounts charged, discount,
+    paid, outstanding balance, the overdue part of it, fine on overdue rows
+    and net payable (balance + fine), with totals over the whole set.
+    Two queries regardless of the number of students.
+    """
+    figures = fee_figures(students, as_of)
+    zero = dict.fromkeys(AMOUNT_FIELDS[:-1], Decimal('0.00'))
+    totals = dict.fromkeys(AMOUNT_FIELDS, Decimal('0.00'))
+
+    rows = []
+    details = students.order_by('school_class', 'section', 'roll_number').values(
+        'id', 'roll_number', 'personal__first_name', 'personal__last_name',
+        'school_class__name', 'section__name'
+    )
+    for student in details:
+        amounts = dict(figures.get(student['id'], zero))
+        amounts['net_payable'] = amounts['balance'] + amounts['fine']
+        for field in AMOUNT_FIELDS:
+            totals[field] += amounts[field]
+        name = ' '.join(part for part in (student['personal__first_name'], student['personal__last_name']) if part)
+        rows.append({
+            "student_id": student['id'],
+            "roll_number": student['roll_number'],
+            "student_name": name,
+            "school_class": student['school_class__name'],
+            "section": student['section__name'],
+            **{field: str(amounts[field]) for field in AMOUNT_FIELDS},
+        })
+
+    return {
+        "as_of": as_of.isoformat(),
+        "students": len(rows),
+        "totals": {field: str(value) for field, value in totals.items()},
+        "rows": rows,
+    }
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import F
+from rest_framework import serializers
+from base.cache import bump_model_versions
+from master.hostel_beds import free_bed_numbers
+from master.models import Hostel, HostelBed, HostelRoom
+from .models import StudentAdmission, StudentHostelDetail
+
+
+def move_occupancy(room_id, hostel_id, delta):
+    """Shift the room and hostel occupancy counters by `delta` in place."""
+    HostelRoom.objects.filter(pk=room_id).update(occupied_beds=F('occupied_beds') + delta)
+    Hostel.objects.filter(pk=hostel_id).update(occupied_beds=F('occupied_beds') + delta)
+
+
+def occupancy_changed():
+    # update() sends no signals; refresh cached list counts. The masters
+    # snapshot leaves the bed counters out, so it is kept.
+    bump_model_versions(HostelRoom, Hostel)
+
+
+def _lock(model, pks):
+    # SELECT ... FOR UPDATE in id order, so concurrent callers cannot deadlock
+    return {obj.pk: obj for obj in model.objects.select_for_update().filter(pk__in=pks).order_by('pk')}
+
+
+def vacate_bed(bed):
+    HostelBed.objects.filter(pk=bed.pk).update(is_occupied=False)
+    move_occupancy(bed.room_id, bed.room.hostel_id, -1)
+
+
+@transaction.atomic
+def allocate_bed(student, room, bed_number=None):
+    """
+    Give `student` a bed in `room` (bed `bed_number`, or the lowest free
+    one), moving them out of any bed they hold now. The student row and the
+    rooms involved are locked with SELECT ... FOR UPDATE, rooms in id order,
+    so concurrent allocations to the same room queue up instead of both
+    seeing the last free bed. Returns the StudentHostelDetail.
+    """
+    _lock(StudentAdmission, [student.pk])
+    detail = StudentHostelDetail.objects.select_related('bed__room').filter(student=student).first()
+    current = detail.bed if detail else None
+
+    room_ids = {room.pk} | ({current.room_id} if current else set())
+    room = _lock(HostelRoom, room_ids)[room.pk]
+
+    if current and current.room_id == room.pk and bed_number in (None, current.bed_number):
+        return detail
+    if not room.is_active:
+        raise serializers.ValidationError({'hostel_room': ["This room is not active."]})
+
+    free = free_bed_numbers(room)
+    if bed_number is None:
+        if not free:
+            raise serializers.ValidationError({'hostel_room': [f"Room {room.room_no} has no free bed."]})
+        bed_number = free[0]
+    elif bed_number not in free:
+        if not 1 <= bed_number <= room.number_of_beds:
+            raise serializers.ValidationError({'bed_number': [f"Room {room.room_no} has beds 1 to {room.number_of_beds}."]})
+        raise serializers.ValidationError({'bed_number': [f"Bed {bed_number} in room {room.room_no} is taken."]})
+
+    if current:
+        vacate_bed(current)
+    bed, _ = HostelBed.objects.get_or_create(room=room, bed_number=bed_number)
+    bed.is_occupied = True
+    bed.save(update_fields=['is_occupied'])
+    move_occupancy(room.pk, room.hostel_id, 1)
+
+    detail, _ = StudentHostelDetail.objects.update_or_create(student=student, defaults={
+        'hostel_id': room.hostel_id,
+        'hostel_room': room,
+        'bed': bed,
+        'bed_number': str(bed_number),
+        'cost_per_bed': room.cost_per_bed,
+    })
+    occupancy_changed()
+    return detail
+
+
+@transaction.atomic
+def release_bed(student):
+    """Free the bed `student` holds. Returns False if they hold none."""
+    _lock(StudentAdmission, [student.pk])
+    detail = StudentHostelDetail.objects.select_related('bed__room').filter(student=student).first()
+    if detail is None or detail.bed is None:
+        return False
+
+    _lock(HostelRoom, [detail.bed.room_id])
+    vacate_bed(detail.bed)
+    StudentHostelDetail.objects.filter(pk=detail.pk).update(hostel=None, hostel_room=None, bed=None, bed_number=None)
+    occupancy_changed()
+    return True
+
+
+@transaction.atomic
+def assign_hostel(student, hostel):
+    """
+    Put `student` in `hostel` without choosing a room yet. A bed they hold
+    in another hostel is released first, so no counter keeps it.
+    """
+    _lock(StudentAdmission, [student.pk])
+    detail = StudentHostelDetail.objects.select_related('bed__room').filter(student=student).first()
+    if detail and detail.bed and detail.bed.room.hostel_id != hostel.pk:
+        release_bed(student)
+    StudentHostelDetail.objects.update_or_create(student=student, defaults={'hostel': hostel})
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from student.models import StudentAdmission
+from student.search import refresh_search_index
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Rebuild the student search index, e.g. after rows were changed outside the ORM."
+
+    def handle(self, *args, **options):
+        ids = list(StudentAdmission.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(ids), BATCH_SIZE):
+            refresh_search_index(ids[start:start + BATCH_SIZE])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(ids)} students."))
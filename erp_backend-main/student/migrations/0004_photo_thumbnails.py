@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0003_studentadmission_fees_total_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentguardiandetail',
+            name='guardian_photo_thumbnail',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentparentdetail',
+            name='father_photo_thumbnail',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentparentdetail',
+            name='mother_photo_thumbnail',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentpersonaldetail',
+            name='student_photo_thumbnail',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
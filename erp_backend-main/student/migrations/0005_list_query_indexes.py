@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0003_list_query_indexes'),
+        ('student', '0004_photo_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['is_active', 'id'], name='student_hou_is_acti_6f5c01_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentadmission',
+            index=models.Index(fields=['admission_date', 'id'], name='student_stu_admissi_5bd876_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentadmission',
+            index=models.Index(fields=['school_class', 'section'], name='student_stu_school__e512ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentfeesdetail',
+            index=models.Index(fields=['due_date', 'student'], name='student_stu_due_dat_4054cc_idx'),
+        ),
+    ]
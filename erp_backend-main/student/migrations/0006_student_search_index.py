@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:21
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+INDEX_TABLE = 'student_studentsearchindex'
+FTS_TABLE = 'student_search_fts'
+MYSQL_FULLTEXT_INDEX = 'student_search_ft'
+
+SQLITE_FORWARD = [
+    # External-content FTS5 table kept in sync with the index table by triggers
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"document, content='{INDEX_TABLE}', content_rowid='student_id', tokenize='trigram')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.student_id, new.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.student_id, old.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.student_id, old.document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.student_id, new.document); END",
+]
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+MYSQL_FORWARD = [
+    f"ALTER TABLE {INDEX_TABLE} ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (document) WITH PARSER ngram",
+]
+MYSQL_REVERSE = [
+    f"ALTER TABLE {INDEX_TABLE} DROP INDEX {MYSQL_FULLTEXT_INDEX}",
+]
+
+
+def run_for_vendor(sqlite_statements, mysql_statements):
+    def run(apps, schema_editor):
+        statements = {
+            'sqlite': sqlite_statements,
+            'mysql': mysql_statements,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+# Frozen copy of student.search.DOCUMENT_FIELDS as of this migration; later
+# changes to the live search code must not alter what it backfills
+DOCUMENT_FIELDS = [
+    'roll_number',
+    'personal__first_name', 'personal__last_name',
+    'personal__mobile_number', 'personal__email',
+    'parents__father_name', 'parents__father_phone',
+    'parents__mother_name', 'parents__mother_phone',
+    'guardian__guardian_name', 'guardian__guardian_phone',
+]
+
+
+# Students read and index rows inserted per round trip by the backfill
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill(apps, schema_editor):
+    """Index existing students one batch at a time, never the whole table at once."""
+    StudentAdmission = apps.get_model('student', 'StudentAdmission')
+    StudentSearchIndex = apps.get_model('student', 'StudentSearchIndex')
+    rows = (
+        StudentSearchIndex(student_id=row[0], document=' '.join(str(value) for value in row[1:] if value))
+        for row in StudentAdmission.objects.values_list('id', *DOCUMENT_FIELDS).iterator(chunk_size=BACKFILL_BATCH_SIZE)
+    )
+    while batch := list(islice(rows, BACKFILL_BATCH_SIZE)):
+        StudentSearchIndex.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0005_list_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchIndex',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='student.studentadmission')),
+                ('document', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(
+            run_for_vendor(SQLITE_FORWARD, MYSQL_FORWARD),
+            run_for_vendor(SQLITE_REVERSE, MYSQL_REVERSE),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+def rename_duplicate_houses(apps, schema_editor):
+    """
+    Keep the oldest house of each duplicated name and rename the others to
+    "<name> (<id>)", so the constraint below can be added.
+    """
+    House = apps.get_model('student', 'House')
+    max_length = House._meta.get_field('name').max_length
+    names = House.objects.values('name').annotate(rows=models.Count('id')).filter(rows__gt=1).order_by()
+    for row in names:
+        for house in House.objects.filter(name=row['name']).order_by('id')[1:]:
+            suffix = f" ({house.id})"
+            house.name = house.name[:max_length - len(suffix)] + suffix
+            house.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0006_student_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_houses, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='house',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_house_name'),
+        ),
+    ]
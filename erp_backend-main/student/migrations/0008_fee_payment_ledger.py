@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:39
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0007_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeePayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_date', models.DateField(default=datetime.date.today)),
+                ('payment_mode', models.CharField(choices=[('Cash', 'Cash'), ('Cheque', 'Cheque'), ('Card', 'Card'), ('Online', 'Online'), ('Bank Transfer', 'Bank Transfer')], default='Cash', max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('balance_after', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='fee_payments', to='student.studentadmission')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeePaymentAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fee_detail', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='student.studentfeesdetail')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='student.feepayment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['student', 'payment_date'], name='student_fee_student_36b132_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feepayment',
+            index=models.Index(fields=['payment_date', 'id'], name='student_fee_payment_49a4e3_idx'),
+        ),
+    ]
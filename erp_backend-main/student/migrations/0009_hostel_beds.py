@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_existing_beds(apps, schema_editor):
+    """
+    Give every student already placed in a room a bed row: their recorded
+    bed_number when it is a free bed of the room, else the lowest free bed
+    (students beyond the room's capacity keep no bed). Then set the room and
+    hostel occupancy counters from the beds taken.
+    """
+    StudentHostelDetail = apps.get_model('student', 'StudentHostelDetail')
+    HostelBed = apps.get_model('master', 'HostelBed')
+    HostelRoom = apps.get_model('master', 'HostelRoom')
+    Hostel = apps.get_model('master', 'Hostel')
+
+    details = StudentHostelDetail.objects.filter(hostel_room__isnull=False).select_related('hostel_room').order_by('hostel_room', 'id')
+    by_room = {}
+    for detail in details:
+        by_room.setdefault(detail.hostel_room_id, []).append(detail)
+
+    for details in by_room.values():
+        room = details[0].hostel_room
+        free = set(range(1, room.number_of_beds + 1))
+        wanted = {}
+        for detail in details:
+            number = str(detail.bed_number or '').strip()
+            if number.isdigit() and int(number) in free:
+                wanted[detail.pk] = int(number)
+                free.discard(int(number))
+        for detail in details:
+            number = wanted.get(detail.pk)
+            if number is None:
+                if not free:
+                    continue
+                number = min(free)
+                free.discard(number)
+            detail.bed = HostelBed.objects.create(room=room, bed_number=number, is_occupied=True)
+            detail.bed_number = str(number)
+            detail.hostel_id = room.hostel_id
+            detail.save(update_fields=['bed', 'bed_number', 'hostel'])
+
+    for room in HostelRoom.objects.all():
+        room.occupied_beds = HostelBed.objects.filter(room=room, is_occupied=True).count()
+        room.save(update_fields=['occupied_beds'])
+    for hostel in Hostel.objects.all():
+        hostel.occupied_beds = HostelBed.objects.filter(room__hostel=hostel, is_occupied=True).count()
+        hostel.save(update_fields=['occupied_beds'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_hostel_beds'),
+        ('student', '0008_fee_payment_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studenthosteldetail',
+            name='bed',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occupant', to='master.hostelbed'),
+        ),
+        migrations.RunPython(assign_existing_beds, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,7 @@ from django.core.validators import FileExtensionValidator
 from datetime import date
 from master.models import (
     SchoolClass, Section, CasteCategory, SchoolSession,
-    Route, PickupPoint, Hostel, HostelRoom, FeesGroup, FeesTypeMaster,
+    Route, PickupPoint, Hostel, HostelRoom, HostelBed, FeesGroup, FeesTypeMaster,
     Vehicle, RoutePickupPoint
 
 )
@@ -27,6 +27,14 @@ class House(models.Model):
 
     def __str__(self):
         return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_house_name'),
+        ]
     
 # ---------------------
 # Main Student Model
@@ -43,6 +51,12 @@ class StudentAdmission(models.Model):
     def __str__(self):
         return f"{self.roll_number}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['admission_date', 'id']),
+            models.Index(fields=['school_class', 'section']),
+        ]
+
 # ---------------------
 # Personal Details
 # ---------------------
@@ -57,6 +71,7 @@ class StudentPersonalDetail(models.Model):
     mobile_number = models.CharField(max_length=15, null=True, blank=True)
     email = models.EmailField(null=True, blank=True)
     student_photo = models.CharField(max_length=100, blank=True, null=True)
+    student_photo_thumbnail = models.CharField(max_length=100, blank=True, null=True)
 
 # ---------------------
 # Physical Details
@@ -85,6 +100,8 @@ class StudentHostelDetail(models.Model):
     student = models.OneToOneField(StudentAdmission, on_delete=models.CASCADE, related_name='hostel')
     hostel = models.ForeignKey(Hostel, on_delete=models.SET_NULL, null=True, blank=True)
     hostel_room = models.ForeignKey(HostelRoom, on_delete=models.SET_NULL, null=True, blank=True)
+    # Set through student.hostel_allocation, which keeps the occupancy counters
+    bed = models.OneToOneField(HostelBed, on_delete=models.SET_NULL, null=True, blank=True, related_name='occupant')
     bed_number = models.CharField(max_length=10, blank=True, null=True)
     allocation_date = models.DateField(auto_now_add=True)
     cost_per_bed = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
@@ -104,11 +121,65 @@ class StudentFeesDetail(models.Model):
 
     class Meta:
         unique_together = ('student', 'fees_group', 'fees_type')
+        indexes = [
+            models.Index(fields=['due_date', 'student']),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.fees_group.name} - {self.fees_type.name}"
 
 
+# ---------------------
+# Fee Payments
+# ---------------------
+PAYMENT_MODE_CHOICES = [('Cash', 'Cash'), ('Cheque', 'Cheque'), ('Card', 'Card'),
+                        ('Online', 'Online'), ('Bank Transfer', 'Bank Transfer')]
+
+
+class FeePayment(models.Model):
+    """
+    One receipt in the fee ledger. Receipts are append-only: they are never
+    edited or deleted, and StudentFeesDetail.paid is only moved by posting
+    them (see student.fee_payments).
+    """
+    student = models.ForeignKey(StudentAdmission, on_delete=models.PROTECT, related_name='fee_payments')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_date = models.DateField(default=date.today)
+    payment_mode = models.CharField(max_length=20, choices=PAYMENT_MODE_CHOICES, default='Cash')
+    reference = models.CharField(max_length=100, blank=True, null=True)
+    remarks = models.TextField(blank=True, null=True)
+    # Student's outstanding balance right after this receipt was applied
+    balance_after = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'payment_date']),
+            models.Index(fields=['payment_date', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.amount} on {self.payment_date}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Fee payments are append-only and cannot be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Fee payments are append-only and cannot be deleted.")
+
+
+class FeePaymentAllocation(models.Model):
+    """Part of a receipt applied to one fee row."""
+    payment = models.ForeignKey(FeePayment, on_delete=models.PROTECT, related_name='allocations')
+    fee_detail = models.ForeignKey(StudentFeesDetail, on_delete=models.PROTECT, related_name='allocations')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.payment_id} -> {self.fee_detail_id}: {self.amount}"
+
+
 # ---------------------
 # Parent Details
 # ---------------------
@@ -118,11 +189,13 @@ class StudentParentDetail(models.Model):
     father_phone = models.CharField(max_length=15, null=True, blank=True)
     father_occupation = models.CharField(max_length=100, null=True, blank=True)
     father_photo = models.CharField(max_length=100, blank=True, null=True)
+    father_photo_thumbnail = models.CharField(max_length=100, blank=True, null=True)
 
     mother_name = models.CharField(max_length=100, null=True, blank=True)
     mother_phone = models.CharField(max_length=15, null=True, blank=True)
     mother_occupation = models.CharField(max_length=100, null=True, blank=True)
     mother_photo = models.CharField(max_length=100, blank=True, null=True)
+    mother_photo_thumbnail = models.CharField(max_length=100, blank=True, null=True)
 
 # ---------------------
 # Guardian Detail
@@ -136,6 +209,7 @@ class StudentGuardianDetail(models.Model):
     guardian_occupation = models.CharField(max_length=100, null=True, blank=True)
     guardian_email = models.EmailField(null=True, blank=True)
     guardian_photo = models.CharField(max_length=100, blank=True, null=True)
+    guardian_photo_thumbnail = models.CharField(max_length=100, blank=True, null=True)
     guardian_address = models.TextField(null=True, blank=True)
 
 # ---------------------
@@ -179,3 +253,17 @@ class StudentDocument(models.Model):
 
     def __str__(self):
         return f"{self.title} - {self.student.roll_number}"
+
+
+# ---------------------
+# Search Index
+# ---------------------
+class StudentSearchIndex(models.Model):
+    """
+    One row per student holding the text front-desk staff search by (roll
+    number, student and parent names, phone numbers). It backs a SQLite FTS5
+    table locally and a MySQL FULLTEXT ngram index in production; see
+    student/search.py.
+    """
+    student = models.OneToOneField(StudentAdmission, on_delete=models.CASCADE, primary_key=True, related_name='search_index')
+    document = models.TextField()
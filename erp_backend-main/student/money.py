@@ -0,0 +1,9 @@
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+
+def to_money(value):
+    """An aggregated amount as a Decimal rounded to cents (None is 0)."""
+    # SQLite sums decimals as floats; MySQL returns Decimal
+    return Decimal(str(value or 0)).quantize(CENT)
@@ -0,0 +1,105 @@
+import re
+from django.db import connection
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+from .models import StudentAdmission, StudentSearchIndex
+
+FTS_TABLE = 'student_search_fts'
+MYSQL_FULLTEXT_INDEX = 'student_search_ft'
+
+BULK_BATCH_SIZE = 500
+
+# Columns copied into StudentSearchIndex.document
+DOCUMENT_FIELDS = [
+    'roll_number',
+    'personal__first_name', 'personal__last_name',
+    'personal__mobile_number', 'personal__email',
+    'parents__father_name', 'parents__father_phone',
+    'parents__mother_name', 'parents__mother_phone',
+    'guardian__guardian_name', 'guardian__guardian_phone',
+]
+
+
+def build_documents(student_ids=None):
+    """Yield (student_id, document) using one joined query."""
+    queryset = StudentAdmission.objects.all()
+    if student_ids is not None:
+        queryset = queryset.filter(id__in=student_ids)
+    for row in queryset.values_list('id', *DOCUMENT_FIELDS).iterator(chunk_size=2000):
+        yield row[0], ' '.join(str(value) for value in row[1:] if value)
+
+
+def refresh_search_index(student_ids):
+    """Rebuild the search rows of `student_ids` (delete + bulk insert)."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    rows = [
+        StudentSearchIndex(student_id=student_id, document=document)
+        for student_id, document in build_documents(student_ids)
+    ]
+    StudentSearchIndex.objects.filter(student_id__in=student_ids).delete()
+    StudentSearchIndex.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+
+def _terms(search_text):
+    return [term for term in re.split(r'\s+', search_text.strip()) if term]
+
+
+class Match(Func):
+    """MySQL relevance of a FULLTEXT column for a boolean-mode query (0 = no match)."""
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        document, query = self.get_source_expressions()
+        document_sql, document_params = compiler.compile(document)
+        query_sql, query_params = compiler.compile(query)
+        return f"MATCH({document_sql}) AGAINST ({query_sql} IN BOOLEAN MODE)", (*document_params, *query_params)
+
+
+def _search_sqlite(queryset, terms):
+    # The trigram tokenizer matches substrings of 3+ characters, so partial
+    # names and phone numbers hit the index; every term must match. FTS5's
+    # rank is lower for better matches.
+    query = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    student_id = f"{connection.ops.quote_name(StudentAdmission._meta.db_table)}.{connection.ops.quote_name('id')}"
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+    ).annotate(search_rank=RawSQL(
+        f"SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {student_id}", [query],
+        output_field=FloatField()
+    ))
+
+
+def _search_mysql(queryset, terms):
+    # ngram parser: quoted terms are matched as n-gram phrases, '+' makes each
+    # required. Relevance is negated so that lower ranks sort first everywhere.
+    query = ' '.join('+"{}"'.format(term.replace('"', ' ')) for term in terms)
+    return queryset.alias(
+        relevance=Match(F('search_index__document'), Value(query))
+    ).filter(relevance__gt=0).annotate(search_rank=-F('relevance'))
+
+
+def _search_scan(queryset, terms):
+    # Short terms (below the n-gram size) and other databases: one scan of the
+    # narrow index table instead of an OR across the detail tables.
+    for term in terms:
+        queryset = queryset.filter(search_index__document__icontains=term)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_students(queryset, search_text):
+    """
+    Restrict `queryset` to students matching every term of `search_text`,
+    annotated with `search_rank` (lower = better match) for ordering. The
+    match and the rank are part of the list query, so counts and pages
+    cover every match.
+    """
+    terms = _terms(search_text)
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    if connection.vendor == 'sqlite' and min(len(term) for term in terms) >= 3:
+        return _search_sqlite(queryset, terms)
+    if connection.vendor == 'mysql' and min(len(term) for term in terms) >= 2:
+        return _search_mysql(queryset, terms)
+    return _search_scan(queryset, terms)
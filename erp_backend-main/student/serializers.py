@@ -1,32 +1,28 @@
 import json
-from collections import defaultdict
 from rest_framework import serializers
+from base.serializers import UniqueConstraintMixin
 from .models import (
     House, StudentAdmission, StudentPersonalDetail, StudentPhysicalDetail,
     StudentTransportDetail, StudentHostelDetail, StudentFeesDetail,
     StudentParentDetail, StudentGuardianDetail, StudentAddressDetail,
-    StudentBankDetail, StudentDocument
+    StudentBankDetail, StudentDocument, FeePayment, FeePaymentAllocation
 )
+from .fee_assignment import assign_fee_groups
+from .hostel_allocation import allocate_bed, assign_hostel
+from .transport_assignment import assign_transport
 from master.models import (
-    Route, RoutePickupPoint, Hostel, HostelRoom, FeesMaster,
+    Route, RoutePickupPoint, Hostel, HostelRoom,
     Vehicle
 )
 
 
-class HouseSerializer(serializers.ModelSerializer):
+class HouseSerializer(UniqueConstraintMixin, serializers.ModelSerializer):
+    unique_error_messages = {'name': "House with name '{name}' already exists."}
+
     class Meta:
         model = House
         fields = ['id', 'name', 'is_active']
 
-    def validate_name(self, value):
-        instance = getattr(self, 'instance', None)
-        qs = House.objects.filter(name=value)
-        if instance:
-            qs = qs.exclude(pk=instance.pk)
-        if qs.exists():
-            raise serializers.ValidationError(f"House with name '{value}' already exists.")
-        return value
-
 
 class StudentPersonalDetailSerializer(serializers.ModelSerializer):
     class Meta:
@@ -94,6 +90,72 @@ class StudentFeesDetailNestedSerializer(serializers.ModelSerializer):
         exclude = ['student']
 
 
+class FeePaymentAllocationSerializer(serializers.ModelSerializer):
+    fees_group = serializers.CharField(source='fee_detail.fees_group.name', read_only=True)
+    fees_type = serializers.CharField(source='fee_detail.fees_type.name', read_only=True)
+
+    class Meta:
+        model = FeePaymentAllocation
+        fields = ['fee_detail', 'fees_group', 'fees_type', 'amount']
+
+
+class FeePaymentSerializer(serializers.ModelSerializer):
+    """
+    Receipts are posted through student.fee_payments.post_payments, which
+    allocates them to fee rows; this serializer only validates and renders.
+    """
+    allocations = FeePaymentAllocationSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = FeePayment
+        fields = [
+            'id', 'student', 'amount', 'payment_date', 'payment_mode', 'reference', 'remarks',
+            'balance_after', 'created_at', 'allocations'
+        ]
+        read_only_fields = ['balance_after', 'created_at']
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+
+# One-to-one detail tables written on admission, keyed by related_name
+STUDENT_DETAIL_MODELS = {
+    'personal': StudentPersonalDetail,
+    'physical': StudentPhysicalDetail,
+    'transport': StudentTransportDetail,
+    'hostel': StudentHostelDetail,
+    'parents': StudentParentDetail,
+    'guardian': StudentGuardianDetail,
+    'address': StudentAddressDetail,
+    'bank': StudentBankDetail,
+}
+
+# Flattened output field -> relations it is read from, so a sparse fieldset
+# only joins the detail tables it shows (see BaseViewSet.field_relations)
+STUDENT_FIELD_RELATIONS = {
+    **{
+        field.name: [related_name]
+        for related_name, model in STUDENT_DETAIL_MODELS.items()
+        for field in model._meta.concrete_fields
+        if field.name not in ('id', 'student')
+    },
+    'school_class_name': ['school_class'],
+    'section_name': ['section'],
+    'house_name': ['physical__house'],
+    'vehicle_name': ['transport__vehicle'],
+    'route_name': ['transport__pickup_point__route'],
+    'route_id': ['transport__pickup_point__route'],
+    'pickup_point_name': ['transport__pickup_point__route', 'transport__pickup_point__pickup_point'],
+    'hostel_name': ['hostel__hostel'],
+    'hostel_room_no': ['hostel__hostel_room'],
+    'hostel_room_type': ['hostel__hostel_room__room_type'],
+    'fee_details': ['fee_details'],
+    'documents': ['documents'],
+}
+
+
 class FlatStudentSerializer(serializers.ModelSerializer):
     # Personal
     first_name = serializers.CharField(write_only=True)
@@ -188,49 +250,65 @@ class FlatStudentSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        # Sparse fieldset from BaseViewSet.get_serializer; None means all fields
+        fields = self.context.get('fields')
+
+        def wanted(related_name):
+            return fields is None or any(
+                related_name in STUDENT_FIELD_RELATIONS.get(field, ()) for field in fields
+            )
 
         # Flatten related one-to-one objects
         def flatten(obj, serializer_class):
             return serializer_class(obj).data if obj else {}
 
         related_serializers = [
-            (getattr(instance, 'personal', None), StudentPersonalDetailSerializer),
-            (getattr(instance, 'physical', None), StudentPhysicalDetailSerializer),
-            (getattr(instance, 'transport', None), StudentTransportDetailSerializer),
-            (getattr(instance, 'hostel', None), StudentHostelDetailSerializer),
-            (getattr(instance, 'parents', None), StudentParentDetailSerializer),
-            (getattr(instance, 'guardian', None), StudentGuardianDetailSerializer),
-            (getattr(instance, 'address', None), StudentAddressDetailSerializer),
-            (getattr(instance, 'bank', None), StudentBankDetailSerializer),
+            ('personal', StudentPersonalDetailSerializer),
+            ('physical', StudentPhysicalDetailSerializer),
+            ('transport', StudentTransportDetailSerializer),
+            ('hostel', StudentHostelDetailSerializer),
+            ('parents', StudentParentDetailSerializer),
+            ('guardian', StudentGuardianDetailSerializer),
+            ('address', StudentAddressDetailSerializer),
+            ('bank', StudentBankDetailSerializer),
         ]
 
-        for obj, serializer in related_serializers:
-            flat_data = flatten(obj, serializer)
-            data.update(flat_data)
+        # Relations outside the fieldset are not loaded, so they are skipped
+        for related_name, serializer in related_serializers:
+            if wanted(related_name):
+                flat_data = flatten(getattr(instance, related_name, None), serializer)
+                data.update(flat_data)
 
         # For related_name='fee_details' and 'documents'
-        data['fee_details'] = StudentFeesDetailNestedSerializer(instance.fee_details.all(), many=True).data
-        data['documents'] = StudentDocumentSerializer(instance.documents.all(), many=True).data
+        if wanted('fee_details'):
+            data['fee_details'] = StudentFeesDetailNestedSerializer(instance.fee_details.all(), many=True).data
+        if wanted('documents'):
+            data['documents'] = StudentDocumentSerializer(instance.documents.all(), many=True).data
 
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
         return data
 
+    def _get_route(self, obj):
+        # Walks the select_related chain instead of querying RoutePickupPoint
+        transport = getattr(obj, 'transport', None)
+        pickup_point = transport.pickup_point if transport else None
+        return pickup_point.route if pickup_point else None
+
     def get_route_name(self, obj):
-        if obj.transport and obj.transport.pickup_point_id:
-            pickup_obj = RoutePickupPoint.objects.filter(id=obj.transport.pickup_point_id).first()
-            if pickup_obj:
-                return pickup_obj.route.title if pickup_obj.route else None
-            return None
-        return None
+        route = self._get_route(obj)
+        return route.title if route else None
     
     def get_route_id(self, obj):
-        if obj.transport and obj.transport.pickup_point_id:
-            pickup_obj = RoutePickupPoint.objects.filter(id=obj.transport.pickup_point_id).first()
-            if pickup_obj:
-                return pickup_obj.route.id if pickup_obj.route else None
-            return None
-        return None
+        route = self._get_route(obj)
+        return route.id if route else None
     
-    def create(self, validated_data):
+    def pop_related_data(self, validated_data):
+        """
+        Split the flat payload into kwargs for each detail table, keyed like
+        STUDENT_DETAIL_MODELS. `validated_data` is left holding only
+        StudentAdmission fields. Returns (related, fee_group_ids, documents).
+        """
         # Extract and remove related data
         personal_data = {field: validated_data.pop(field, '') for field in [
             'first_name', 'last_name', 'gender', 'date_of_birth', 'religion', 'caste',
@@ -291,48 +369,37 @@ class FlatStudentSerializer(serializers.ModelSerializer):
         
         documents = validated_data.pop('documents', [])
 
+        related = {
+            'personal': personal_data,
+            'physical': physical_data,
+            'transport': {'vehicle': vehicle, 'pickup_point': pickup_point},
+            'hostel': {'hostel': hostel, 'hostel_room': hostel_room},
+            'parents': parent_data,
+            'guardian': guardian_data,
+            'address': address_data,
+            'bank': bank_data,
+        }
+        return related, fee_group_ids, documents
+
+    def create(self, validated_data):
+        related, fee_group_ids, documents = self.pop_related_data(validated_data)
+
         # Create main student record
         student = StudentAdmission.objects.create(**validated_data)
         
-        # Create related records (only once)
-        StudentPersonalDetail.objects.create(student=student, **personal_data)
-        StudentPhysicalDetail.objects.create(student=student, **physical_data)
-        StudentTransportDetail.objects.create(student=student, vehicle=vehicle, pickup_point=pickup_point)
-        StudentHostelDetail.objects.create(student=student, hostel=hostel, hostel_room=hostel_room)
-        StudentParentDetail.objects.create(student=student, **parent_data)
-        StudentGuardianDetail.objects.create(student=student, **guardian_data)
-        StudentAddressDetail.objects.create(student=student, **address_data)
-        StudentBankDetail.objects.create(student=student, **bank_data)
+        # Create related records (only once); bed and seat are taken separately
+        hostel_room = related['hostel'].pop('hostel_room')
+        transport = related.pop('transport')
+        for related_name, model in STUDENT_DETAIL_MODELS.items():
+            if related_name in related:
+                model.objects.create(student=student, **related[related_name])
+        assign_transport(student, **transport)
+        if hostel_room is not None:
+            allocate_bed(student, hostel_room)
 
         if fee_group_ids:
-            # Fetch and group FeesMaster entries
-            fees_masters = FeesMaster.objects.filter(
-                fees_group_id__in=fee_group_ids,
-                is_active=True,
-                fees_type__is_active=True,
-                fees_group__is_active=True
-            ).select_related("fees_group", "fees_type")
-
-            grouped = defaultdict(list)
-
-            for fee in fees_masters:
-                grouped[fee.fees_group.id].append(fee)
-
-            # Save StudentFeesDetail grouped under each group/fee_type
-            fees_total_amount = []
-            for group_id, fee_list in grouped.items():
-                for fee in fee_list:
-                    StudentFeesDetail.objects.create(
-                        student=student,
-                        fees_group=fee.fees_group,
-                        fees_type=fee.fees_type,
-                        amount=fee.amount,
-                        due_date=fee.due_date
-                    )
-                    fees_total_amount.append(fee.amount)
-
-            student.fees_total_amount = sum(fees_total_amount)
-            student.save()
+            assign_fee_groups([student.pk], fee_group_ids)
+            student.refresh_from_db(fields=['fees_total_amount'])
 
         for doc in documents:
             if doc.get('document'):  # Prevent empty file records
@@ -423,10 +490,12 @@ class FlatStudentPartialUpdateSerializer(FlatStudentSerializer):
             StudentPhysicalDetail.objects.update_or_create(student=instance, defaults={k: v for k, v in physical_data.items() if v is not None})
         
         if vehicle is not None or pickup_point is not None:
-            StudentTransportDetail.objects.update_or_create(student=instance, defaults={'vehicle': vehicle, 'pickup_point': pickup_point})
+            assign_transport(instance, vehicle=vehicle, pickup_point=pickup_point)
         
-        if hostel is not None or hostel_room is not None:
-            StudentHostelDetail.objects.update_or_create(student=instance, defaults={'hostel': hostel, 'hostel_room': hostel_room})
+        if hostel_room is not None:
+            allocate_bed(instance, hostel_room)
+        elif hostel is not None:
+            assign_hostel(instance, hostel)
         
         if any(value is not None for value in parent_data.values()):
             StudentParentDetail.objects.update_or_create(student=instance, defaults={k: v for k, v in parent_data.items() if v is not None})
@@ -441,32 +510,8 @@ class FlatStudentPartialUpdateSerializer(FlatStudentSerializer):
             StudentBankDetail.objects.update_or_create(student=instance, defaults={k: v for k, v in bank_data.items() if v is not None})
 
         if fee_group_ids:
-            StudentFeesDetail.objects.filter(student=instance).delete()
-            fees_masters = FeesMaster.objects.filter(
-                fees_group_id__in=fee_group_ids,
-                is_active=True,
-                fees_type__is_active=True,
-                fees_group__is_active=True
-            ).select_related("fees_group", "fees_type")
-
-            grouped = defaultdict(list)
-            for fee in fees_masters:
-                grouped[fee.fees_group.id].append(fee)
-
-            fees_total_amount = []
-            for group_id, fee_list in grouped.items():
-                for fee in fee_list:
-                    StudentFeesDetail.objects.create(
-                        student=instance,
-                        fees_group=fee.fees_group,
-                        fees_type=fee.fees_type,
-                        amount=fee.amount,
-                        due_date=fee.due_date
-                    )
-                    fees_total_amount.append(fee.amount)
-
-            instance.fees_total_amount = sum(fees_total_amount)
-            instance.save()
+            assign_fee_groups([instance.pk], fee_group_ids)
+            instance.refresh_from_db(fields=['fees_total_amount'])
 
         if documents:
             StudentDocument.objects.filter(student=instance).delete()
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from .models import StudentAdmission, StudentHostelDetail, StudentTransportDetail, StudentPersonalDetail, StudentParentDetail, StudentGuardianDetail
+from .search import refresh_search_index
+from .hostel_allocation import occupancy_changed, vacate_bed
+from .transport_assignment import seat_deltas, shift_seats
+
+# Detail models whose columns feed the search document. Deletes need no hook:
+# these rows only go away with the student, which cascades to the index.
+SEARCH_DETAIL_MODELS = [StudentPersonalDetail, StudentParentDetail, StudentGuardianDetail]
+
+
+def reindex_student(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_index([instance.pk])
+
+
+def reindex_student_detail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_index([instance.student_id])
+
+
+def release_deleted_bed(sender, instance, **kwargs):
+    # A student's hostel detail goes with the student; give their bed back
+    if instance.bed_id is not None:
+        vacate_bed(instance.bed)
+        occupancy_changed()
+
+
+def release_deleted_seat(sender, instance, **kwargs):
+    # Likewise for the vehicle and route seat counters
+    route_id = instance.pickup_point.route_id if instance.pickup_point_id else None
+    shift_seats(*seat_deltas([((instance.vehicle_id, route_id), (None, None))]))
+
+
+post_save.connect(reindex_student, sender=StudentAdmission, dispatch_uid="student-search-admission")
+for model in SEARCH_DETAIL_MODELS:
+    post_save.connect(reindex_student_detail, sender=model, dispatch_uid=f"student-search-{model._meta.label}")
+post_delete.connect(release_deleted_bed, sender=StudentHostelDetail, dispatch_uid="student-hostel-release-bed")
+post_delete.connect(release_deleted_seat, sender=StudentTransportDetail, dispatch_uid="student-transport-release-seat")
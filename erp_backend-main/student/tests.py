@@ -1,3 +1,692 @@
+import importlib
+import io
+from datetime import date, time
+from unittest import mock
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from authuser.models import CustomUser
+from master.models import (
+    SchoolClass, Section, FeesGroup, FeesTypeMaster, FeesMaster, Route, Vehicle,
+    PickupPoint, RoutePickupPoint, RouteVehicle, RoomType, Hostel, HostelRoom, HostelBed
+)
+from .models import (
+    House, StudentAdmission, StudentPersonalDetail, StudentPhysicalDetail,
+    StudentTransportDetail, StudentHostelDetail, StudentFeesDetail,
+    StudentParentDetail, StudentGuardianDetail, StudentAddressDetail,
+    StudentBankDetail, StudentDocument, StudentSearchIndex, FeePayment
+)
 
-# Create your tests here.
+
+class StudentTestCase(TestCase):
+    """Masters every student test needs, and a helper admitting a full student."""
+
+    def setUp(self):
+        # List counts are cached per table version; start every test cold
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('admin@example.com', 'secret'))
+
+        self.school_class = SchoolClass.objects.create(name='Class 1', is_active=True)
+        self.section = Section.objects.create(name='A', class_id=self.school_class)
+        self.house = House.objects.create(name='Red')
+        self.vehicle = Vehicle.objects.create(
+            vehicle_number='V1', vehicle_model='Bus', year_made=2020, registration_number='R1',
+            chasis_number='C1', max_seating_capacity=40, driver_name='Driver',
+            driver_licence='L1', driver_contact_no='9999999999'
+        )
+        route = Route.objects.create(title='North')
+        pickup_point = PickupPoint.objects.create(pickup_point='Gate', latitude=1, longitude=1)
+        self.route_pickup_point = RoutePickupPoint.objects.create(
+            route=route, pickup_point=pickup_point, distance=2, pickup_time=time(7, 30), monthly_fees=500
+        )
+        self.hostel = Hostel.objects.create(name='H1', hostel_type='Boys', address='Campus', intake=10)
+        self.hostel_room = HostelRoom.objects.create(
+            room_no='101', hostel=self.hostel, room_type=RoomType.objects.create(room_type='Double'),
+            number_of_beds=2, cost_per_bed=1000
+        )
+        self.fees_group = FeesGroup.objects.create(name='Term 1')
+        self.fees_types = [
+            FeesTypeMaster.objects.create(name='Tuition', fees_code='T'),
+            FeesTypeMaster.objects.create(name='Library', fees_code='L'),
+        ]
+
+    def create_student(self, index):
+        # Run the on-commit table version bumps that invalidate cached counts
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_student(index)
+
+    def _create_student(self, index):
+        student = StudentAdmission.objects.create(
+            roll_number=f'R{index}', school_class=self.school_class, section=self.section, house=self.house
+        )
+        StudentPersonalDetail.objects.create(
+            student=student, first_name='First', last_name='Last', gender='Male', date_of_birth=date(2015, 1, 1)
+        )
+        StudentPhysicalDetail.objects.create(student=student, house=self.house)
+        StudentTransportDetail.objects.create(student=student, vehicle=self.vehicle, pickup_point=self.route_pickup_point)
+        StudentHostelDetail.objects.create(student=student, hostel=self.hostel, hostel_room=self.hostel_room)
+        StudentParentDetail.objects.create(student=student, father_name='Father')
+        StudentGuardianDetail.objects.create(student=student, guardian_type='Father')
+        StudentAddressDetail.objects.create(student=student, current_address='Street')
+        StudentBankDetail.objects.create(student=student)
+        for fees_type in self.fees_types:
+            StudentFeesDetail.objects.create(
+                student=student, fees_group=self.fees_group, fees_type=fees_type, amount=100
+            )
+        StudentDocument.objects.create(student=student, title='Birth certificate', document='students/doc.pdf')
+
+
+class StudentListQueryCountTests(StudentTestCase):
+    def count_list_queries(self, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/student/', {'page': 1, 'pageSize': page_size}, format='json')
+        self.assertEqual(len(response.json()['data']), page_size)
+        return len(queries)
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.create_student(0)
+        single_row = self.count_list_queries(1)
+
+        for index in range(1, 20):
+            self.create_student(index)
+        self.assertEqual(self.count_list_queries(20), single_row)
+
+    def test_list_reuses_prefetched_relations(self):
+        self.create_student(0)
+        response = self.client.post('/api/student/', {'page': 1, 'pageSize': 10}, format='json')
+        row = response.json()['data'][0]
+        self.assertEqual(row['route_name'], 'North')
+        self.assertEqual(row['route_id'], self.route_pickup_point.route_id)
+        self.assertEqual(row['house_name'], 'Red')
+        self.assertEqual(row['hostel_room_type'], 'Double')
+        self.assertEqual(len(row['fee_details']), 2)
+        self.assertEqual(len(row['documents']), 1)
+
+    def test_get_all_query_count_does_not_grow_with_rows(self):
+        self.create_student(0)
+        with CaptureQueriesContext(connection) as single_row:
+            self.client.get('/api/student/all/')
+
+        for index in range(1, 10):
+            self.create_student(index)
+        with CaptureQueriesContext(connection) as many_rows:
+            response = self.client.get('/api/student/all/')
+        self.assertEqual(len(response.json()['data']), 10)
+        self.assertEqual(len(many_rows), len(single_row))
+
+
+class StudentImportTests(StudentTestCase):
+    def upload(self, name, content):
+        return self.client.post('/api/student/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart').json()
+
+    def csv_file(self, rows):
+        header = 'roll_number,school_class,section,first_name,last_name,gender,date_of_birth,fee_details,hostel_room'
+        lines = [header] + [
+            f'{roll},{self.school_class.pk},{self.section.pk},First,Last,Male,2015-01-01,"[{self.fees_group.pk}]",{room}'
+            for roll, room in rows
+        ]
+        return '\r\n'.join(lines).encode()
+
+    def test_valid_rows_are_saved_and_invalid_rows_reported(self):
+        content = self.csv_file([('I1', ''), ('I2', '')]) + f'\r\nI3,{self.school_class.pk},,First,Last,Male,2015-01-01,,'.encode()
+        report = self.upload('students.csv', content)['data']
+        self.assertEqual((report['total_rows'], report['created'], report['failed']), (3, 2, 1))
+        self.assertEqual(report['errors'][0]['roll_number'], 'I3')
+        self.assertIn('section', report['errors'][0]['errors'])
+        self.assertEqual(StudentAdmission.objects.count(), 2)
+
+    def test_full_room_rejects_only_the_rows_that_do_not_fit(self):
+        # The room has two beds; the chunk is retried row by row
+        room = self.hostel_room.pk
+        report = self.upload('students.csv', self.csv_file([('I1', room), ('I2', room), ('I3', room), ('I4', '')]))['data']
+        self.assertEqual((report['created'], report['failed']), (3, 1))
+        self.assertEqual([error['roll_number'] for error in report['errors']], ['I3'])
+        self.assertIn('hostel_room', report['errors'][0]['errors'])
+        self.hostel_room.refresh_from_db()
+        self.assertEqual(self.hostel_room.occupied_beds, 2)
+        self.assertEqual(
+            set(StudentAdmission.objects.values_list('roll_number', flat=True)), {'I1', 'I2', 'I4'}
+        )
+
+    def test_undecodable_csv_is_a_validation_error(self):
+        response = self.upload('students.csv', 'roll_number,first_name\r\nI1,J\xfcrgen'.encode('latin-1'))
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertIn('file', response['errors'])
+
+    def test_corrupt_xlsx_is_a_validation_error(self):
+        response = self.upload('students.xlsx', b'PK\x03\x04 not really a workbook')
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertIn('file', response['errors'])
+
+
+class StudentSearchTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        students = [('Aarav', 'Rakesh Sharma', '9876543210'), ('Diya', 'Mahesh Gupta', '9123456780'), ('Rohan', 'Rakesh Verma', '9000011111')]
+        for index, (first_name, father_name, father_phone) in enumerate(students):
+            response = self.client.post('/api/student/create/', {
+                'roll_number': f'S{index}', 'school_class': self.school_class.pk, 'section': self.section.pk,
+                'first_name': first_name, 'last_name': 'Last', 'gender': 'Male', 'date_of_birth': '2015-01-01',
+                'fee_details': '[]', 'father_name': father_name, 'father_phone': father_phone,
+            }, format='multipart').json()
+            self.assertEqual(response['status'], 201, response)
+
+    def names(self, search_text):
+        response = self.client.post('/api/student/', {'search_text': search_text}, format='json').json()
+        return sorted(row['first_name'] for row in response['data'])
+
+    def test_matches_names_parents_and_phone_fragments(self):
+        self.assertEqual(self.names('rakesh'), ['Aarav', 'Rohan'])
+        self.assertEqual(self.names('Rakesh Verma'), ['Rohan'])
+        self.assertEqual(self.names('54321'), ['Aarav'])
+        self.assertEqual(self.names('di'), ['Diya'])
+        self.assertEqual(self.names('zzz'), [])
+
+    def test_every_match_is_counted_and_reachable(self):
+        students = StudentAdmission.objects.bulk_create([
+            StudentAdmission(roll_number=f'B{index}', school_class=self.school_class, section=self.section)
+            for index in range(1005)
+        ])
+        StudentSearchIndex.objects.bulk_create([
+            StudentSearchIndex(student=student, document=f'{student.roll_number} Kumar') for student in students
+        ])
+        for search_text in ('kumar', 'ku'):
+            response = self.client.post('/api/student/', {
+                'search_text': search_text, 'page': 11, 'pageSize': 100, 'fields': ['roll_number']
+            }, format='json').json()
+            self.assertEqual(response['count'], 1005)
+            self.assertEqual(len(response['data']), 5)
+
+    def test_index_follows_deletes(self):
+        StudentAdmission.objects.filter(roll_number='S0').delete()
+        self.assertEqual(self.names('rakesh'), ['Rohan'])
+
+    def test_migration_backfill_indexes_existing_students(self):
+        migration = importlib.import_module('student.migrations.0006_student_search_index')
+        StudentSearchIndex.objects.all().delete()
+        # Batches smaller than the table, so more than one round is inserted
+        with mock.patch.object(migration, 'BACKFILL_BATCH_SIZE', 2):
+            migration.backfill(apps, None)
+        self.assertEqual(StudentSearchIndex.objects.count(), 3)
+        self.assertEqual(self.names('gupta'), ['Diya'])
+
+
+class FeePaymentTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(2):
+            self.create_student(index)
+        self.first, self.second = StudentAdmission.objects.order_by('roll_number')
+        tuition, library = self.fees_types
+        StudentFeesDetail.objects.filter(fees_type=library).update(due_date=date(2025, 4, 1))
+        StudentFeesDetail.objects.filter(fees_type=tuition).update(due_date=date(2025, 5, 1))
+
+    def pay(self, student, amount):
+        return self.client.post('/api/student/payments/create/', {'student': student.pk, 'amount': amount}, format='json').json()
+
+    def test_payment_is_allocated_to_the_oldest_dues_first(self):
+        response = self.pay(self.first, '150.00')
+        self.assertEqual(response['status'], 201)
+        self.assertEqual(response['data']['balance_after'], '50.00')
+        self.assertEqual(
+            [(row['fees_type'], row['amount']) for row in response['data']['allocations']],
+            [('Library', '100.00'), ('Tuition', '50.00')]
+        )
+        paid = StudentFeesDetail.objects.filter(student=self.first).order_by('due_date').values_list('paid', flat=True)
+        self.assertEqual(list(paid), [100, 50])
+
+    def test_rejects_overpayment_and_non_positive_amounts(self):
+        self.pay(self.first, '150')
+        response = self.pay(self.first, '60')
+        self.assertEqual(response['errors'], {'amount': ['Amount exceeds the outstanding balance of 50.00.']})
+        response = self.pay(self.first, '0')
+        self.assertEqual(response['errors'], {'amount': ['Amount must be greater than zero.']})
+
+    def test_bulk_posting_keeps_running_balances(self):
+        response = self.client.post('/api/student/payments/bulk/', {'payments': [
+            {'student': self.second.pk, 'amount': '50'},
+            {'student': self.second.pk, 'amount': '100'},
+            {'student': self.first.pk, 'amount': '50'},
+        ]}, format='json').json()
+        self.assertEqual(response['data']['posted'], 3)
+        self.assertEqual(response['data']['total_amount'], '200.00')
+        balances = FeePayment.objects.order_by('id').values_list('balance_after', flat=True)
+        self.assertEqual(list(balances), [150, 50, 150])
+
+    def test_bulk_posting_is_all_or_nothing(self):
+        response = self.client.post('/api/student/payments/bulk/', {'payments': [
+            {'student': self.second.pk, 'amount': '150'},
+            {'student': self.second.pk, 'amount': '100'},
+        ]}, format='json').json()
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertEqual(response['errors']['payments'][0]['index'], 1)
+        self.assertFalse(FeePayment.objects.exists())
+        self.assertFalse(StudentFeesDetail.objects.filter(paid__gt=0).exists())
+
+    def test_payments_are_append_only(self):
+        self.pay(self.first, '10')
+        payment = FeePayment.objects.get()
+        for change in (payment.save, payment.delete):
+            with self.assertRaises(ValueError):
+                change()
+        response = self.client.delete(f'/api/student/{self.first.pk}/').json()
+        self.assertEqual(response['message'], 'Validation failed')
+        self.assertTrue(StudentAdmission.objects.filter(pk=self.first.pk).exists())
+
+
+
+class FeeAssignmentTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(2):
+            self.create_student(index)
+        self.students = list(StudentAdmission.objects.order_by('roll_number'))
+        tuition, library = self.fees_types
+        FeesMaster.objects.create(fees_group=self.fees_group, fees_type=tuition, due_date=date(2025, 4, 10), amount=1000)
+        FeesMaster.objects.create(fees_group=self.fees_group, fees_type=library, due_date=date(2025, 4, 10), amount=200)
+        self.second_term = FeesGroup.objects.create(name='Term 2')
+        FeesMaster.objects.create(fees_group=self.second_term, fees_type=tuition, due_date=date(2025, 7, 10), amount=500)
+
+    def assign(self, fee_groups):
+        return self.client.post('/api/student/fees/assign/', {
+            'fee_groups': fee_groups, 'school_class': self.school_class.pk
+        }, format='json').json()
+
+    def fee_rows(self, student):
+        return sorted(
+            StudentFeesDetail.objects.filter(student=student).values_list('fees_group__name', 'fees_type__name', 'amount')
+        )
+
+    def totals(self):
+        return list(StudentAdmission.objects.order_by('roll_number').values_list('fees_total_amount', flat=True))
+
+    def test_existing_rows_take_the_master_amounts(self):
+        # The fixture rows hold 100 each; FeesMaster now says 1000 and 200
+        response = self.assign([self.fees_group.pk])
+        self.assertEqual(response['data'], {'students': 2, 'created': 0, 'updated': 4, 'deleted': 0})
+        self.assertEqual(self.fee_rows(self.students[0]), [('Term 1', 'Library', 200), ('Term 1', 'Tuition', 1000)])
+        self.assertEqual(self.totals(), [1200, 1200])
+
+        # Nothing changed, nothing written
+        response = self.assign([self.fees_group.pk])
+        self.assertEqual(response['data'], {'students': 2, 'created': 0, 'updated': 0, 'deleted': 0})
+
+    def test_switching_groups_adds_and_removes_rows(self):
+        response = self.assign([self.second_term.pk])
+        self.assertEqual(response['data'], {'students': 2, 'created': 2, 'updated': 0, 'deleted': 4})
+        self.assertEqual(self.fee_rows(self.students[1]), [('Term 2', 'Tuition', 500)])
+        self.assertEqual(self.totals(), [500, 500])
+
+        response = self.assign([self.fees_group.pk, self.second_term.pk])
+        self.assertEqual(response['data'], {'students': 2, 'created': 4, 'updated': 0, 'deleted': 0})
+        self.assertEqual(self.totals(), [1700, 1700])
+
+    def test_rows_with_payments_are_kept(self):
+        self.assign([self.fees_group.pk])
+        self.client.post('/api/student/payments/create/', {'student': self.students[0].pk, 'amount': '50'}, format='json')
+        response = self.assign([self.second_term.pk])
+        # The first student's paid row stays; the other three Term 1 rows go
+        self.assertEqual(response['data']['deleted'], 3)
+        self.assertEqual(len(self.fee_rows(self.students[0])), 2)
+        self.assertEqual(self.totals()[1], 500)
+
+    def test_rejects_bad_requests(self):
+        response = self.client.post('/api/student/fees/assign/', {'fee_groups': 'x', 'school_class': 1}, format='json').json()
+        self.assertEqual(response['errors'], {'fee_groups': ['Must be a list of fee group ids.']})
+        response = self.client.post('/api/student/fees/assign/', {'fee_groups': []}, format='json').json()
+        self.assertEqual(response['errors'], {'non_field_errors': ['Provide student_ids, school_class or section.']})
+
+
+class FeeReportTestCase(StudentTestCase):
+    """
+    Two students on Term 1: Tuition 1000 due 10 April (10% fine) and Library
+    200 due 10 May (fixed fine of 25). R0 paid 400 of tuition with a 100
+    discount; R1 paid tuition in full. R2 has no fee rows.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            self.create_student(index)
+        tuition, library = self.fees_types
+        FeesMaster.objects.create(
+            fees_group=self.fees_group, fees_type=tuition, due_date=date(2025, 4, 10), amount=1000,
+            fine_type='Percentage', percentage=10
+        )
+        FeesMaster.objects.create(
+            fees_group=self.fees_group, fees_type=library, due_date=date(2025, 5, 10), amount=200,
+            fine_type='Fix', fix_amount=25
+        )
+        StudentFeesDetail.objects.filter(student__roll_number='R2').delete()
+        self.client.post('/api/student/fees/assign/', {
+            'fee_groups': [self.fees_group.pk], 'student_ids': list(
+                StudentAdmission.objects.filter(roll_number__in=['R0', 'R1']).values_list('pk', flat=True)
+            )
+        }, format='json')
+        StudentFeesDetail.objects.filter(student__roll_number='R0', fees_type=tuition).update(paid=400, discount=100)
+        StudentFeesDetail.objects.filter(student__roll_number='R1', fees_type=tuition).update(paid=1000)
+
+
+class FeeStatementTests(FeeReportTestCase):
+    def statement(self, as_of, **filters):
+        return self.client.post('/api/student/fees/statement/', {'as_of': as_of, **filters}, format='json').json()['data']
+
+    def figures(self, statement):
+        return {
+            row['roll_number']: [row[field] for field in ('total_amount', 'discount', 'paid', 'balance', 'overdue', 'fine', 'net_payable')]
+            for row in statement['rows']
+        }
+
+    def test_only_overdue_rows_with_a_balance_are_fined(self):
+        statement = self.statement('2025-05-01')
+        self.assertEqual(self.figures(statement), {
+            # Tuition is overdue: 500 outstanding plus 10% of 1000
+            'R0': ['1200.00', '100.00', '400.00', '700.00', '500.00', '100.00', '800.00'],
+            # Tuition is paid, so nothing is overdue yet
+            'R1': ['1200.00', '0.00', '1000.00', '200.00', '0.00', '0.00', '200.00'],
+            'R2': ['0.00', '0.00', '0.00', '0.00', '0.00', '0.00', '0.00'],
+        })
+        self.assertEqual(statement['totals'], {
+            'total_amount': '2400.00', 'discount': '100.00', 'paid': '1400.00', 'balance': '900.00',
+            'overdue': '500.00', 'fine': '100.00', 'net_payable': '1000.00',
+        })
+
+    def test_fixed_fine_applies_once_its_due_date_passes(self):
+        figures = self.figures(self.statement('2025-06-01'))
+        self.assertEqual(figures['R0'][4:], ['700.00', '125.00', '825.00'])
+        self.assertEqual(figures['R1'][4:], ['200.00', '25.00', '225.00'])
+
+    def test_inactive_fee_masters_charge_no_fine(self):
+        FeesMaster.objects.update(is_active=False)
+        figures = self.figures(self.statement('2025-06-01'))
+        self.assertEqual(figures['R0'][4:], ['700.00', '0.00', '700.00'])
+
+    def test_selects_students(self):
+        statement = self.statement('2025-05-01', student_ids=[StudentAdmission.objects.get(roll_number='R1').pk])
+        self.assertEqual(list(self.figures(statement)), ['R1'])
+        self.assertEqual(statement['totals']['net_payable'], '200.00')
+        response = self.client.post('/api/student/fees/statement/', {'as_of': '1 May'}, format='json').json()
+        self.assertEqual(response['errors'], {'as_of': ['Date has wrong format. Use YYYY-MM-DD.']})
+
+
+class FeeDefaultersTests(FeeReportTestCase):
+    def setUp(self):
+        super().setUp()
+        # R1 sits in another section, so the report has two groups
+        StudentAdmission.objects.filter(roll_number='R1').update(
+            section=Section.objects.create(name='B', class_id=self.school_class)
+        )
+
+    def defaulters(self, as_of, **params):
+        return self.client.post('/api/student/fees/defaulters/', {'as_of': as_of, **params}, format='json').json()
+
+    def test_groups_and_totals(self):
+        response = self.defaulters('2025-06-01')
+        data = response['data']
+        self.assertEqual(data['totals'], {'students': 2, 'fee_rows': 3, 'overdue': '900.00'})
+        self.assertEqual(
+            [(group['section_name'], group['students'], group['fee_rows'], group['overdue']) for group in data['groups']],
+            [('A', 1, 2, '700.00'), ('B', 1, 1, '200.00')]
+        )
+        # Largest overdue balance first
+        self.assertEqual(
+            [(row['roll_number'], row['fee_rows'], row['oldest_due_date'], row['overdue']) for row in data['rows']],
+            [('R0', 2, '2025-04-10', '700.00'), ('R1', 1, '2025-05-10', '200.00')]
+        )
+        self.assertEqual(response['count'], 2)
+
+    def test_paid_and_not_yet_due_rows_are_not_defaults(self):
+        data = self.defaulters('2025-05-01')['data']
+        self.assertEqual([(row['roll_number'], row['overdue']) for row in data['rows']], [('R0', '500.00')])
+
+    def test_pages_and_filters(self):
+        response = self.defaulters('2025-06-01', page=2, pageSize=1)
+        self.assertEqual([row['roll_number'] for row in response['data']['rows']], ['R1'])
+        self.assertEqual(response['no_of_pages'], 2)
+        # Totals cover every page
+        self.assertEqual(response['data']['totals']['overdue'], '900.00')
+        other_group = FeesGroup.objects.create(name='Term 2')
+        self.assertEqual(self.defaulters('2025-06-01', fees_group=other_group.pk)['data']['rows'], [])
+
+
+class BedAllocationTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            self.create_student(index)
+        self.students = list(StudentAdmission.objects.order_by('roll_number'))
+        self.other_hostel = Hostel.objects.create(name='H2', hostel_type='Boys', address='Campus', intake=10)
+        self.single_room = HostelRoom.objects.create(
+            room_no='201', hostel=self.other_hostel, room_type=self.hostel_room.room_type,
+            number_of_beds=1, cost_per_bed=2000
+        )
+
+    def allocate(self, student, room, **body):
+        return self.client.post(
+            f'/api/student/{student.pk}/hostel/allocate/', {'hostel_room': room.pk, **body}, format='json'
+        ).json()
+
+    def occupancy(self):
+        return (
+            list(Hostel.objects.order_by('name').values_list('occupied_beds', flat=True)),
+            list(HostelRoom.objects.order_by('room_no').values_list('occupied_beds', flat=True)),
+            HostelBed.objects.filter(is_occupied=True).count(),
+        )
+
+    def test_allocates_the_lowest_free_bed_until_the_room_is_full(self):
+        first, second, third = self.students
+        self.assertEqual(self.allocate(first, self.hostel_room)['data']['bed_number'], '1')
+        response = self.allocate(second, self.hostel_room, bed_number=1)
+        self.assertEqual(response['errors'], {'bed_number': ['Bed 1 in room 101 is taken.']})
+        response = self.allocate(second, self.hostel_room, bed_number=5)
+        self.assertEqual(response['errors'], {'bed_number': ['Room 101 has beds 1 to 2.']})
+        self.assertEqual(self.allocate(second, self.hostel_room)['data']['bed_number'], '2')
+        response = self.allocate(third, self.hostel_room)
+        self.assertEqual(response['errors'], {'hostel_room': ['Room 101 has no free bed.']})
+        self.assertEqual(self.occupancy(), ([2, 0], [2, 0], 2))
+
+    def test_moving_and_releasing_keep_counters_in_step(self):
+        first = self.students[0]
+        self.allocate(first, self.hostel_room)
+        self.allocate(first, self.single_room)
+        self.assertEqual(self.occupancy(), ([0, 1], [0, 1], 1))
+
+        response = self.client.post(f'/api/student/{first.pk}/hostel/release/', format='json').json()
+        self.assertEqual(response['message'], 'Bed released successfully.')
+        response = self.client.post(f'/api/student/{first.pk}/hostel/release/', format='json').json()
+        self.assertEqual(response['errors'], {'non_field_errors': ['The student holds no hostel bed.']})
+        self.assertEqual(self.occupancy(), ([0, 0], [0, 0], 0))
+
+    def test_occupied_beds_cannot_be_removed_from_a_room(self):
+        self.allocate(self.students[0], self.single_room)
+        response = self.client.patch(f'/api/master/hostel/rooms/{self.single_room.pk}/', {'number_of_beds': 0}, format='json').json()
+        self.assertEqual(response['errors'], {'number_of_beds': ['Bed 1 is occupied; release it first.']})
+
+    def test_partial_update_with_only_a_new_hostel_releases_the_bed(self):
+        first = self.students[0]
+        self.allocate(first, self.hostel_room)
+        response = self.client.patch(f'/api/student/{first.pk}/', {'hostel': self.other_hostel.pk}, format='multipart').json()
+        self.assertEqual(response['status'], 200)
+        detail = StudentHostelDetail.objects.get(student=first)
+        self.assertEqual((detail.hostel_id, detail.hostel_room_id, detail.bed_id), (self.other_hostel.pk, None, None))
+        self.assertEqual(self.occupancy(), ([0, 0], [0, 0], 0))
+
+    def test_partial_update_with_the_same_hostel_keeps_the_bed(self):
+        first = self.students[0]
+        self.allocate(first, self.hostel_room)
+        self.client.patch(f'/api/student/{first.pk}/', {'hostel': self.hostel.pk}, format='multipart')
+        self.assertIsNotNone(StudentHostelDetail.objects.get(student=first).bed)
+        self.assertEqual(self.occupancy(), ([1, 0], [1, 0], 1))
+
+    def test_allocations_keep_the_masters_snapshot(self):
+        before = self.client.get('/api/master/masters/all/').json()
+        self.assertNotIn('occupied_beds', before['data']['hostel_rooms'][0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(self.students[0], self.hostel_room)
+        self.assertEqual(self.client.get('/api/master/masters/all/').json()['version'], before['version'])
+
+    def test_deleting_a_student_frees_their_bed(self):
+        self.allocate(self.students[0], self.single_room)
+        self.client.delete(f'/api/student/{self.students[0].pk}/')
+        self.assertEqual(self.occupancy(), ([0, 0], [0, 0], 0))
+
+
+
+class TransportAssignmentTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            self.create_student(index)
+        self.students = list(StudentAdmission.objects.order_by('roll_number'))
+        # The fixture writes transport details directly; clear them so seats start free
+        StudentTransportDetail.objects.update(vehicle=None, pickup_point=None)
+        self.bus = Vehicle.objects.create(
+            vehicle_number='V2', vehicle_model='Van', year_made=2020, registration_number='R2',
+            chasis_number='C2', max_seating_capacity=2, driver_name='Driver',
+            driver_licence='L2', driver_contact_no='8888888888'
+        )
+        self.route = Route.objects.create(title='South')
+        self.stop = RoutePickupPoint.objects.create(
+            route=self.route, pickup_point=PickupPoint.objects.create(pickup_point='Square', latitude=2, longitude=2),
+            distance=1, pickup_time=time(7), monthly_fees=300
+        )
+        RouteVehicle.objects.create(route=self.route).vehicles.add(self.bus)
+
+    def assign(self, student, vehicle, pickup_point):
+        return self.client.post(
+            f'/api/student/{student.pk}/transport/assign/', {'vehicle': vehicle, 'pickup_point': pickup_point}, format='json'
+        ).json()
+
+    def seats(self):
+        self.bus.refresh_from_db()
+        self.route.refresh_from_db()
+        return self.bus.occupied_seats, self.route.occupied_seats
+
+    def test_seats_are_counted_up_to_capacity(self):
+        first, second, third = self.students
+        for student in (first, second):
+            self.assertEqual(self.assign(student, self.bus.pk, self.stop.pk)['status'], 200)
+        response = self.assign(third, self.bus.pk, self.stop.pk)
+        self.assertEqual(response['errors'], {'vehicle': ['Vehicle V2 has 0 free seat(s); 1 requested.']})
+        # Re-assigning a student to the seat they hold takes no new one
+        self.assertEqual(self.assign(first, self.bus.pk, self.stop.pk)['status'], 200)
+        self.assertEqual(self.seats(), (2, 2))
+
+        response = self.client.patch(f'/api/master/transport/vehicles/{self.bus.pk}/', {'max_seating_capacity': 1}, format='json').json()
+        self.assertEqual(response['errors'], {'max_seating_capacity': ['2 students are assigned to this vehicle; reassign some first.']})
+
+    def test_unassigning_and_deleting_free_seats(self):
+        first, second, _ = self.students
+        for student in (first, second):
+            self.assign(student, self.bus.pk, self.stop.pk)
+        self.assign(first, None, None)
+        self.client.delete(f'/api/student/{second.pk}/')
+        self.assertEqual(self.seats(), (0, 0))
+
+    def test_occupancy_report(self):
+        self.assign(self.students[0], self.bus.pk, self.stop.pk)
+        data = self.client.get('/api/master/transport/occupancy/').json()['data']
+        route = next(row for row in data['routes'] if row['id'] == self.route.pk)
+        self.assertEqual((route['occupied'], route['capacity'], route['vehicles']), (1, 2, [self.bus.pk]))
+        vehicle = next(row for row in data['vehicles'] if row['id'] == self.bus.pk)
+        self.assertEqual((vehicle['occupied'], vehicle['free']), (1, 1))
+
+    def test_assignments_keep_the_masters_snapshot(self):
+        before = self.client.get('/api/master/masters/all/').json()
+        self.assertNotIn('occupied_seats', before['data']['vehicles'][0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assign(self.students[0], self.bus.pk, self.stop.pk)
+        self.assertEqual(self.client.get('/api/master/masters/all/').json()['version'], before['version'])
+
+    def test_reconcile_corrects_drifted_counters(self):
+        self.assign(self.students[0], self.bus.pk, self.stop.pk)
+        Vehicle.objects.filter(pk=self.bus.pk).update(occupied_seats=5)
+        Route.objects.filter(pk=self.route.pk).update(occupied_seats=0)
+        output = io.StringIO()
+        call_command('reconcile_occupancy', stdout=output)
+        self.assertIn('Corrected 2 occupancy counters.', output.getvalue())
+        self.assertEqual(self.seats(), (1, 1))
+
+
+
+class AutoAssignTransportTests(StudentTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(5):
+            self.create_student(index)
+        self.students = list(StudentAdmission.objects.order_by('roll_number').values_list('pk', flat=True))
+        StudentTransportDetail.objects.update(vehicle=None, pickup_point=None)
+        # The last student has no transport detail yet
+        StudentTransportDetail.objects.filter(student=self.students[-1]).delete()
+
+        self.vehicles, self.routes, self.stops = [], [], []
+        for name, latitudes in (('A', [12.90, 12.91]), ('B', [12.95])):
+            vehicle = Vehicle.objects.create(
+                vehicle_number=f'V{name}', vehicle_model='Van', year_made=2020, registration_number=f'R{name}',
+                chasis_number=f'C{name}', max_seating_capacity=2, driver_name='Driver',
+                driver_licence=f'L{name}', driver_contact_no='8888888888'
+            )
+            route = Route.objects.create(title=name)
+            RouteVehicle.objects.create(route=route).vehicles.add(vehicle)
+            for index, latitude in enumerate(latitudes):
+                self.stops.append(RoutePickupPoint.objects.create(
+                    route=route, distance=1, pickup_time=time(7), monthly_fees=300,
+                    pickup_point=PickupPoint.objects.create(pickup_point=f'{name}{index}', latitude=latitude, longitude=77.6),
+                ))
+            self.vehicles.append(vehicle)
+            self.routes.append(route)
+        # Everyone lives by route A; the last student asks for route B's stop
+        self.requests = [{'student': pk, 'latitude': 12.90, 'longitude': 77.6} for pk in self.students[:-1]]
+        self.requests.append({'student': self.students[-1], 'pickup_point': self.stops[-1].pk})
+
+    def auto_assign(self, body):
+        return self.client.post('/api/student/transport/auto-assign/', body, format='json').json()
+
+    def seats(self):
+        return (
+            [vehicle.occupied_seats for vehicle in Vehicle.objects.filter(vehicle_number__in=['VA', 'VB']).order_by('vehicle_number')],
+            [route.occupied_seats for route in Route.objects.filter(title__in=['A', 'B']).order_by('title')],
+        )
+
+    def test_dry_run_fills_vehicles_without_saving(self):
+        data = self.auto_assign({'students': self.requests, 'dry_run': True})['data']
+        vehicles = sorted(row['vehicle_number'] for row in data['assigned'])
+        self.assertEqual(vehicles, ['VA', 'VA', 'VB', 'VB'])
+        self.assertEqual(
+            [row['reason'] for row in data['unassigned']], ['No vehicle with a free seat serves a nearby pickup point.']
+        )
+        preferred = next(row for row in data['assigned'] if row['student'] == self.students[-1])
+        self.assertEqual(preferred['pickup_point'], self.stops[-1].pk)
+        self.assertEqual(self.seats(), ([0, 0], [0, 0]))
+
+    def test_assignment_is_saved_and_stable_on_rerun(self):
+        response = self.auto_assign({'students': self.requests, 'dry_run': 'false'})
+        self.assertEqual(response['message'], 'Transport assigned successfully.')
+        self.assertEqual(self.seats(), ([2, 2], [2, 2]))
+        self.assertEqual(StudentTransportDetail.objects.filter(vehicle__in=self.vehicles).count(), 4)
+        self.assertTrue(StudentTransportDetail.objects.filter(student=self.students[-1], pickup_point=self.stops[-1]).exists())
+
+        # Students keep the seats they hold
+        self.auto_assign({'students': self.requests})
+        self.assertEqual(self.seats(), ([2, 2], [2, 2]))
+
+    def test_rejects_invalid_items(self):
+        response = self.auto_assign({'students': [
+            {'student': 99999, 'latitude': 1, 'longitude': 1},
+            {'student': self.students[0]},
+            {'student': self.students[1], 'latitude': 100, 'longitude': 1},
+            'x',
+            {'student': self.students[2], 'pickup_point': self.stops[0].pk},
+            {'student': self.students[2], 'pickup_point': self.stops[0].pk},
+        ]})
+        errors = {row['index']: row['errors'] for row in response['errors']['students']}
+        self.assertEqual(sorted(errors), [0, 1, 2, 3, 5])
+        self.assertEqual(errors[1], {'non_field_errors': ['Send a pickup_point or latitude and longitude.']})
+        self.assertEqual(errors[5], {'student': ['Listed more than once.']})
+        self.assertEqual(self.seats(), ([0, 0], [0, 0]))
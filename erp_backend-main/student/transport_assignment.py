@@ -0,0 +1,240 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from rest_framework import serializers
+from base.cache import bump_model_versions
+from master.models import Route, RouteVehicle, Vehicle
+from master.geo import haversine_km
+from master.pickup_index import get_pickup_grid
+from .models import StudentAdmission, StudentTransportDetail
+
+# Nearest pickup points considered per student by auto-assignment
+CANDIDATE_STOPS = 8
+# Rows written per UPDATE by auto-assignment
+ASSIGN_BATCH_SIZE = 500
+
+
+def shift_seats(vehicle_deltas, route_deltas):
+    """
+    Apply {vehicle_id: delta} and {route_id: delta} to the occupancy
+    counters with F() updates. A vehicle only takes new students while
+    occupied_seats + delta <= max_seating_capacity; the check is part of the
+    UPDATE, so two concurrent assignments cannot both take the last seat.
+    Raises a ValidationError (and the caller's transaction rolls back) when
+    a vehicle is full.
+    """
+    for vehicle_id, delta in sorted(vehicle_deltas.items()):
+        if not delta:
+            continue
+        vehicles = Vehicle.objects.filter(pk=vehicle_id)
+        if delta > 0:
+            vehicles = vehicles.filter(max_seating_capacity__gte=F('occupied_seats') + delta)
+        else:
+            vehicles = vehicles.filter(occupied_seats__gte=-delta)
+        if not vehicles.update(occupied_seats=F('occupied_seats') + delta) and delta > 0:
+            vehicle = Vehicle.objects.get(pk=vehicle_id)
+            free = max(vehicle.max_seating_capacity - vehicle.occupied_seats, 0)
+            raise serializers.ValidationError({'vehicle': [
+                f"Vehicle {vehicle.vehicle_number} has {free} free seat(s); {delta} requested."
+            ]})
+    for route_id, delta in sorted(route_deltas.items()):
+        if not delta:
+            continue
+        routes = Route.objects.filter(pk=route_id)
+        if delta < 0:
+            routes = routes.filter(occupied_seats__gte=-delta)
+        routes.update(occupied_seats=F('occupied_seats') + delta)
+
+    if any(vehicle_deltas.values()) or any(route_deltas.values()):
+        # update() sends no signals; refresh cached list counts. The masters
+        # snapshot leaves the seat counters out, so it is kept.
+        bump_model_versions(Vehicle, Route)
+
+
+def seat_deltas(changes):
+    """
+    Counter deltas for [(old (vehicle_id, route_id), new (vehicle_id, route_id))]
+    moves; None ids are ignored.
+    """
+    vehicles, routes = Counter(), Counter()
+    for (old_vehicle, old_route), (new_vehicle, new_route) in changes:
+        if old_vehicle != new_vehicle:
+            if old_vehicle:
+                vehicles[old_vehicle] -= 1
+            if new_vehicle:
+                vehicles[new_vehicle] += 1
+        if old_route != new_route:
+            if old_route:
+                routes[old_route] -= 1
+            if new_route:
+                routes[new_route] += 1
+    return dict(vehicles), dict(routes)
+
+
+def seat_of(vehicle=None, pickup_point=None):
+    """(vehicle_id, route_id) a student with this vehicle and pickup point holds."""
+    return (
+        vehicle.pk if vehicle else None,
+        pickup_point.route_id if pickup_point else None,
+    )
+
+
+@transaction.atomic
+def assign_transport(student, vehicle=None, pickup_point=None):
+    """
+    Set the student's vehicle and pickup point (a RoutePickupPoint), keeping
+    the vehicle and route counters in step. Passing None for both unassigns.
+    The student row is locked so concurrent changes to one student apply in
+    turn. Returns the StudentTransportDetail.
+    """
+    list(StudentAdmission.objects.select_for_update().filter(pk=student.pk).values_list('pk', flat=True))
+    detail = StudentTransportDetail.objects.select_related('vehicle', 'pickup_point').filter(student=student).first()
+    old = seat_of(detail.vehicle, detail.pickup_point) if detail else (None, None)
+
+    if vehicle is not None and vehicle.pk != old[0] and not vehicle.is_active:
+        raise serializers.ValidationError({'vehicle': ["This vehicle is not active."]})
+    shift_seats(*seat_deltas([(old, seat_of(vehicle, pickup_point))]))
+
+    detail, _ = StudentTransportDetail.objects.update_or_create(student=student, defaults={
+        'vehicle': vehicle,
+        'pickup_point': pickup_point,
+    })
+    return detail
+
+
+def _route_vehicles():
+    """{route_id: [vehicle_id]} of the active vehicles on active route-vehicle links."""
+    routes = {}
+    links = RouteVehicle.vehicles.through.objects.filter(
+        routevehicle__is_active=True, vehicle__is_active=True
+    ).order_by('vehicle').values_list('routevehicle__route', 'vehicle')
+    for route_id, vehicle_id in links:
+        routes.setdefault(route_id, []).append(vehicle_id)
+    return routes
+
+
+def _candidates(grid, stops_by_id, point, preferred, max_km):
+    """[(distance_km, stop)] a student may be given, nearest first."""
+    if preferred is not None:
+        stop = stops_by_id.get(preferred)
+        if stop is None:
+            return []
+        distance = haversine_km(*point, stop['latitude'], stop['longitude']) if point else 0.0
+        return [(distance, stop)]
+    return grid.nearest(*point, CANDIDATE_STOPS, max_km)
+
+
+@transaction.atomic
+def auto_assign_transport(requests, dry_run=False, max_km=None):
+    """
+    Give each student a route pickup point and a vehicle serving its route.
+    `requests` is [(student_id, (latitude, longitude) or None, preferred
+    RoutePickupPoint id or None)]; a preference is honoured as is, otherwise
+    the CANDIDATE_STOPS nearest active stops (from the pickup point index)
+    are tried in order of distance.
+
+    Students are placed greedily, those with the most to lose first (the
+    largest gap between their nearest and next nearest stop), on the nearest
+    stop whose route still has a vehicle with a free seat; of those vehicles
+    the student's current one, else the emptiest, is used. This keeps the
+    total distance low without overfilling any vehicle.
+
+    Unless `dry_run`, the seat counters are moved with shift_seats() and all
+    StudentTransportDetail rows are written with one bulk_update. Returns
+    {"assigned", "unassigned", "total_distance_km"}.
+    """
+    student_ids = [student_id for student_id, _, _ in requests]
+    list(StudentAdmission.objects.select_for_update().filter(pk__in=student_ids).order_by('pk').values_list('pk', flat=True))
+    details = {
+        detail.student_id: detail
+        for detail in StudentTransportDetail.objects.select_related('pickup_point').filter(student__in=student_ids)
+    }
+    current = {
+        student_id: (detail.vehicle_id, detail.pickup_point.route_id if detail.pickup_point else None)
+        for student_id, detail in details.items()
+    }
+
+    route_vehicles = _route_vehicles()
+    vehicles = {
+        vehicle.pk: vehicle
+        for vehicle in Vehicle.objects.filter(pk__in={pk for pks in route_vehicles.values() for pk in pks})
+    }
+    free = {pk: max(vehicle.max_seating_capacity - vehicle.occupied_seats, 0) for pk, vehicle in vehicles.items()}
+
+    grid = get_pickup_grid()
+    stops_by_id = {stop['id']: stop for stop in grid.stops}
+    options = {
+        student_id: _candidates(grid, stops_by_id, point, preferred, max_km)
+        for student_id, point, preferred in requests
+    }
+
+    def regret(student_id):
+        choices = options[student_id]
+        if len(choices) < 2:
+            return float('inf')
+        return choices[1][0] - choices[0][0]
+
+    placed, unassigned = {}, []
+    for student_id in sorted(student_ids, key=regret, reverse=True):
+        held = current.get(student_id, (None, None))[0]
+        for distance, stop in options[student_id]:
+            serving = route_vehicles.get(stop['route'], [])
+            if held in serving:
+                vehicle_id = held
+            else:
+                vehicle_id = max((pk for pk in serving if free[pk] > 0), key=free.get, default=None)
+            if vehicle_id is None:
+                continue
+            if vehicle_id != held:
+                free[vehicle_id] -= 1
+                if held in free:
+                    free[held] += 1
+            placed[student_id] = (distance, stop, vehicle_id)
+            break
+        else:
+            unassigned.append({
+                "student": student_id,
+                "reason": "No vehicle with a free seat serves a nearby pickup point." if options[student_id]
+                else "No active pickup point matches.",
+            })
+
+    assigned = [
+        {
+            "student": student_id,
+            "pickup_point": stop['id'],
+            "pickup_point_name": stop['pickup_point_name'],
+            "route": stop['route'],
+            "route_title": stop['route_title'],
+            "vehicle": vehicle_id,
+            "vehicle_number": vehicles[vehicle_id].vehicle_number,
+            "distance_km": round(distance, 3),
+        }
+        for student_id, (distance, stop, vehicle_id) in sorted(placed.items())
+    ]
+    report = {
+        "assigned": assigned,
+        "unassigned": sorted(unassigned, key=lambda row: row['student']),
+        "total_distance_km": round(sum(distance for distance, _, _ in placed.values()), 3),
+    }
+    if dry_run or not placed:
+        return report
+
+    missing = [student_id for student_id in placed if student_id not in details]
+    if missing:
+        StudentTransportDetail.objects.bulk_create([StudentTransportDetail(student_id=pk) for pk in missing])
+        details.update(
+            (detail.student_id, detail) for detail in StudentTransportDetail.objects.filter(student__in=missing)
+        )
+
+    changes = []
+    for student_id, (_, stop, vehicle_id) in placed.items():
+        changes.append((current.get(student_id, (None, None)), (vehicle_id, stop['route'])))
+        details[student_id].vehicle_id = vehicle_id
+        details[student_id].pickup_point_id = stop['id']
+    shift_seats(*seat_deltas(changes))
+    StudentTransportDetail.objects.bulk_update(
+        [details[student_id] for student_id in placed], ['vehicle', 'pickup_point'], batch_size=ASSIGN_BATCH_SIZE
+    )
+    # bulk_update sends no signals; refresh cached student lists
+    bump_model_versions(StudentTransportDetail)
+    return report
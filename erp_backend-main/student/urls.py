@@ -1,18 +1,36 @@
 from django.urls import path
 from .views import (
-    HouseViewSet, StudentViewSet
+    FeePaymentViewSet, HouseViewSet, StudentViewSet
 )
 
 urlpatterns = [
     # HouseViewset URLs
     path('house/', HouseViewSet.as_view({'post': 'post'})),
     path('house/create/', HouseViewSet.as_view({'post': 'create'})),
+    path('house/batch/', HouseViewSet.as_view({'post': 'batch'})),
+    path('house/export/', HouseViewSet.as_view({'post': 'export'})),
     path('house/<int:pk>/', HouseViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'})),
     path('house/all/', HouseViewSet.as_view({'get': 'get_all'})),
 
+    # FeePaymentViewSet URLs
+    path('payments/', FeePaymentViewSet.as_view({'post': 'post'})),
+    path('payments/create/', FeePaymentViewSet.as_view({'post': 'create'})),
+    path('payments/export/', FeePaymentViewSet.as_view({'post': 'export'})),
+    path('payments/bulk/', FeePaymentViewSet.as_view({'post': 'bulk_post'})),
+    path('payments/<int:pk>/', FeePaymentViewSet.as_view({'get': 'retrieve'})),
+
     # StudentViewset URLs
     path('', StudentViewSet.as_view({'post': 'post'})),
     path('create/', StudentViewSet.as_view({'post': 'create'})),
+    path('<int:pk>/hostel/allocate/', StudentViewSet.as_view({'post': 'allocate_hostel_bed'})),
+    path('<int:pk>/hostel/release/', StudentViewSet.as_view({'post': 'release_hostel_bed'})),
+    path('<int:pk>/transport/assign/', StudentViewSet.as_view({'post': 'assign_transport_seat'})),
     path('<int:pk>/', StudentViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'})),
     path('all/', StudentViewSet.as_view({'get': 'get_all'})),
+    path('export/', StudentViewSet.as_view({'post': 'export'})),
+    path('import/', StudentViewSet.as_view({'post': 'bulk_import'})),
+    path('fees/assign/', StudentViewSet.as_view({'post': 'assign_fees'})),
+    path('fees/statement/', StudentViewSet.as_view({'post': 'fee_statement'})),
+    path('fees/defaulters/', StudentViewSet.as_view({'post': 'fee_defaulters'})),
+    path('transport/auto-assign/', StudentViewSet.as_view({'post': 'auto_assign_transport'})),
 ]
@@ -1,17 +1,38 @@
-import os
-from uuid import uuid4
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from datetime import date
+from math import ceil
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 
-from .models import House, StudentAdmission
-from .serializers import HouseSerializer, FlatStudentSerializer, FlatStudentPartialUpdateSerializer
-from base.views import BaseViewSet
+from .models import House, FeePayment, StudentAdmission, StudentPersonalDetail, StudentParentDetail, StudentGuardianDetail
+from .serializers import HouseSerializer, FeePaymentSerializer, StudentHostelDetailSerializer, StudentTransportDetailSerializer, FlatStudentSerializer, FlatStudentPartialUpdateSerializer, STUDENT_FIELD_RELATIONS
+from .bulk_import import import_students
+from .fee_assignment import assign_fee_groups
+from .fee_statement import fee_statement
+from .fee_defaulters import defaulters_report
+from .hostel_allocation import allocate_bed, release_bed
+from .transport_assignment import assign_transport, auto_assign_transport
+from .fee_payments import post_payments
+from .search import search_students
+from base.views import BaseViewSet, bool_param, int_param
+from master.models import HostelRoom, RoutePickupPoint, Vehicle
+from master.geo import parse_coordinate
+from base.uploads import UploadBatch, sniff_content_type
+from base.images import queue_thumbnail
+
+# Photo field -> (detail model holding it, thumbnail field)
+PHOTO_THUMBNAILS = {
+    'student_photo': (StudentPersonalDetail, 'student_photo_thumbnail'),
+    'father_photo': (StudentParentDetail, 'father_photo_thumbnail'),
+    'mother_photo': (StudentParentDetail, 'mother_photo_thumbnail'),
+    'guardian_photo': (StudentGuardianDetail, 'guardian_photo_thumbnail'),
+}
 
 
 def format_errors(errors):
@@ -29,10 +50,17 @@ def format_errors(errors):
     update=extend_schema(tags=["House"]),
     partial_update=extend_schema(tags=["House"]),
     destroy=extend_schema(tags=["House"]),
+    batch=extend_schema(tags=["House"]),
+    export=extend_schema(tags=["House"]),
 )
 class HouseViewSet(BaseViewSet):
     queryset = House.objects
     serializer_class = HouseSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'is_active': ('is_active', 'id'),
+    }
 
     def get_required_fields(self):
         return ['name']
@@ -50,8 +78,9 @@ class HouseViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
@@ -67,12 +96,32 @@ class HouseViewSet(BaseViewSet):
     update=extend_schema(tags=["Student"]),
     partial_update=extend_schema(tags=["Student"]),
     destroy=extend_schema(tags=["Student"]),
+    export=extend_schema(tags=["Student"]),
 )
 
 class StudentViewSet(BaseViewSet):
     queryset = StudentAdmission.objects.all()
     serializer_class = FlatStudentSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'roll_number': ('roll_number',),
+        'admission_date': ('admission_date', 'id'),
+        'school_class': ('school_class', 'section'),
+        'section': ('section',),
+        'fees_total_amount': None,
+        'personal__first_name': None,
+        'personal__last_name': None,
+    }
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    # Everything FlatStudentSerializer.to_representation touches
+    select_related_fields = [
+        'school_class', 'section',
+        'personal', 'physical__house', 'parents', 'guardian', 'address', 'bank',
+        'transport__vehicle', 'transport__pickup_point__route', 'transport__pickup_point__pickup_point',
+        'hostel__hostel', 'hostel__hostel_room__room_type',
+    ]
+    prefetch_related_fields = ['fee_details', 'documents']
+    field_relations = STUDENT_FIELD_RELATIONS
 
     def get_required_fields(self):
         return ['roll_number', 'school_class', 'section']
@@ -80,50 +129,72 @@ class StudentViewSet(BaseViewSet):
     def get_search_fields(self):
         return ['roll_number']
 
-    def save_file(self, file):
-        if not file.content_type.startswith(('image/', 'application/')):
-            raise ValueError("Only image or document files are allowed.")
-        if file.size > 5 * 1024 * 1024:
-            raise ValueError("File too large (max 5MB).")
-        ext = file.name.split('.')[-1]
-        unique_name = f"{uuid4().hex}.{ext}"
-        file_path = os.path.join('students/', unique_name)
-        return default_storage.save(file_path, ContentFile(file.read()))
+    def filter_queryset(self, queryset, params):
+        # Names, parents and phone numbers are searched through the
+        # full-text index instead of icontains over the detail tables.
+        search_text = params.get('search_text', '').strip()
+        if search_text:
+            queryset = search_students(queryset, search_text)
+        return queryset
+
+    def get_ordering(self, params):
+        if params.get('search_text', '').strip() and not params.get('order_by_field'):
+            return ['search_rank', 'id']
+        return super().get_ordering(params)
+
+    def check_ordering_cost(self, queryset, ordering, total_count=None):
+        # The rank comes from the search index and only sorts the matches
+        if ordering and ordering[0] == 'search_rank':
+            return
+        super().check_ordering_cost(queryset, ordering, total_count)
+
+    def save_file(self, uploads, file):
+        # Type is sniffed from the content; images and PDF/Office documents
+        return uploads.stage(file, allowed_types=('image/', 'application/'))
+
+    def get_upload_data(self, request, uploads):
+        """
+        Flatten the multipart payload, staging photos and documents so the
+        serializer sees their final storage paths and validates only once.
+        """
+        data = request.data.dict()
+        files = request.FILES
+
+        documents = []
+        for key in files:
+            if key.startswith("document_") and key.endswith("_files"):
+                index = key.split("_")[1]
+                title_key = f"document_{index}_title"
+                title = request.data.get(title_key, "Untitled Document")
+                documents.append({'title': title, 'document': self.save_file(uploads, files[key])})
+            elif key in PHOTO_THUMBNAILS:
+                data[key] = self.save_file(uploads, files[key])
+
+        data['documents'] = documents
+        return data
+
+    def queue_thumbnails(self, request, student):
+        # Registered after the upload batch, so files are stored first. Photo
+        # fields also accept documents, which get no thumbnail.
+        for field, (model, thumbnail_field) in PHOTO_THUMBNAILS.items():
+            file = request.FILES.get(field)
+            if file is not None and (sniff_content_type(file)[0] or '').startswith('image/'):
+                queue_thumbnail(model.objects.filter(student=student), field, thumbnail_field)
 
     def create(self, request, *args, **kwargs):
         try:
-            data = request.data.dict()
-            files = request.FILES
-
-            documents = []
-            photo_files = {}
-
-            for key in files:
-                if key.startswith("document_") and key.endswith("_files"):
-                    index = key.split("_")[1]
-                    title_key = f"document_{index}_title"
-                    title = request.data.get(title_key, "Untitled Document")
-                    documents.append({'title': title, 'document': files[key]})
-                elif key in ['student_photo', 'father_photo', 'mother_photo', 'guardian_photo']:
-                    photo_files[key] = files[key]
-                    data[key] = "placeholder.jpg"
-
-            data['documents'] = [{} for _ in documents]
+            uploads = UploadBatch('students/')
+            data = self.get_upload_data(request, uploads)
 
             serializer = FlatStudentSerializer(data=data)
             serializer.is_valid(raise_exception=True)
 
-            for key in photo_files:
-                data[key] = self.save_file(photo_files[key])
-
-            data['documents'] = [
-                {'title': doc['title'], 'document': self.save_file(doc['document'])}
-                for doc in documents
-            ]
-
-            serializer = FlatStudentSerializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            student = serializer.save()
+            # One transaction for every admission table; files reach storage
+            # only after it commits.
+            with transaction.atomic():
+                student = serializer.save()
+                uploads.commit_on_success()
+                self.queue_thumbnails(request, student)
 
             return Response({
                 "message": "Success",
@@ -137,38 +208,19 @@ class StudentViewSet(BaseViewSet):
     def partial_update(self, request, *args, **kwargs):
         instance = self.get_object()
         try:
-            data = request.data.dict()
-            files = request.FILES
-
-            documents = []
-            photo_files = {}
-
-            for key in files:
-                if key.startswith("document_") and key.endswith("_files"):
-                    index = key.split("_")[1]
-                    title_key = f"document_{index}_title"
-                    title = request.data.get(title_key, "Untitled Document")
-                    documents.append({'title': title, 'document': files[key]})
-                elif key in ['student_photo', 'father_photo', 'mother_photo', 'guardian_photo']:
-                    photo_files[key] = files[key]
-                    data[key] = "placeholder.jpg"
-
-            data['documents'] = [{} for _ in documents]
+            uploads = UploadBatch('students/')
+            data = self.get_upload_data(request, uploads)
 
             serializer = FlatStudentPartialUpdateSerializer(instance, data=data, partial=True)
             serializer.is_valid(raise_exception=True)
 
-            for key in photo_files:
-                data[key] = self.save_file(photo_files[key])
+            with transaction.atomic():
+                student = serializer.save()
+                uploads.commit_on_success()
+                self.queue_thumbnails(request, student)
 
-            data['documents'] = [
-                {'title': doc['title'], 'document': self.save_file(doc['document'])}
-                for doc in documents
-            ]
-
-            serializer = FlatStudentPartialUpdateSerializer(instance, data=data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            student = serializer.save()
+            # The instance carries the relations loaded before the update
+            student = self.get_queryset().get(pk=student.pk)
 
             return Response({
                 "message": "Success",
@@ -189,11 +241,505 @@ class StudentViewSet(BaseViewSet):
     )
     @action(detail=False, methods=["get"], url_path="all")
     def get_all(self, request):
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
+        fields = self.get_requested_fields(request.query_params)
+        queryset = self.get_queryset(fields)
+        serializer = self.get_serializer(queryset, fields=fields, many=True)
         return Response({
             "message": "Success",
             "status": status.HTTP_200_OK,
             "data": serializer.data,
             "count": queryset.count()
-        })
\ No newline at end of file
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Bulk admission import. Upload a CSV or XLSX file as `file`; the header row uses the "
+            "create endpoint's field names and `fee_details` holds a JSON list of fee group ids. "
+            "Valid rows are saved in chunks and every rejected row is reported."
+        ),
+        request={"multipart/form-data": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}},
+        responses={200: OpenApiResponse(response={
+            "message": "Import completed", "status": 200,
+            "data": {"total_rows": 2, "created": 1, "failed": 1, "errors": [{"row": 3, "roll_number": "102", "errors": {"section": ["This field is required."]}}]}
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ["This field is required."]})
+        report = import_students(upload)
+        return Response({
+            "message": "Import completed",
+            "status": status.HTTP_200_OK,
+            "data": report
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Assign fee groups to many students at once, replacing their current fee groups. "
+            "Select students by `student_ids`, `school_class` and/or `section`."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "fee_groups": {"type": "array", "items": {"type": "integer"}, "example": [1, 2]},
+                "school_class": {"type": "integer", "example": 1},
+                "section": {"type": "integer", "example": None},
+                "student_ids": {"type": "array", "items": {"type": "integer"}, "example": []},
+            },
+            "required": ["fee_groups"],
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Fees assigned successfully.", "status": 200,
+            "data": {"students": 40, "created": 80, "updated": 0, "deleted": 40}
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="fees/assign")
+    def assign_fees(self, request):
+        params = request.data
+        fee_group_ids = params.get('fee_groups')
+        if not isinstance(fee_group_ids, list) or not all(isinstance(value, int) for value in fee_group_ids):
+            raise ValidationError({'fee_groups': ["Must be a list of fee group ids."]})
+
+        filters = self.get_student_filters(params)
+        if not filters:
+            raise ValidationError({'non_field_errors': ["Provide student_ids, school_class or section."]})
+
+        student_ids = StudentAdmission.objects.filter(**filters).values_list('id', flat=True)
+        result = assign_fee_groups(student_ids, fee_group_ids)
+        return Response({
+            "message": "Fees assigned successfully.",
+            "status": status.HTTP_200_OK,
+            "data": result
+        })
+
+    def get_student_filters(self, params):
+        """Student selection shared by the fee endpoints: ids, class and/or section."""
+        filters = {}
+        if params.get('student_ids'):
+            filters['id__in'] = params['student_ids']
+        if params.get('school_class'):
+            filters['school_class_id'] = params['school_class']
+        if params.get('section'):
+            filters['section_id'] = params['section']
+        return filters
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Fee statement for a set of students: charged amount, discount, paid, balance, the "
+            "overdue part of the balance, fine on overdue fees (FeesMaster Percentage/Fix rules) "
+            "and net payable, with totals. Select students by `student_ids`, `school_class` and/or "
+            "`section`; with none of them the whole school is included. `as_of` defaults to today."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "school_class": {"type": "integer", "example": 1},
+                "section": {"type": "integer", "example": None},
+                "student_ids": {"type": "array", "items": {"type": "integer"}, "example": []},
+                "as_of": {"type": "string", "format": "date", "example": "2025-04-30"},
+            },
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": {
+                "as_of": "2025-04-30", "students": 1,
+                "totals": {"total_amount": "1200.00", "discount": "0.00", "paid": "500.00", "balance": "700.00",
+                           "overdue": "700.00", "fine": "50.00", "net_payable": "750.00"},
+                "rows": [{"student_id": 1, "roll_number": "101", "student_name": "Asha Rao", "school_class": "Class 1",
+                          "section": "A", "total_amount": "1200.00", "discount": "0.00", "paid": "500.00",
+                          "balance": "700.00", "overdue": "700.00", "fine": "50.00", "net_payable": "750.00"}]
+            }
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="fees/statement")
+    def fee_statement(self, request):
+        params = request.data
+        students = StudentAdmission.objects.filter(**self.get_student_filters(params))
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": fee_statement(students, self.get_as_of(params))
+        })
+
+    def get_as_of(self, params):
+        """`as_of` date of the fee reports, today when not given."""
+        as_of = params.get('as_of')
+        if not as_of:
+            return timezone.localdate()
+        try:
+            return date.fromisoformat(str(as_of))
+        except ValueError:
+            raise ValidationError({'as_of': ["Date has wrong format. Use YYYY-MM-DD."]})
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Students with overdue fees: rows due before `as_of` (default today) whose amount "
+            "less paid and discount is still positive. Returns totals, a summary per class, "
+            "section and fee group, and a page of students ordered by overdue amount. Filter by "
+            "`student_ids`, `school_class`, `section` and/or `fees_group`."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "school_class": {"type": "integer", "example": 1},
+                "section": {"type": "integer", "example": None},
+                "student_ids": {"type": "array", "items": {"type": "integer"}, "example": []},
+                "fees_group": {"type": "integer", "example": None},
+                "as_of": {"type": "string", "format": "date", "example": "2025-04-30"},
+                "page": {"type": "integer", "example": 1},
+                "pageSize": {"type": "integer", "example": 10},
+            },
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Success", "status": 200,
+            "data": {
+                "as_of": "2025-04-30",
+                "totals": {"students": 1, "fee_rows": 2, "overdue": "700.00"},
+                "groups": [{"school_class": 1, "school_class_name": "Class 1", "section": 1, "section_name": "A",
+                            "fees_group": 1, "fees_group_name": "Term 1", "students": 1, "fee_rows": 2,
+                            "overdue": "700.00"}],
+                "rows": [{"student_id": 1, "roll_number": "101", "student_name": "Asha Rao", "school_class": "Class 1",
+                          "section": "A", "fee_rows": 2, "oldest_due_date": "2025-04-10", "overdue": "700.00"}]
+            },
+            "count": 1, "page": 1, "pageSize": 10, "no_of_pages": 1
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="fees/defaulters")
+    def fee_defaulters(self, request):
+        params = request.data
+        pageSize = int_param(params, 'pageSize', 10)
+        page = int_param(params, 'page', 1)
+        if page < 1 or pageSize < 1:
+            raise NotFound("Invalid page.")
+        pageSize = min(pageSize, self.pagination_class.max_page_size)
+
+        report, count = defaulters_report(
+            self.get_as_of(params), self.get_student_filters(params),
+            fees_group=params.get('fees_group'), page=page, page_size=pageSize
+        )
+        return Response({
+            "message": "Success",
+            "status": status.HTTP_200_OK,
+            "data": report,
+            "count": count,
+            "page": page,
+            "pageSize": pageSize,
+            "no_of_pages": ceil(count / pageSize)
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Allocate a hostel bed to the student: bed `bed_number` of `hostel_room`, or its "
+            "lowest free bed. A student who already holds a bed is moved. The room is locked "
+            "while the bed is taken, so two allocations can never get the same bed."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "hostel_room": {"type": "integer", "example": 1},
+                "bed_number": {"type": "integer", "example": None},
+            },
+            "required": ["hostel_room"],
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Bed allocated successfully.", "status": 200,
+            "data": {"hostel": 1, "hostel_room": 1, "bed": 3, "bed_number": "2", "cost_per_bed": "1500.00"}
+        })}
+    )
+    @action(detail=True, methods=["post"], url_path="hostel/allocate")
+    def allocate_hostel_bed(self, request, pk=None):
+        student = self.get_object()
+        params = request.data
+        try:
+            room = HostelRoom.objects.get(pk=params.get('hostel_room'))
+        except (HostelRoom.DoesNotExist, ValueError, TypeError):
+            raise ValidationError({'hostel_room': ["Select a valid hostel room."]})
+        bed_number = params.get('bed_number')
+        if bed_number not in (None, ''):
+            try:
+                bed_number = int(bed_number)
+            except (TypeError, ValueError):
+                raise ValidationError({'bed_number': ["A valid integer is required."]})
+        else:
+            bed_number = None
+
+        detail = allocate_bed(student, room, bed_number)
+        return Response({
+            "message": "Bed allocated successfully.",
+            "status": status.HTTP_200_OK,
+            "data": StudentHostelDetailSerializer(detail).data
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description="Release the hostel bed the student holds.",
+        request=None,
+        responses={200: OpenApiResponse(response={"message": "Bed released successfully.", "status": 200})}
+    )
+    @action(detail=True, methods=["post"], url_path="hostel/release")
+    def release_hostel_bed(self, request, pk=None):
+        student = self.get_object()
+        if not release_bed(student):
+            raise ValidationError({'non_field_errors': ["The student holds no hostel bed."]})
+        return Response({
+            "message": "Bed released successfully.",
+            "status": status.HTTP_200_OK
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Set the student's vehicle and pickup point (route pickup point id); null for both "
+            "unassigns. Refused when the vehicle has no free seat. Keeps the route and vehicle "
+            "occupancy counters in step."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "vehicle": {"type": "integer", "nullable": True, "example": 1},
+                "pickup_point": {"type": "integer", "nullable": True, "example": 1},
+            },
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Transport assigned successfully.", "status": 200,
+            "data": {"id": 1, "fees_month": None, "vehicle": 1, "pickup_point": 1}
+        })}
+    )
+    @action(detail=True, methods=["post"], url_path="transport/assign")
+    def assign_transport_seat(self, request, pk=None):
+        student = self.get_object()
+        params = request.data
+        targets = {}
+        for field, model in (('vehicle', Vehicle), ('pickup_point', RoutePickupPoint)):
+            value = params.get(field)
+            if value in (None, ''):
+                targets[field] = None
+                continue
+            try:
+                targets[field] = model.objects.get(pk=value)
+            except (model.DoesNotExist, ValueError, TypeError):
+                raise ValidationError({field: [f'Invalid pk "{value}" - object does not exist.']})
+
+        detail = assign_transport(student, **targets)
+        return Response({
+            "message": "Transport assigned successfully.",
+            "status": status.HTTP_200_OK,
+            "data": StudentTransportDetailSerializer(detail).data
+        })
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["Student"],
+        description=(
+            "Assign many students a route pickup point and a vehicle in one go. Each item names the "
+            "`student` and either a preferred `pickup_point` (route pickup point id) or the student's "
+            "`latitude` and `longitude`, in which case the nearest stops are tried. Vehicles are taken "
+            "from the routes' vehicle links and never filled beyond `max_seating_capacity`; students "
+            "that cannot be placed are listed with a reason. With `dry_run` the plan is returned "
+            "without saving."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "students": {"type": "array", "items": {"type": "object"}, "example": [
+                    {"student": 1, "latitude": 12.9716, "longitude": 77.5946},
+                    {"student": 2, "pickup_point": 3},
+                ]},
+                "max_distance_km": {"type": "number", "nullable": True, "example": 5},
+                "dry_run": {"type": "boolean", "example": True},
+            },
+            "required": ["students"],
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Transport assigned successfully.", "status": 200,
+            "data": {
+                "assigned": [{"student": 1, "pickup_point": 4, "pickup_point_name": "Main Gate", "route": 1,
+                              "route_title": "Route 1", "vehicle": 2, "vehicle_number": "KA01", "distance_km": 0.42}],
+                "unassigned": [{"student": 2, "reason": "No vehicle with a free seat serves a nearby pickup point."}],
+                "total_distance_km": 0.42,
+            }
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="transport/auto-assign")
+    def auto_assign_transport(self, request):
+        params = request.data
+        items = params.get('students')
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'students': ["Must be a non-empty list of students."]})
+        if len(items) > self.batch_max_items:
+            raise ValidationError({'students': [f"A batch may contain at most {self.batch_max_items} students."]})
+        max_km = params.get('max_distance_km')
+        if max_km not in (None, ''):
+            try:
+                max_km = float(max_km)
+            except (TypeError, ValueError):
+                raise ValidationError({'max_distance_km': ["A valid number is required."]})
+        else:
+            max_km = None
+
+        errors, requests, seen = [], [], {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": {"non_field_errors": ["Expected an object."]}})
+                continue
+            student, preferred, point = item.get('student'), item.get('pickup_point'), None
+            try:
+                if not isinstance(student, int) or isinstance(student, bool):
+                    raise ValidationError({'student': ["A valid integer is required."]})
+                if student in seen:
+                    raise ValidationError({'student': ["Listed more than once."]})
+                if preferred not in (None, '') and (not isinstance(preferred, int) or isinstance(preferred, bool)):
+                    raise ValidationError({'pickup_point': ["A valid integer is required."]})
+                if preferred in (None, ''):
+                    preferred = None
+                if item.get('latitude') not in (None, '') or item.get('longitude') not in (None, ''):
+                    point = parse_coordinate(item.get('latitude'), item.get('longitude'))
+                elif preferred is None:
+                    raise ValidationError({'non_field_errors': ["Send a pickup_point or latitude and longitude."]})
+            except ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+                continue
+            seen[student] = index
+            requests.append((student, point, preferred))
+
+        existing = set(StudentAdmission.objects.filter(pk__in=seen).values_list('pk', flat=True))
+        for student, index in seen.items():
+            if student not in existing:
+                errors.append({"index": index, "errors": {"student": [f'Invalid pk "{student}" - object does not exist.']}})
+        if errors:
+            errors.sort(key=lambda error: error['index'])
+            return self.batch_error_response({"students": errors})
+
+        dry_run = bool_param(params, 'dry_run')
+        report = auto_assign_transport(requests, dry_run=dry_run, max_km=max_km)
+        return Response({
+            "message": "Transport assigned successfully." if not dry_run else "Success",
+            "status": status.HTTP_200_OK,
+            "data": report
+        })
+
+
+@extend_schema_view(
+    post=extend_schema(tags=["FeePayment"]),
+    retrieve=extend_schema(tags=["FeePayment"]),
+    create=extend_schema(tags=["FeePayment"]),
+    export=extend_schema(tags=["FeePayment"]),
+)
+class FeePaymentViewSet(BaseViewSet):
+    """
+    Fee receipts. The ledger is append-only, so there is no update or
+    delete; a wrong receipt is corrected by posting against other rows.
+    """
+    queryset = FeePayment.objects.all()
+    serializer_class = FeePaymentSerializer
+    ordering_fields = {
+        'id': ('id',),
+        'payment_date': ('payment_date', 'id'),
+        'student': ('student', 'payment_date'),
+    }
+    select_related_fields = ['student']
+    prefetch_related_fields = ['allocations', 'allocations__fee_detail__fees_group', 'allocations__fee_detail__fees_type']
+    field_relations = {
+        'allocations': ['allocations', 'allocations__fee_detail__fees_group', 'allocations__fee_detail__fees_type'],
+    }
+    # Most receipts one end-of-day batch may post
+    batch_max_items = 1000
+
+    def get_required_fields(self):
+        return ['student', 'amount']
+
+    def get_search_fields(self):
+        return ['student__roll_number', 'reference']
+
+    def filter_queryset(self, queryset, params):
+        queryset = super().filter_queryset(queryset, params)
+        if params.get('student'):
+            queryset = queryset.filter(student_id=params['student'])
+        if params.get('date_from'):
+            queryset = queryset.filter(payment_date__gte=params['date_from'])
+        if params.get('date_to'):
+            queryset = queryset.filter(payment_date__lte=params['date_to'])
+        return queryset
+
+    def create(self, request):
+        self.validate_required_fields(request.data)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            payment, = post_payments([serializer.validated_data])
+        except ValueError as exc:
+            raise ValidationError({'amount': list(exc.args[0].values())})
+        response_data = {
+            "message": "Payment posted successfully.",
+            "status": status.HTTP_201_CREATED,
+            "data": self.get_serializer(self.get_queryset().get(pk=payment.pk)).data
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        methods=["POST"],
+        tags=["FeePayment"],
+        description=(
+            "Post a batch of receipts (e.g. a counter's end-of-day batch) in one transaction. "
+            "Each receipt is allocated to the student's oldest dues first; nothing is posted "
+            "unless every receipt is valid and within the student's outstanding balance."
+        ),
+        request={"application/json": {
+            "type": "object",
+            "properties": {
+                "payments": {"type": "array", "items": {"type": "object"}, "example": [
+                    {"student": 1, "amount": "500.00", "payment_date": "2025-04-30", "payment_mode": "Cash"}
+                ]},
+            },
+            "required": ["payments"],
+        }},
+        responses={200: OpenApiResponse(response={
+            "message": "Payments posted successfully.", "status": 200,
+            "data": {"posted": 1, "ids": [10], "total_amount": "500.00"}
+        })}
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_post(self, request):
+        receipts = request.data.get('payments')
+        if not isinstance(receipts, list) or not receipts:
+            raise ValidationError({'payments': ["Must be a non-empty list of payments."]})
+        if len(receipts) > self.batch_max_items:
+            raise ValidationError({'payments': [f"A batch may contain at most {self.batch_max_items} payments."]})
+
+        serializer = self.serializer_class(data=receipts, many=True)
+        if not serializer.is_valid():
+            # ListSerializer reports {index: errors} (a list on older DRF)
+            item_errors = serializer.errors
+            if isinstance(item_errors, list):
+                item_errors = dict(enumerate(item_errors))
+            errors = [{"index": index, "errors": detail} for index, detail in item_errors.items() if detail]
+            return self.batch_error_response({"payments": errors})
+        try:
+            payments = post_payments(serializer.validated_data)
+        except ValueError as exc:
+            errors = [{"index": index, "errors": {"amount": [message]}} for index, message in exc.args[0].items()]
+            return self.batch_error_response({"payments": errors})
+
+        return Response({
+            "message": "Payments posted successfully.",
+            "status": status.HTTP_200_OK,
+            "data": {
+                "posted": len(payments),
+                "ids": [payment.pk for payment in payments],
+                "total_amount": str(sum(payment.amount for payment in payments)),
+            }
+        })